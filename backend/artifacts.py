@@ -0,0 +1,360 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Multipart artifact uploads are streamed into a per-request spool directory
+# (default: the system temp dir), one file per file part, and removed once the
+# files have been handed to MLflow. At most ARTIFACT_SPOOL_BUFFER bytes of a
+# part are held in memory before being written out.
+ARTIFACT_SPOOL_DIR = os.getenv("ARTIFACT_SPOOL_DIR") or None
+ARTIFACT_SPOOL_BUFFER = int(os.getenv("ARTIFACT_SPOOL_BUFFER", str(1024 * 1024)))
+
+
+class UploadError(ValueError):
+    """The upload body is malformed or does not match the expected checksum"""
+
+
+def make_spool_dir():
+    return tempfile.mkdtemp(prefix="upload-", dir=ARTIFACT_SPOOL_DIR)
+
+
+async def remove_spool_dir(path):
+    await asyncio.to_thread(shutil.rmtree, path, ignore_errors=True)
+
+
+def _safe_filename(raw):
+    name = os.path.basename(raw.decode("utf-8", errors="replace").replace("\\", "/"))
+    if name in ("", ".", ".."):
+        raise UploadError(f"Invalid upload filename {raw!r}")
+    return name
+
+
+def _write(fh, hasher, data):
+    fh.write(data)
+    if hasher is not None:
+        hasher.update(data)
+
+
+class _SpooledPart:
+    def __init__(self, filename, path, checksum):
+        self.filename = filename
+        self.path = path
+        self.size = 0
+        self.hasher = hashlib.sha256() if checksum else None
+        self.buffer = []
+        self.buffered = 0
+        self.fh = None
+
+    async def open(self):
+        if os.path.exists(self.path):
+            raise UploadError(f"Duplicate upload filename '{self.filename}'")
+        self.fh = await asyncio.to_thread(open, self.path, "wb")
+
+    async def feed(self, data):
+        self.buffer.append(data)
+        self.buffered += len(data)
+        self.size += len(data)
+        if self.buffered >= ARTIFACT_SPOOL_BUFFER:
+            await self.flush()
+
+    async def flush(self):
+        if self.buffer:
+            data = b"".join(self.buffer)
+            self.buffer.clear()
+            self.buffered = 0
+            await asyncio.to_thread(_write, self.fh, self.hasher, data)
+
+    async def close(self):
+        await self.flush()
+        await asyncio.to_thread(self.fh.close)
+
+    def describe(self):
+        info = {"filename": self.filename, "size": self.size}
+        if self.hasher is not None:
+            info["sha256"] = self.hasher.hexdigest()
+        return info
+
+
+async def spool_multipart(content_type, chunks, spool_dir, checksum=False):
+    """Write every file part of a multipart/form-data body into ``spool_dir``.
+
+    ``chunks`` is the request body as an async iterator of bytes. Parts are
+    saved under the basename of their filename; parts without a filename
+    (plain form fields) are skipped. Returns one ``{"filename", "size"}`` dict
+    per file, with its ``sha256`` hex digest when ``checksum`` is set.
+    """
+    media_type, options = parse_options_header(content_type or "")
+    if media_type != b"multipart/form-data" or not options.get(b"boundary"):
+        raise UploadError("Expected a multipart/form-data body with a boundary")
+
+    # The parser is synchronous: its callbacks only record events, which are
+    # then applied (with async file writes) after each chunk has been parsed
+    events = []
+    header = {"field": b"", "value": b""}
+
+    def on_header_field(data, start, end):
+        header["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        events.append(("header", header["field"].lower(), header["value"]))
+        header["field"], header["value"] = b"", b""
+
+    callbacks = {
+        "on_part_begin": lambda: events.append(("begin", None, None)),
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": lambda: events.append(("headers_finished", None, None)),
+        "on_part_data": lambda data, start, end: events.append(("data", data[start:end], None)),
+        "on_part_end": lambda: events.append(("end", None, None)),
+    }
+    parser = MultipartParser(options[b"boundary"], callbacks)
+
+    files = []
+    part = None
+    disposition = b""
+    try:
+        async for chunk in chunks:
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise UploadError(f"Malformed multipart body: {e}") from e
+            for kind, first, second in events:
+                if kind == "begin":
+                    disposition = b""
+                elif kind == "header" and first == b"content-disposition":
+                    disposition = second
+                elif kind == "headers_finished":
+                    filename = parse_options_header(disposition)[1].get(b"filename")
+                    if filename is not None:
+                        name = _safe_filename(filename)
+                        part = _SpooledPart(name, os.path.join(spool_dir, name), checksum)
+                        await part.open()
+                elif kind == "data" and part is not None:
+                    await part.feed(first)
+                elif kind == "end" and part is not None:
+                    await part.close()
+                    files.append(part.describe())
+                    part = None
+            events.clear()
+        if part is not None:
+            raise UploadError(f"Upload ended in the middle of '{part.filename}'")
+    finally:
+        if part is not None and part.fh is not None:
+            await asyncio.to_thread(part.fh.close)
+    if not files:
+        raise UploadError("No file parts in the upload")
+    return files
+
+
+# Downloaded artifacts are kept in an on-disk LRU cache keyed by run_id + path
+# (laid out as <cache dir>/<run digest>/<path digest>) and served from there.
+ARTIFACT_CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR", "/app/artifact_cache")
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(10 * 1024 ** 3)))
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+class ArtifactCache:
+    """Size-bounded LRU of downloaded artifact files.
+
+    ``acquire`` returns the local path of a cached file, calling
+    ``fetch(dst_dir)`` (which must download the artifact into ``dst_dir`` and
+    return the file's path) on a miss; concurrent misses for the same key share
+    one download. Acquired files are pinned until ``release`` so eviction never
+    removes a file that is being served. Recency is recorded in the files'
+    atime, so the LRU order survives restarts. Files larger than the whole
+    cache are still returned but removed on release.
+
+    Bookkeeping runs on the event loop; file system work runs in threads.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = None  # OrderedDict of key -> size, least recently used first
+        self._total = 0
+        self._pins = {}
+        self._loading = {}
+        self._waiters = {}  # key -> requests waiting for its download, pinned by _fill
+        self._uncached = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _scan(self):
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for run_dir in os.scandir(self.directory):
+            if not run_dir.is_dir() or run_dir.name.startswith("."):
+                continue
+            for entry in os.scandir(run_dir.path):
+                if entry.is_file():
+                    stat = entry.stat()
+                    found.append((stat.st_atime, (run_dir.name, entry.name), stat.st_size))
+        # Half-finished downloads from a previous process
+        shutil.rmtree(os.path.join(self.directory, ".incoming"), ignore_errors=True)
+        return [(key, size) for _, key, size in sorted(found)]
+
+    async def _ensure_loaded(self):
+        if self._entries is None:
+            entries = OrderedDict(await asyncio.to_thread(self._scan))
+            if self._entries is None:
+                self._entries = entries
+                self._total = sum(entries.values())
+
+    def _path(self, key):
+        return os.path.join(self.directory, *key)
+
+    @staticmethod
+    def _touch(path):
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except OSError:
+            pass
+
+    async def acquire(self, run_id, path, fetch):
+        await self._ensure_loaded()
+        key = (_digest(run_id), _digest(path))
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            local = self._path(key)
+            # Pinned before the first await, so no concurrent eviction can pick it
+            self._pins[local] = self._pins.get(local, 0) + 1
+            try:
+                await asyncio.to_thread(self._touch, local)
+            except BaseException:
+                await self.release(local)
+                raise
+            return local
+        self.misses += 1
+        loading = self._loading.get(key)
+        if loading is None or loading.done():
+            # Shielded so a disconnecting client does not abort a download others wait for
+            loading = self._loading[key] = asyncio.ensure_future(self._fill(key, fetch))
+            loading.add_done_callback(lambda _: self._loading.pop(key, None))
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(loading)
+        except BaseException:
+            if loading.done() and not loading.cancelled() and loading.exception() is None:
+                # The download finished and pinned the file for this request, which went away
+                await self.release(loading.result())
+            elif key in self._waiters:
+                self._waiters[key] -= 1
+            raise
+
+    async def _fill(self, key, fetch):
+        """Download into a staging dir and move the file into place; returns its local path.
+
+        The file is pinned once for every request waiting for it before it is
+        returned, with no await in between, so eviction cannot remove it first.
+        """
+        try:
+            local = await self._download(key, fetch)
+        except BaseException:
+            self._waiters.pop(key, None)
+            raise
+        waiters = self._waiters.pop(key, 0)
+        if waiters:
+            self._pins[local] = self._pins.get(local, 0) + waiters
+        elif local in self._uncached:
+            # Every request for this oversized file went away
+            self._uncached.discard(local)
+            await asyncio.to_thread(_remove, local)
+        return local
+
+    async def _download(self, key, fetch):
+        staging = os.path.join(self.directory, ".incoming")
+        await asyncio.to_thread(os.makedirs, staging, exist_ok=True)
+        dst_dir = await asyncio.to_thread(tempfile.mkdtemp, dir=staging)
+        try:
+            downloaded = await asyncio.to_thread(fetch, dst_dir)
+            if not os.path.isfile(downloaded):
+                raise IsADirectoryError("Artifact path is a directory")
+            size = os.path.getsize(downloaded)
+            if size > self.max_bytes:
+                local = os.path.join(staging, f"{key[0]}-{key[1]}-{time.time_ns()}")
+                await asyncio.to_thread(os.replace, downloaded, local)
+                self._uncached.add(local)
+                return local
+            target = self._path(key)
+            await asyncio.to_thread(os.makedirs, os.path.dirname(target), exist_ok=True)
+            await asyncio.to_thread(os.replace, downloaded, target)
+            self._entries[key] = size
+            self._total += size
+            await self._evict()
+            return target
+        finally:
+            await remove_spool_dir(dst_dir)
+
+    async def _evict(self):
+        victims = []
+        for key, size in list(self._entries.items()):
+            if self._total <= self.max_bytes:
+                break
+            if self._pins.get(self._path(key)) or key in self._loading:
+                continue
+            del self._entries[key]
+            self._total -= size
+            victims.append(self._path(key))
+        self.evictions += len(victims)
+        for victim in victims:
+            await asyncio.to_thread(_remove, victim)
+
+    async def release(self, local):
+        pins = self._pins.get(local, 0) - 1
+        if pins > 0:
+            self._pins[local] = pins
+            return
+        self._pins.pop(local, None)
+        if local in self._uncached:
+            self._uncached.discard(local)
+            await asyncio.to_thread(_remove, local)
+        elif self._total > self.max_bytes:
+            await self._evict()
+
+    async def invalidate_run(self, run_id):
+        """Drop every cached file of a run (after new artifacts were logged to it).
+
+        Files still being served are unlinked too; readers that already opened
+        them keep reading the old contents.
+        """
+        await self._ensure_loaded()
+        run_key = _digest(run_id)
+        for key in [key for key in self._entries if key[0] == run_key]:
+            self._total -= self._entries.pop(key)
+            await asyncio.to_thread(_remove, self._path(key))
+
+    def stats(self):
+        return {
+            "entries": len(self._entries or ()),
+            "bytes": self._total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+artifact_cache = ArtifactCache(ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_BYTES)
@@ -1,5 +1,13 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
 import mysql.connector
 
+from backend.metrics import DB_CHECKOUT_SECONDS, DB_QUERY_SECONDS, CallbackGauge
+
 DB_CONFIG = {
     "host": "localhost",
     "user": "root",
@@ -7,6 +15,173 @@ DB_CONFIG = {
     "database": "ml_dashboard"
 }
 
+# Connection pool sizing: at most DB_POOL_SIZE open connections, and a request
+# waits up to DB_POOL_TIMEOUT seconds for one to become free
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became available within the checkout timeout"""
+
+
+class TimedCursor:
+    """Cursor that records execute/executemany durations by statement keyword (SELECT, UPDATE, ...)"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _timed(self, method, operation, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(operation, *args, **kwargs)
+        finally:
+            keyword = operation.split(None, 1)[0].upper() if operation.strip() else "EMPTY"
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, keyword)
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.executemany, operation, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class TimedConnection:
+    """Pooled connection whose cursors are TimedCursors"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections, opened lazily and health-checked on borrow."""
+
+    def __init__(self, size, timeout, **config):
+        self.size = size
+        self.timeout = timeout
+        self.config = config
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.created = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _connect(self):
+        conn = mysql.connector.connect(**self.config)
+        with self._lock:
+            self.created += 1
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self.discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout(f"No database connection available within {self.timeout}s")
+        try:
+            conn = None
+            while conn is None:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = self._connect()
+                    break
+                # is_connected() pings the server, so stale sockets are dropped here
+                if not conn.is_connected():
+                    self._discard(conn)
+                    conn = None
+        except BaseException:
+            self._slots.release()
+            raise
+        waited = time.monotonic() - started
+        DB_CHECKOUT_SECONDS.observe(waited)
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        return conn
+
+    def release(self, conn):
+        # End any open transaction so the next borrower does not inherit its snapshot or locks
+        try:
+            conn.rollback()
+            self._idle.put(conn)
+        except Exception:
+            self._discard(conn)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield TimedConnection(conn)
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "in_use": self.in_use,
+                "idle": self._idle.qsize(),
+                "utilisation": self.in_use / self.size if self.size else 0.0,
+                "created": self.created,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "discarded": self.discarded,
+                "checkout_timeout_seconds": self.timeout,
+                "avg_wait_ms": self.wait_seconds_total / self.checkouts * 1000 if self.checkouts else 0.0,
+                "max_wait_ms": self.wait_seconds_max * 1000,
+            }
+
+
+pool = ConnectionPool(DB_POOL_SIZE, DB_POOL_TIMEOUT, **DB_CONFIG)
+
+CallbackGauge(
+    "db_pool_connections", "Pooled MySQL connections by state", ("state",),
+    lambda: {(state,): value for state, value in pool.stats().items() if state in ("in_use", "idle", "size")},
+)
+
+
+def db_connection():
+    """Borrow a pooled connection for the duration of a ``with`` block"""
+    return pool.connection()
+
+
+def get_pool_stats():
+    return pool.stats()
+
+
 def get_db_connection():
+    """Open a dedicated, unpooled connection; the caller must close it"""
     conn = mysql.connector.connect(**DB_CONFIG)
     return conn
@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from mlflow.artifacts import download_artifacts
+
+from backend.database import db_connection
+from backend.metrics import record_call
+from backend.model_cache import model_cache
+from backend.replicas import start_replica, stop_replica
+
+logger = logging.getLogger(__name__)
+
+# Deployment jobs run on a bounded pool: at most DEPLOY_MAX_WORKERS models are
+# downloaded and started at once, further jobs wait in the "queued" phase
+DEPLOY_MAX_WORKERS = int(os.getenv("DEPLOY_MAX_WORKERS", "2"))
+# Each API process records itself as the owner of the jobs it runs and
+# refreshes their heartbeat every DEPLOY_JOB_HEARTBEAT seconds; jobs whose
+# heartbeat is older than DEPLOY_JOB_STALE_AFTER seconds lost their process
+DEPLOY_JOB_HEARTBEAT = float(os.getenv("DEPLOY_JOB_HEARTBEAT", "15"))
+DEPLOY_JOB_STALE_AFTER = int(os.getenv("DEPLOY_JOB_STALE_AFTER", "60"))
+
+# Unique per process, also across hosts and reused pids
+JOB_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+QUEUED = "queued"
+DOWNLOADING = "downloading"
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_PHASES = (QUEUED, DOWNLOADING, STARTING)
+# Set by the reconciler once a ready deployment loses some or all of its containers
+DEGRADED = "degraded"
+DOWN = "down"
+SERVING_PHASES = (READY, DEGRADED, DOWN)
+
+
+class JobCancelled(Exception):
+    """The job was cancelled between two phases"""
+
+
+def model_ref(deployment_id):
+    """Name under which a deployment holds its model files in the model cache"""
+    return f"deployment_{deployment_id}"
+
+
+def download_model(source, dst_path):
+    """Download the model files at ``source``, timed at /metrics as an MLflow call"""
+    started = time.perf_counter()
+    try:
+        path = download_artifacts(artifact_uri=source, dst_path=dst_path)
+    except BaseException:
+        record_call("mlflow", "download_artifacts", started, failed=True)
+        raise
+    record_call("mlflow", "download_artifacts", started)
+    return path
+
+
+def fetch_model(deployment_id, source):
+    """Local directory of the model at ``source``, downloaded through the model cache"""
+    return model_cache.materialize(
+        source, lambda dst_path: download_model(source, dst_path), ref=model_ref(deployment_id)
+    )
+
+
+def phase_durations(timings, now=None):
+    """Seconds spent in each phase so far (the current phase counts up to ``now``)"""
+    now = now or time.time()
+    return {phase: round((t["end"] or now) - t["start"], 3) for phase, t in (timings or {}).items()}
+
+
+class DeploymentJobs:
+    """Background deployment jobs, one per ``deployments`` row.
+
+    ``submit`` inserts the row in the ``queued`` phase and returns its id
+    straight away; a worker then moves it through ``downloading`` (model
+    files via the model cache), ``starting`` (one container per replica,
+    each on a leased port) and ``ready``, or
+    ends it as ``failed`` (with ``error`` set) or ``cancelled``. Every phase
+    change updates ``status`` and the start/end times in ``phase_timings``.
+
+    Cancelling a queued job removes it from the queue; a running job stops at
+    the next phase boundary (containers that were already started are
+    stopped again). Jobs live in the process that submitted them, recorded as
+    ``job_owner``; a heartbeat thread keeps their ``job_heartbeat`` fresh and
+    fails the active jobs of processes that stopped heartbeating
+    (``fail_interrupted``), so several API processes can share the table.
+    """
+
+    def __init__(self, max_workers, heartbeat=DEPLOY_JOB_HEARTBEAT, owner=JOB_OWNER):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="deploy")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self.heartbeat = heartbeat
+        self.owner = owner
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the heartbeat thread (also sweeping jobs of processes that went away)"""
+        if self._thread is not None or self.heartbeat <= 0:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run_heartbeat, name="deploy-heartbeat", daemon=True)
+        self._thread.start()
+
+    def _run_heartbeat(self):
+        while not self._stopping.wait(self.heartbeat):
+            try:
+                self.beat()
+                fail_interrupted()
+            except Exception:
+                logger.exception("Deployment job heartbeat failed")
+
+    def beat(self):
+        """Refresh the heartbeat of this process's active jobs"""
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"UPDATE deployments SET job_heartbeat = NOW() "
+                f"WHERE job_owner = %s AND status IN ({', '.join(['%s'] * len(ACTIVE_PHASES))})",
+                (self.owner, *ACTIVE_PHASES)
+            )
+            conn.commit()
+
+    def _set_phase(self, deployment_id, timings, phase, error=None):
+        now = time.time()
+        for t in timings.values():
+            if t["end"] is None:
+                t["end"] = now
+        terminal = phase not in ACTIVE_PHASES
+        timings[phase] = {"start": now, "end": now if terminal else None}
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE deployments SET status = %s, phase_timings = %s, error = %s, last_updated = NOW(), "
+                "job_heartbeat = NOW() WHERE id = %s",
+                (phase, json.dumps(timings), error, deployment_id)
+            )
+            conn.commit()
+
+    def submit(self, name, model, version, source, replicas=1):
+        """Queue a deployment of the model version stored at ``source``; returns the deployment id"""
+        timings = {QUEUED: {"start": time.time(), "end": None}}
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO deployments "
+                "(name, model, version, replicas, status, last_updated, phase_timings, job_owner, job_heartbeat) "
+                "VALUES (%s, %s, %s, %s, %s, NOW(), %s, %s, NOW())",
+                (name, model, version, replicas, QUEUED, json.dumps(timings), self.owner)
+            )
+            conn.commit()
+            deployment_id = cursor.lastrowid
+        cancel = threading.Event()
+        with self._lock:
+            future = self._executor.submit(self._run, deployment_id, model, version, source, replicas, timings, cancel)
+            self._jobs[deployment_id] = (future, cancel, timings)
+        future.add_done_callback(lambda f: self._forget(deployment_id, f))
+        return deployment_id
+
+    def _forget(self, deployment_id, future):
+        with self._lock:
+            self._jobs.pop(deployment_id, None)
+        if not future.cancelled() and future.exception() is not None:
+            # Recording the outcome itself failed (e.g. the database is unreachable)
+            logger.error("Deployment job %s ended without recording its status", deployment_id,
+                         exc_info=future.exception())
+
+    def _run(self, deployment_id, model, version, source, replicas, timings, cancel):
+        started = []
+        try:
+            if cancel.is_set():
+                raise JobCancelled()
+            self._set_phase(deployment_id, timings, DOWNLOADING)
+            model_path = fetch_model(deployment_id, source)
+            if cancel.is_set():
+                raise JobCancelled()
+            self._set_phase(deployment_id, timings, STARTING)
+            for replica in range(replicas):
+                start_replica(deployment_id, replica, model_path)
+                started.append(replica)
+                if cancel.is_set():
+                    raise JobCancelled()
+            self._set_phase(deployment_id, timings, READY)
+        except JobCancelled:
+            self._abort(deployment_id, timings, started, CANCELLED)
+        except Exception as e:
+            logger.exception("Deployment %s of %s version %s failed", deployment_id, model, version)
+            self._abort(deployment_id, timings, started, FAILED, str(e))
+
+    def _abort(self, deployment_id, timings, started, phase, error=None):
+        for replica in started:
+            try:
+                stop_replica(deployment_id, replica)
+            except Exception:
+                logger.exception("Could not stop replica %s of deployment %s", replica, deployment_id)
+        model_cache.release(model_ref(deployment_id))
+        self._set_phase(deployment_id, timings, phase, error)
+
+    def cancel(self, deployment_id):
+        """Cancel a job of this process; False if it is not queued or running here"""
+        with self._lock:
+            job = self._jobs.get(deployment_id)
+        if job is None:
+            return False
+        future, cancel, timings = job
+        cancel.set()
+        if future.cancel():
+            # Never started: nothing to clean up
+            self._set_phase(deployment_id, timings, CANCELLED)
+        return True
+
+    def shutdown(self):
+        """Cancel queued jobs; running jobs finish their current work"""
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join(10.0)
+            self._thread = None
+        with self._lock:
+            jobs = list(self._jobs.items())
+        for deployment_id, (future, _, timings) in jobs:
+            if future.cancel():
+                self._set_phase(deployment_id, timings, CANCELLED)
+        self._executor.shutdown(wait=False)
+
+
+def fail_interrupted(stale_after=DEPLOY_JOB_STALE_AFTER):
+    """Mark rows left in an active phase by a process that stopped heartbeating as failed.
+
+    Jobs of live processes, this one or others sharing the database, are left
+    alone; rows without a heartbeat predate job ownership and count as orphaned.
+    """
+    placeholders = ", ".join(["%s"] * len(ACTIVE_PHASES))
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"UPDATE deployments SET status = %s, error = %s, last_updated = NOW() WHERE status IN ({placeholders}) "
+            f"AND (job_heartbeat IS NULL OR job_heartbeat < NOW() - INTERVAL %s SECOND)",
+            (FAILED, "Interrupted: the API process running the job stopped", *ACTIVE_PHASES, stale_after)
+        )
+        conn.commit()
+        return cursor.rowcount
+
+
+deployment_jobs = DeploymentJobs(DEPLOY_MAX_WORKERS)
@@ -0,0 +1,71 @@
+import numpy as np
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x, y, n_out):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    ``x`` must be sorted ascending. The first and last points are always kept;
+    the interior is split into ``n_out - 2`` buckets and from each bucket the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket is chosen. Bucket averages are computed for all
+    buckets at once and the triangle areas of a bucket in one vector operation,
+    so the Python loop runs once per output point rather than once per input point.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:n_out], dtype=np.int64)
+
+    x = x.astype(np.float64, copy=False)
+    y = y.astype(np.float64, copy=False)
+    n_buckets = n_out - 2
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    # The "next bucket" of the last interior bucket is the final point itself
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_buckets):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        areas = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(x, y, n_out):
+    """Indices of the minimum and maximum point of each of ``n_out // 2`` equal-count buckets.
+
+    Fully vectorised: points are sorted by (bucket, value) once, after which the
+    first and last entry of every bucket are its minimum and maximum.
+    """
+    n = len(x)
+    n_buckets = max(n_out // 2, 1)
+    if n_out >= n:
+        return np.arange(n)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    counts = np.diff(edges)
+    bucket = np.repeat(np.arange(n_buckets), counts)
+    order = np.lexsort((y, bucket))
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    keep = np.concatenate([order[starts], order[ends - 1]])
+    return np.unique(keep)
+
+
+def downsample_indices(x, y, n_out, method="lttb"):
+    if method == "lttb":
+        return lttb_indices(x, y, n_out)
+    if method == "minmax":
+        return minmax_indices(x, y, n_out)
+    raise ValueError(f"Unknown downsampling method '{method}', expected one of {DOWNSAMPLE_METHODS}")
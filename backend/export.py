@@ -0,0 +1,135 @@
+from itertools import chain, islice
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Columnar export of runs: one row per run, the run info fields followed by one
+# float64 column per metric ("metrics.<key>") and one string column per param
+# ("params.<key>"). Each MLflow result page becomes one Arrow record batch.
+
+EXPORT_FORMATS = ("arrow", "parquet")
+EXPORT_MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+INFO_SCHEMA = pa.schema([
+    ("run_id", pa.string()),
+    ("run_name", pa.string()),
+    ("experiment_id", pa.string()),
+    ("status", pa.string()),
+    ("start_time", pa.timestamp("ms", tz="UTC")),
+    ("end_time", pa.timestamp("ms", tz="UTC")),
+    ("artifact_uri", pa.string()),
+    ("lifecycle_stage", pa.string()),
+])
+METRIC_PREFIX = "metrics."
+PARAM_PREFIX = "params."
+
+
+def build_schema(metric_keys, param_keys):
+    fields = list(INFO_SCHEMA)
+    fields += [pa.field(METRIC_PREFIX + key, pa.float64()) for key in metric_keys]
+    fields += [pa.field(PARAM_PREFIX + key, pa.string()) for key in param_keys]
+    return pa.schema(fields)
+
+
+def runs_to_batch(runs, metric_keys=None, param_keys=None):
+    """Flatten a page of MLflow Run entities into one record batch.
+
+    Without explicit keys the batch gets a column for every metric and param
+    present in the page, sorted by key.
+    """
+    infos = [run.info for run in runs]
+    metrics = [run.data.metrics for run in runs]
+    params = [run.data.params for run in runs]
+    if metric_keys is None:
+        metric_keys = sorted(set().union(*metrics))
+    if param_keys is None:
+        param_keys = sorted(set().union(*params))
+    arrays = [pa.array([getattr(info, f.name) for info in infos], type=f.type) for f in INFO_SCHEMA]
+    arrays += [pa.array([values.get(key) for values in metrics], type=pa.float64()) for key in metric_keys]
+    arrays += [pa.array([values.get(key) for values in params], type=pa.string()) for key in param_keys]
+    return pa.RecordBatch.from_arrays(arrays, schema=build_schema(metric_keys, param_keys))
+
+
+def scan_keys(pages):
+    """Sorted metric and param keys used by any run in ``pages``; only the key sets are kept"""
+    metric_keys, param_keys = set(), set()
+    for page in pages:
+        for run in page:
+            metric_keys.update(run.data.metrics)
+            param_keys.update(run.data.params)
+    return sorted(metric_keys), sorted(param_keys)
+
+
+class _DrainableSink:
+    """Write-only file object whose buffered output is handed out chunk by chunk"""
+
+    def __init__(self):
+        self._chunks = []
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def encode_batches(batches, schema, fmt):
+    """Yield the bytes of an Arrow IPC stream or Parquet file as each batch is written.
+
+    Arrow output is one IPC record batch per input batch; Parquet output is one
+    row group per input batch.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {EXPORT_FORMATS}")
+    sink = _DrainableSink()
+    out = pa.PythonFile(sink, mode="w")
+    if fmt == "arrow":
+        writer = pa.ipc.new_stream(out, schema)
+    else:
+        writer = pq.ParquetWriter(out, schema, compression="zstd")
+    try:
+        for batch in batches:
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_runs(pages, fmt, metric_keys=None, param_keys=None):
+    """Encode an experiment's runs as ``fmt``, yielding bytes as each page is encoded.
+
+    ``pages`` is called to get a fresh iterator over the MLflow result pages.
+    Pages are converted and written one at a time against a schema fixed up
+    front, so at most one page is held in memory. Key lists left as None are
+    filled by a first pass over ``pages()`` that keeps only the key sets
+    (runs are fetched twice); passing both lists skips that pass. Keys that
+    first appear between the two passes are left out.
+
+    The key scan and the first page are fetched before this returns, so
+    MLflow errors are raised here rather than in the middle of the body.
+    """
+    if metric_keys is None or param_keys is None:
+        found_metrics, found_params = scan_keys(pages())
+        metric_keys = found_metrics if metric_keys is None else metric_keys
+        param_keys = found_params if param_keys is None else param_keys
+    schema = build_schema(metric_keys, param_keys)
+    remaining = pages()
+    first = list(islice(remaining, 1))
+    batches = (runs_to_batch(page, metric_keys, param_keys) for page in chain(first, remaining))
+    return encode_batches(batches, schema, fmt)
@@ -0,0 +1,241 @@
+import asyncio
+import itertools
+import os
+import time
+
+import aiohttp
+import orjson
+
+from backend.database import db_connection
+from backend.http_session import LoopSession
+from backend.metrics import record_call
+from backend.replicas import fetch_replicas
+
+# Host on which the serving containers publish their leased ports
+DEPLOY_HOST = os.getenv("DEPLOY_HOST", "127.0.0.1")
+# Keep-alive connection pool shared by all /predict requests
+PREDICT_MAX_CONNECTIONS = int(os.getenv("PREDICT_MAX_CONNECTIONS", "100"))
+PREDICT_KEEPALIVE_EXPIRY = float(os.getenv("PREDICT_KEEPALIVE_EXPIRY", "30"))
+PREDICT_TIMEOUT = float(os.getenv("PREDICT_TIMEOUT", "60"))
+PREDICT_CONNECT_TIMEOUT = float(os.getenv("PREDICT_CONNECT_TIMEOUT", "5"))
+# Running replicas of a deployment are looked up at most this often
+PREDICT_REPLICA_TTL = float(os.getenv("PREDICT_REPLICA_TTL", "5"))
+# Micro-batching: concurrent single-row requests are merged into one
+# /invocations call of up to PREDICT_BATCH_MAX_SIZE rows, waiting at most
+# PREDICT_BATCH_MAX_WAIT_MS for more rows. A wait of 0 turns batching off.
+PREDICT_BATCH_MAX_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "32"))
+PREDICT_BATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "0"))
+
+
+class NoReplicas(Exception):
+    """The deployment has no running replica to send requests to"""
+
+
+class UpstreamError(Exception):
+    """A replica could not be reached or answered a batch with an error"""
+
+
+def single_row(payload):
+    """(format, columns, row) of a one-row MLflow scoring payload, or None for anything else"""
+    if not isinstance(payload, dict) or len(payload) != 1:
+        return None
+    (fmt, value), = payload.items()
+    if fmt == "dataframe_split" and isinstance(value, dict) and set(value) <= {"columns", "data"}:
+        data = value.get("data")
+        columns = value.get("columns") or ()
+        # Columns become part of the batch key, so they must be hashable
+        if isinstance(data, list) and len(data) == 1 and all(isinstance(c, str) for c in columns):
+            return fmt, tuple(columns), data[0]
+    elif fmt in ("dataframe_records", "instances") and isinstance(value, list) and len(value) == 1:
+        return fmt, (), value[0]
+    return None
+
+
+def merge_rows(fmt, columns, rows):
+    """One scoring payload holding ``rows`` in the given format"""
+    if fmt == "dataframe_split":
+        return {fmt: {"columns": list(columns), "data": rows} if columns else {"data": rows}}
+    return {fmt: rows}
+
+
+class _Batch:
+    def __init__(self, fmt, columns):
+        self.fmt = fmt
+        self.columns = columns
+        self.rows = []
+        self.waiters = []
+        self.timer = None
+
+
+class InferenceGateway:
+    """Forwards scoring requests to the running replicas of a deployment.
+
+    Requests go round robin over the replicas' leased ports through one
+    keep-alive ``aiohttp`` connection pool (created on first use in the running
+    event loop, closed by ``aclose``). A replica that refuses connections is
+    skipped and the replica list is reloaded.
+
+    With batching enabled, a single-row request waits up to ``max_wait_ms`` in
+    a per-deployment batch of requests with the same format and columns; the
+    batch is sent as one ``/invocations`` call once it is full or the wait is
+    over, and its ``predictions`` are split back into one response per row.
+    A batch the replica rejects is re-sent row by row, so each request gets
+    the answer to its own row.
+    """
+
+    def __init__(self, host=DEPLOY_HOST, max_connections=PREDICT_MAX_CONNECTIONS,
+                 keepalive_expiry=PREDICT_KEEPALIVE_EXPIRY, timeout=PREDICT_TIMEOUT,
+                 connect_timeout=PREDICT_CONNECT_TIMEOUT, replica_ttl=PREDICT_REPLICA_TTL):
+        self.host = host
+        self.replica_ttl = replica_ttl
+        # Pending batches hold futures of the old loop, so a new loop starts without them
+        self._http = LoopSession(max_connections, keepalive_expiry,
+                                 aiohttp.ClientTimeout(total=timeout, sock_connect=connect_timeout),
+                                 on_new_loop=self._reset_batches)
+        self._replicas = {}
+        self._round_robin = itertools.count()
+        self._batches = {}
+        self._sending = set()
+        self.requests = 0
+        self.upstream_calls = 0
+        self.batched_rows = 0
+        self.batch_fallbacks = 0
+
+    def _session(self):
+        return self._http.get()
+
+    def _reset_batches(self):
+        self._batches = {}
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    @staticmethod
+    def _load_ports(deployment_id):
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            replicas = fetch_replicas(cursor, deployment_id).get(deployment_id, [])
+        return [r["port"] for r in replicas if r["status"] == "running"]
+
+    async def _ports(self, deployment_id, refresh=False):
+        cached = self._replicas.get(deployment_id)
+        if refresh or cached is None or time.monotonic() - cached[0] > self.replica_ttl:
+            ports = await asyncio.to_thread(self._load_ports, deployment_id)
+            cached = self._replicas[deployment_id] = (time.monotonic(), ports)
+        if not cached[1]:
+            raise NoReplicas(f"Deployment {deployment_id} has no running replicas")
+        return cached[1]
+
+    async def invoke(self, deployment_id, body, content_type="application/json"):
+        """POST ``body`` to /invocations of the next replica; returns (status, content, content type)"""
+        http = self._session()
+        ports = await self._ports(deployment_id)
+        self.upstream_calls += 1
+        for attempt in range(len(ports)):
+            port = ports[next(self._round_robin) % len(ports)]
+            started = time.perf_counter()
+            try:
+                async with http.post(f"http://{self.host}:{port}/invocations", data=body,
+                                     headers={"Content-Type": content_type}) as response:
+                    result = response.status, await response.read(), response.content_type
+            except (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError) as e:
+                record_call("serving", "invocations", started, failed=True)
+                # Nothing was sent: try another replica with a fresh view of which ones run
+                if attempt == len(ports) - 1:
+                    raise UpstreamError(f"No replica of deployment {deployment_id} is reachable: {e!r}") from e
+                ports = await self._ports(deployment_id, refresh=True)
+                continue
+            except BaseException:
+                record_call("serving", "invocations", started, failed=True)
+                raise
+            record_call("serving", "invocations", started)
+            return result
+
+    async def predict(self, deployment_id, body, content_type="application/json",
+                      max_batch_size=PREDICT_BATCH_MAX_SIZE, max_wait_ms=PREDICT_BATCH_MAX_WAIT_MS):
+        """Score ``body``, batched with concurrent requests when it is a single JSON row"""
+        self.requests += 1
+        if max_wait_ms > 0 and max_batch_size > 1 and content_type == "application/json":
+            try:
+                row = single_row(orjson.loads(body))
+            except orjson.JSONDecodeError:
+                row = None
+            if row is not None:
+                return await self._batched(deployment_id, *row, max_batch_size, max_wait_ms)
+        return await self.invoke(deployment_id, body, content_type)
+
+    async def _batched(self, deployment_id, fmt, columns, row, max_batch_size, max_wait_ms):
+        loop = asyncio.get_running_loop()
+        self._session()
+        key = (deployment_id, fmt, columns, max_batch_size, max_wait_ms)
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch(fmt, columns)
+            batch.timer = loop.call_later(max_wait_ms / 1000, self._flush, key, batch)
+        waiter = loop.create_future()
+        batch.rows.append(row)
+        batch.waiters.append(waiter)
+        if len(batch.rows) >= max_batch_size:
+            batch.timer.cancel()
+            self._flush(key, batch)
+        return await waiter
+
+    def _flush(self, key, batch):
+        if self._batches.get(key) is batch:
+            del self._batches[key]
+        task = asyncio.ensure_future(self._send(key[0], batch))
+        # Keep a reference until the batch is answered
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, deployment_id, batch):
+        self.batched_rows += len(batch.rows)
+        try:
+            status, content, content_type = await self.invoke(
+                deployment_id, orjson.dumps(merge_rows(batch.fmt, batch.columns, batch.rows))
+            )
+            if status != 200 and len(batch.rows) > 1:
+                # One bad row fails the whole batch: score each row on its own, so
+                # only the request that sent it gets the error
+                self.batch_fallbacks += 1
+                results = await asyncio.gather(*(
+                    self.invoke(deployment_id, orjson.dumps(merge_rows(batch.fmt, batch.columns, [row])))
+                    for row in batch.rows
+                ), return_exceptions=True)
+            elif status != 200:
+                results = [(status, content, content_type)]
+            else:
+                predictions = orjson.loads(content)
+                if isinstance(predictions, dict):
+                    predictions = predictions.get("predictions")
+                if not isinstance(predictions, list) or len(predictions) != len(batch.rows):
+                    raise UpstreamError("Replica answered a batch with a response that cannot be split by row")
+                results = [
+                    (200, orjson.dumps({"predictions": [prediction]}), "application/json")
+                    for prediction in predictions
+                ]
+        except Exception as e:
+            for waiter in batch.waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            return
+        for waiter, result in zip(batch.waiters, results):
+            # A waiter is cancelled when its client went away
+            if waiter.done():
+                continue
+            if isinstance(result, BaseException):
+                waiter.set_exception(result)
+            else:
+                waiter.set_result(result)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "upstream_calls": self.upstream_calls,
+            "batched_rows": self.batched_rows,
+            "batch_fallbacks": self.batch_fallbacks,
+            "open_batches": len(self._batches),
+        }
+
+
+inference_gateway = InferenceGateway()
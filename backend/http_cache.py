@@ -0,0 +1,122 @@
+import hashlib
+import re
+
+from fastapi import Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+
+from backend.cache import TTLCache
+from backend.serializers import dumps
+
+# Conditional GET support: strong ETags over the JSON body (or a cheap
+# fingerprint of the data behind it) and 304 replies to matching If-None-Match.
+
+GZIP_ETAG_SUFFIX = "-gzip"
+
+# Rendered bodies of cached listings, keyed by (endpoint, variant) and tied to
+# the identity of the cached object they were rendered from
+_rendered = TTLCache(maxsize=64, ttl=3600)
+
+
+def make_etag(*parts):
+    """Strong ETag over byte strings (a response body or a data fingerprint)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag):
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def conditional_response(request: Request, etag, render):
+    """304 if the client already has ``etag``, otherwise a JSON response of ``render()`` bytes"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(render(), media_type="application/json", headers=headers)
+
+
+def json_response(request: Request, payload):
+    """Render ``payload`` and answer with 304 if its content hash matches If-None-Match"""
+    body = dumps(payload)
+    return conditional_response(request, make_etag(body), lambda: body)
+
+
+def cached_json_response(request: Request, key, source, build):
+    """Like ``json_response`` for payloads derived from a cached object.
+
+    ``build(source)`` is rendered and hashed once per ``source`` object; later
+    requests for the same ``key`` reuse the body and ETag for as long as the
+    listing cache hands out that same object.
+    """
+    entry = _rendered.get(key)
+    if entry is None or entry[0] is not source:
+        body = dumps(build(source))
+        entry = (source, make_etag(body), body)
+        _rendered.set(key, entry)
+    _, etag, body = entry
+    return conditional_response(request, etag, lambda: body)
+
+
+class GZipETagMiddleware:
+    """Keep strong ETags distinct per content coding when GZipMiddleware compresses a body.
+
+    Must wrap GZipMiddleware (i.e. be added after it). Outgoing gzip responses
+    get ``-gzip`` appended inside their ETag; incoming If-None-Match values
+    have it stripped so the routes only ever compare identity ETags, and a
+    resulting 304 echoes the tag the client sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client_gzip = False
+        headers = []
+        for name, value in scope["headers"]:
+            if name == b"if-none-match" and GZIP_ETAG_SUFFIX.encode() in value:
+                client_gzip = True
+                value = value.replace(GZIP_ETAG_SUFFIX.encode() + b'"', b'"')
+            headers.append((name, value))
+        scope["headers"] = headers
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response_headers = dict(message["headers"])
+                gzipped = response_headers.get(b"content-encoding") == b"gzip"
+                if gzipped or (message["status"] == 304 and client_gzip):
+                    message["headers"] = [
+                        (name, value[:-1] + GZIP_ETAG_SUFFIX.encode() + b'"' if name == b"etag" else value)
+                        for name, value in message["headers"]
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes through requests whose path matches one of ``exclude_paths``.
+
+    Used for file downloads: compressing them on the fly costs CPU, rules out
+    sendfile and would make byte ranges refer to the gzip stream.
+    """
+
+    def __init__(self, app, exclude_paths=(), **kwargs):
+        super().__init__(app, **kwargs)
+        self.exclude_paths = [re.compile(pattern) for pattern in exclude_paths]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and any(pattern.fullmatch(scope["path"]) for pattern in self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -0,0 +1,37 @@
+import asyncio
+
+import aiohttp
+
+
+class LoopSession:
+    """Keep-alive ``aiohttp`` session, created on first use in the running event loop.
+
+    A session is bound to the loop it was created on, so a new loop (e.g.
+    after a reload) gets a new connection pool; ``on_new_loop`` is called
+    then, for state tied to the old loop. ``aclose`` closes the pool.
+    """
+
+    def __init__(self, max_connections, keepalive_expiry, timeout, on_new_loop=None, **session_options):
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.on_new_loop = on_new_loop
+        self.session_options = session_options
+        self._http = None
+        self._loop = None
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=self.keepalive_expiry)
+            self._http = aiohttp.ClientSession(connector=connector, timeout=self.timeout, **self.session_options)
+            self._loop = loop
+            if self.on_new_loop is not None:
+                self.on_new_loop()
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+            self._loop = None
@@ -0,0 +1,266 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from mlflow.exceptions import MlflowException
+
+logger = logging.getLogger(__name__)
+
+# "sync" writes straight to MLflow; "wal" acknowledges after appending to the local log
+METRIC_INGEST_MODE = os.getenv("METRIC_INGEST_MODE", "sync")
+INGEST_WAL_DIR = os.getenv("INGEST_WAL_DIR", "/app/ingest_wal")
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", "1.0"))
+INGEST_FSYNC = os.getenv("INGEST_FSYNC", "1") == "1"
+INGEST_MAX_BACKOFF = float(os.getenv("INGEST_MAX_BACKOFF", "60"))
+
+SEGMENT_PREFIX = "wal-"
+SEGMENT_SUFFIX = ".log"
+
+
+class WriteBehindLog:
+    """Durable write-behind queue for metric, param and tag writes.
+
+    ``append`` writes entries to the current WAL segment (fsync'd when
+    ``fsync`` is set) before returning. A background thread rotates the
+    segment, coalesces the pending entries per run and hands each run's
+    metrics/params/tags to ``flush_fn(run_id, metrics, params, tags)``. Once a
+    cycle is done the rotated segments are deleted; entries of runs that failed
+    with a retriable error are first re-appended to the live segment and retried
+    with exponential backoff. Segments left behind by a crash are replayed by
+    ``start``.
+
+    Delivery is at-least-once: a crash between sending and deleting a segment
+    resends its entries, which MLflow treats as no-ops (identical metric rows
+    and identical param values are accepted).
+
+    When the tracking server rejects a run's coalesced call (a 4xx, e.g. a
+    param re-logged with another value), its metrics, params and tags are
+    resent as separate calls, and a call rejected again is split in halves
+    until only the rejected entries are left; just those are dropped.
+    """
+
+    def __init__(self, directory, flush_fn, flush_interval=1.0, fsync=True, max_backoff=60.0):
+        self.directory = directory
+        self.flush_fn = flush_fn
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pending = []
+        self._in_flight = 0
+        self._in_flight_since = None
+        self._segment_no = 0
+        self._fh = None
+        self.appended_total = 0
+        self.flushed_total = 0
+        self.dropped_total = 0
+        self.retries_total = 0
+        self.replayed_total = 0
+        self.consecutive_failures = 0
+        self.last_flush_at = None
+        self.last_error = None
+
+    # ---- segments -------------------------------------------------------
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}")
+
+    def _segment_numbers(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                numbers.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+        return sorted(numbers)
+
+    def _open_segment(self, number):
+        self._segment_no = number
+        self._fh = open(self._segment_path(number), "a", encoding="utf-8")
+
+    def _write(self, entries):
+        self._fh.write("".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries))
+        self._fh.flush()
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+
+    # ---- lifecycle -------------------------------------------------------
+    def start(self):
+        """Replay unflushed segments from a previous process and start the flusher thread"""
+        if self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        numbers = self._segment_numbers()
+        for number in numbers:
+            with open(self._segment_path(number), encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        self._pending.append(json.loads(line))
+                    except ValueError:
+                        # Torn final line from a crash mid-append; it was never acknowledged
+                        continue
+        self.replayed_total = len(self._pending)
+        self._open_segment(numbers[-1] + 1 if numbers else 1)
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="metric-ingest-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        """Stop the flusher after one last flush attempt; anything unsent stays in the WAL"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # Still sending: it rotates and rewrites segments, so the file stays open
+            logger.warning("Metric ingestion flusher still running after %ss; its WAL is replayed on restart", timeout)
+            return
+        self._thread = None
+        with self._lock:
+            self._fh.close()
+            self._fh = None
+
+    # ---- producer side ---------------------------------------------------
+    def append(self, entries):
+        """Durably queue entries (dicts with run_id, type, key, value and, for metrics, step/timestamp)"""
+        queued_at = time.time()
+        for entry in entries:
+            entry["queued_at"] = queued_at
+        with self._lock:
+            if self._fh is None:
+                raise RuntimeError("Write-behind ingestion is not running")
+            self._write(entries)
+            self._pending.extend(entries)
+            self.appended_total += len(entries)
+
+    # ---- flusher side ----------------------------------------------------
+    def _run(self):
+        backoff = 0.0
+        while True:
+            self._wake.wait(backoff or self.flush_interval)
+            self._wake.clear()
+            stopping = self._stopping.is_set()
+            try:
+                failed = self.flush()
+            except Exception as e:
+                logger.exception("Metric ingestion flush failed")
+                self.last_error = str(e)
+                failed = True
+            if failed:
+                self.consecutive_failures += 1
+                self.retries_total += 1
+                backoff = min(self.max_backoff, self.flush_interval * 2 ** self.consecutive_failures)
+            else:
+                self.consecutive_failures = 0
+                backoff = 0.0
+            if stopping:
+                return
+
+    def flush(self):
+        """Send everything pending to MLflow; returns True if some runs must be retried"""
+        with self._lock:
+            if not self._pending:
+                return False
+            batch, self._pending = self._pending, []
+            self._in_flight = len(batch)
+            self._in_flight_since = min(entry["queued_at"] for entry in batch)
+            self._fh.close()
+            self._open_segment(self._segment_no + 1)
+            live_segment = self._segment_no
+
+        by_run = {}
+        for entry in batch:
+            by_run.setdefault(entry["run_id"], []).append(entry)
+
+        retry = []
+        for run_id, entries in by_run.items():
+            metrics, params, tags = [], {}, {}
+            for entry in entries:
+                if entry["type"] == "metric":
+                    metrics.append(entry)
+                elif entry["type"] == "param":
+                    params[entry["key"]] = entry
+                else:
+                    tags[entry["key"]] = entry
+            params, tags = list(params.values()), list(tags.values())
+            # Earlier writes of a param or tag that a later one replaced are never sent
+            self.flushed_total += len(entries) - len(metrics) - len(params) - len(tags)
+            try:
+                self.flush_fn(run_id, metrics, params, tags)
+                self.flushed_total += len(metrics) + len(params) + len(tags)
+            except MlflowException as e:
+                self.last_error = str(e)
+                if e.get_http_status_code() < 500:
+                    # Rejected data: find the entries at fault instead of dropping the whole run
+                    for kind, items in (("metrics", metrics), ("params", params), ("tags", tags)):
+                        retry.extend(self._isolate(run_id, kind, items))
+                else:
+                    retry.extend(metrics + params + tags)
+            except Exception as e:
+                self.last_error = str(e)
+                retry.extend(metrics + params + tags)
+
+        with self._lock:
+            if retry:
+                self._write(retry)
+                self._pending[:0] = retry
+            self._in_flight = 0
+            self._in_flight_since = None
+            self.last_flush_at = time.time()
+        for number in self._segment_numbers():
+            if number < live_segment:
+                os.remove(self._segment_path(number))
+        return bool(retry)
+
+    def _isolate(self, run_id, kind, items):
+        """Send one kind of a run's entries, halving rejected calls; returns the entries to retry.
+
+        Only entries the tracking server rejects on their own are dropped;
+        each entry is counted as flushed or dropped exactly once.
+        """
+        if not items:
+            return []
+        calls = {"metrics": (items, [], []), "params": ([], items, []), "tags": ([], [], items)}
+        try:
+            self.flush_fn(run_id, *calls[kind])
+        except MlflowException as e:
+            self.last_error = str(e)
+            if e.get_http_status_code() >= 500:
+                return items
+            if len(items) == 1:
+                # The tracking server rejected the data itself; retrying cannot succeed
+                logger.error("Dropping queued %s write %r for run %s: %s", kind[:-1], items[0]["key"], run_id, e)
+                self.dropped_total += 1
+                return []
+            middle = len(items) // 2
+            return self._isolate(run_id, kind, items[:middle]) + self._isolate(run_id, kind, items[middle:])
+        except Exception as e:
+            self.last_error = str(e)
+            return items
+        self.flushed_total += len(items)
+        return []
+
+    def stats(self):
+        with self._lock:
+            # Retries are put back at the front, so the head of the queue is its oldest entry
+            queued = [self._pending[0]["queued_at"]] if self._pending else []
+            if self._in_flight_since is not None:
+                queued.append(self._in_flight_since)
+            oldest = min(queued, default=None)
+            depth = len(self._pending) + self._in_flight
+        return {
+            "running": self._thread is not None,
+            "queue_depth": depth,
+            "flush_lag_seconds": time.time() - oldest if oldest is not None else 0.0,
+            "appended_total": self.appended_total,
+            "flushed_total": self.flushed_total,
+            "dropped_total": self.dropped_total,
+            "retries_total": self.retries_total,
+            "replayed_total": self.replayed_total,
+            "consecutive_failures": self.consecutive_failures,
+            "last_flush_at": self.last_flush_at,
+            "last_error": self.last_error,
+        }
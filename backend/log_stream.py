@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import os
+from collections import deque
+
+from backend.runtime import container_runtime
+
+logger = logging.getLogger(__name__)
+
+# Lines kept per followed container; a viewer that falls further behind skips ahead
+LOG_BUFFER_LINES = int(os.getenv("LOG_BUFFER_LINES", "1000"))
+# Lines of history a new follower fetches from the runtime
+LOG_STREAM_TAIL = int(os.getenv("LOG_STREAM_TAIL", "100"))
+# Seconds between SSE keep-alive comments on a quiet stream
+LOG_STREAM_HEARTBEAT = float(os.getenv("LOG_STREAM_HEARTBEAT", "15"))
+
+
+class LogFollower:
+    """One upstream log stream of a container, shared by all its viewers.
+
+    Lines are numbered and kept, rendered as SSE events, in a ring buffer of
+    ``buffer_lines``. Each viewer only holds a cursor (the number of the last
+    line it got), so the follower never waits for a viewer and a viewer costs
+    no buffer of its own.
+    A viewer that falls more than the buffer behind, e.g. a slow client, skips
+    to the oldest buffered line and is told how many lines it missed.
+    """
+
+    def __init__(self, name, buffer_lines, tail):
+        self.name = name
+        self.tail = tail
+        self.lines = deque(maxlen=buffer_lines)
+        self.last_seq = 0
+        self.closed = False
+        self.error = None
+        self.viewers = 0
+        # Set and replaced whenever lines arrive or the stream ends
+        self._changed = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._follow())
+
+    async def _follow(self):
+        try:
+            async for batch in container_runtime.follow_logs(self.name, tail=self.tail):
+                for line in batch:
+                    self.last_seq += 1
+                    # Rendered once as an SSE event for every viewer; a carriage return would end the data field early
+                    self.lines.append((self.last_seq, f"id: {self.last_seq}\ndata: {line.replace(chr(13), '')}\n\n"))
+                self._notify()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Log stream of %s failed: %s", self.name, e)
+            self.error = e
+        self.closed = True
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def first_seq(self):
+        return self.lines[0][0] if self.lines else self.last_seq + 1
+
+    def since(self, cursor):
+        """(lines skipped, [(seq, event), ...]) of the buffered lines after ``cursor``"""
+        first = self.first_seq()
+        skipped = max(first - cursor - 1, 0)
+        # Buffered lines are consecutive, so the ones after the cursor are its tail
+        start = max(cursor + 1 - first, 0)
+        return skipped, [self.lines[i] for i in range(start, len(self.lines))]
+
+    async def wait(self, cursor, timeout):
+        """Wait until there are lines after ``cursor`` or the stream ended; False on timeout"""
+        if self.last_seq > cursor or self.closed:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class LogHub:
+    """Followers by container name, started by the first viewer and stopped after the last one leaves"""
+
+    def __init__(self, buffer_lines=LOG_BUFFER_LINES, tail=LOG_STREAM_TAIL, heartbeat=LOG_STREAM_HEARTBEAT):
+        self.buffer_lines = buffer_lines
+        self.tail = tail
+        self.heartbeat = heartbeat
+        self._followers = {}
+
+    def _attach(self, name):
+        follower = self._followers.get(name)
+        if follower is None or follower.closed:
+            follower = self._followers[name] = LogFollower(name, self.buffer_lines, self.tail)
+            follower.start()
+        follower.viewers += 1
+        return follower
+
+    def _detach(self, follower):
+        follower.viewers -= 1
+        if follower.viewers == 0:
+            follower.stop()
+            if self._followers.get(follower.name) is follower:
+                del self._followers[follower.name]
+
+    async def events(self, name, tail=50, last_event_id=None):
+        """Server-Sent Events of a container's log: one ``data`` event per line, numbered by its ``id``.
+
+        A new viewer starts with the last ``tail`` buffered lines, or right
+        after ``last_event_id`` when it reconnects. ``dropped`` events report
+        lines a slow viewer missed, ``end`` that the container's log ended.
+        """
+        follower = self._attach(name)
+        try:
+            # A fresh follower may not have received its history yet
+            if follower.last_seq == 0 and not follower.closed:
+                await follower.wait(0, self.heartbeat)
+            if last_event_id is not None and last_event_id <= follower.last_seq:
+                cursor = last_event_id
+            else:
+                # New viewer, or ids of an earlier follower of this container
+                cursor = max(follower.last_seq - tail, 0)
+            while True:
+                skipped, lines = follower.since(cursor)
+                if skipped:
+                    yield f"event: dropped\ndata: {skipped}\n\n"
+                if lines:
+                    yield "".join(event for _, event in lines)
+                    cursor = lines[-1][0]
+                elif follower.closed:
+                    reason = f"{follower.error}" if follower.error else "log stream ended"
+                    yield f"event: end\ndata: {reason}\n\n"
+                    return
+                elif not await follower.wait(cursor, self.heartbeat):
+                    yield ": keep-alive\n\n"
+        finally:
+            self._detach(follower)
+
+    def stats(self):
+        return {
+            "followers": len(self._followers),
+            "viewers": sum(f.viewers for f in self._followers.values()),
+            "buffer_lines": self.buffer_lines,
+        }
+
+
+log_hub = LogHub()
@@ -1,12 +1,48 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
+from fastapi.responses import JSONResponse
 
 # Import routers with full module path
-from backend.routers import experiments, runs, models, deployments
+from backend.routers import experiments, runs, models, deployments, system
+from backend.database import PoolTimeout
+from backend.deployment_jobs import deployment_jobs, fail_interrupted
+from backend.gateway import inference_gateway
+from backend.migrate import apply_migrations
+from backend.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from backend.mlflow_api import aclient, start_ingest, stop_ingest
+from backend.reconciler import deployment_reconciler
+from backend.runtime import container_runtime
+from backend.responses import FastJSONResponse
+from backend.http_cache import GZipETagMiddleware, SelectiveGZipMiddleware
 
 import uvicorn
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Background workers live as long as the app
+    start_ingest()
+    try:
+        apply_migrations()
+    except Exception:
+        logging.getLogger(__name__).exception("Could not apply database migrations")
+    try:
+        fail_interrupted()
+    except Exception:
+        logging.getLogger(__name__).exception("Could not mark interrupted deployment jobs as failed")
+    deployment_jobs.start()
+    deployment_reconciler.start()
+    yield
+    deployment_reconciler.stop()
+    deployment_jobs.shutdown()
+    container_runtime.close()
+    stop_ingest()
+    await aclient.aclose()
+    await inference_gateway.aclose()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Enable CORS for frontend communication
 app.add_middleware(
@@ -17,11 +53,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses for clients that send Accept-Encoding: gzip. Parquet exports
+# are already compressed and artifact downloads are served byte for byte (Range
+# support). A moderate level keeps CPU low for large run listings.
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    exclude_paths=(r"/runs/[^/]+/artifacts/.+",),
+    minimum_size=1000,
+    compresslevel=5,
+    exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + ("application/vnd.apache.parquet",),
+)
+app.add_middleware(GZipETagMiddleware)
+
+# Added last so it is the outermost layer: latencies include compression and CORS
+app.add_middleware(MetricsMiddleware)
+
+# Every pooled MySQL connection is busy: tell the client to retry rather than hang
+@app.exception_handler(PoolTimeout)
+def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 # Include Routers
 app.include_router(experiments.router, prefix="/experiments", tags=["Experiments"])
 app.include_router(runs.router, prefix="/runs", tags=["Runs"])
 app.include_router(models.router, prefix="/models", tags=["Models"])
 app.include_router(deployments.router, prefix="/deployments", tags=["Deployments"])
+app.include_router(system.router, prefix="/system", tags=["System"])
 
 if __name__ == "__main__":
     uvicorn.run("backend.main:app", host="127.0.0.1", port=8000, reload=True)
@@ -0,0 +1,260 @@
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# In-process metrics exposed at /metrics in the Prometheus text format. Every
+# update is a dict lookup and an add under a per-metric lock, so recording
+# costs well under a microsecond and needs no client library.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.lines())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name, help, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _snapshot(self):
+        with self._lock:
+            return sorted(self._values.items())
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def lines(self):
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in self._snapshot()]
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose values are read from ``collect()`` ({label values: value}) at scrape time"""
+
+    type = "gauge"
+
+    def __init__(self, name, help, labelnames, collect, registry=REGISTRY):
+        super().__init__(name, help, labelnames, registry)
+        self.collect = collect
+
+    def lines(self):
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                for labels, value in sorted(self.collect().items())]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        super().__init__(name, help, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf) and the sum
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def lines(self):
+        lines = []
+        for labels, (counts, total) in self._snapshot():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+# ---- API -----------------------------------------------------------------
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time until the response was sent, by route template", ("method", "route")
+)
+HTTP_RESPONSES = Counter("http_responses_total", "Responses by route template and status code",
+                         ("method", "route", "status"))
+# Only changed on the event loop thread, so it needs no lock
+_in_flight = {}
+HTTP_IN_FLIGHT = CallbackGauge("http_requests_in_flight", "Requests being handled", ("method",),
+                               lambda: {(method,): count for method, count in list(_in_flight.items())})
+
+# ---- upstreams -----------------------------------------------------------
+UPSTREAM_SECONDS = Histogram(
+    "upstream_call_duration_seconds", "Duration of calls to MLflow, Docker and model servers", ("upstream", "method")
+)
+UPSTREAM_ERRORS = Counter("upstream_call_errors_total", "Upstream calls that raised", ("upstream", "method"))
+DB_CHECKOUT_SECONDS = Histogram("db_checkout_duration_seconds", "Wait for a pooled MySQL connection")
+DB_QUERY_SECONDS = Histogram("db_query_duration_seconds", "MySQL statement execution time", ("statement",))
+
+
+def record_call(upstream, method, started, failed=False):
+    UPSTREAM_SECONDS.observe(time.perf_counter() - started, upstream, method)
+    if failed:
+        UPSTREAM_ERRORS.inc(upstream, method)
+
+
+class Instrumented:
+    """Proxy that times every public method call of ``target`` as ``upstream``/<method name>.
+
+    Coroutine methods are timed until they complete; async generators (e.g.
+    log streams) and attributes pass through untouched.
+    """
+
+    def __init__(self, target, upstream):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_upstream", upstream)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name.startswith("_") or not callable(attr) or inspect.isasyncgenfunction(attr):
+            return attr
+        upstream = self._upstream
+        if inspect.iscoroutinefunction(attr):
+            @wraps(attr)
+            async def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    result = await attr(*args, **kwargs)
+                except BaseException:
+                    record_call(upstream, name, started, failed=True)
+                    raise
+                record_call(upstream, name, started)
+                return result
+        else:
+            @wraps(attr)
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    result = attr(*args, **kwargs)
+                except BaseException:
+                    record_call(upstream, name, started, failed=True)
+                    raise
+                record_call(upstream, name, started)
+                return result
+        # Later lookups find the wrapper without going through __getattr__
+        object.__setattr__(self, name, timed)
+        return timed
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+
+# Full template by id of the route (routes live as long as the app), worked out
+# on its first request; a router included under two prefixes is labelled with
+# the first one seen
+_templates = {}
+
+
+def route_template(scope):
+    """Template of the route that handled the request, e.g. ``/deployments/{deployment_id}``"""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    template = _templates.get(id(route))
+    if template is None:
+        template = _templates[id(route)] = _full_template(route, scope)
+    return template
+
+
+def _full_template(route, scope):
+    template = getattr(route, "path_format", None) or route.path
+    # Routes of an included router may only know their path below the router's
+    # prefix; the prefix is what precedes the filled-in template in the path
+    path = scope["path"]
+    try:
+        filled = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    if filled != path and path.endswith(filled):
+        return path[:len(path) - len(filled)] + template
+    return template
+
+
+class MetricsMiddleware:
+    """Records latency, status and in-flight count of every HTTP request.
+
+    Requests are labelled by route template (e.g. ``/deployments/{deployment_id}``),
+    which the router stores in the scope, so path parameters never create new
+    series; requests matching no route share the ``unmatched`` label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        _in_flight[method] = _in_flight.get(method, 0) + 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _in_flight[method] -= 1
+            route = route_template(scope)
+            HTTP_REQUEST_SECONDS.observe(elapsed, method, route)
+            HTTP_RESPONSES.inc(method, route, status)
@@ -0,0 +1,105 @@
+import logging
+import os
+import re
+
+from backend.database import db_connection
+
+logger = logging.getLogger(__name__)
+
+# Versioned schema migrations: NNNN_<name>.sql files applied in order, each once
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+# Named MySQL lock held while migrating, so concurrent API processes apply each migration once
+MIGRATION_LOCK = "ml_dashboard_migrations"
+MIGRATION_LOCK_TIMEOUT = 60
+
+MIGRATION_FILE = re.compile(r"^(\d+)_\w+\.sql$")
+# Statements skipped when their column or index is already there, as in
+# databases created from the former schema.sql before migrations were tracked
+ADD_COLUMN = re.compile(r"^ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(\w+)\s[^,]*$", re.IGNORECASE)
+CREATE_INDEX = re.compile(r"^CREATE\s+INDEX\s+(\w+)\s+ON\s+(\w+)\s", re.IGNORECASE)
+
+
+def migrations():
+    """(version, file name) of every migration, in order"""
+    found = []
+    for name in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(name)
+        if match:
+            found.append((int(match.group(1)), name))
+    return sorted(found)
+
+
+def statements(sql):
+    """SQL statements of a migration file (full-line ``--`` comments removed)"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+
+def already_applied(cursor, statement):
+    """Whether ``statement`` adds a column or index that the table already has"""
+    match = ADD_COLUMN.match(statement)
+    if match:
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+            match.groups(),
+        )
+        return cursor.fetchone()[0] > 0
+    match = CREATE_INDEX.match(statement)
+    if match:
+        index, table = match.groups()
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+            (table, index),
+        )
+        return cursor.fetchone()[0] > 0
+    return False
+
+
+def apply_migrations():
+    """Apply the migrations not yet recorded in schema_migrations; returns the file names applied.
+
+    MySQL commits DDL implicitly, so a migration is written one column or
+    index per statement: statements whose column or index already exists are
+    skipped, and a migration that failed halfway can simply be retried. The
+    same makes databases created from the former schema.sql migrate as is.
+    """
+    applied_now = []
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError(f"Could not get the migration lock within {MIGRATION_LOCK_TIMEOUT}s")
+        try:
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INT PRIMARY KEY, name VARCHAR(255) NOT NULL, applied_at DATETIME NOT NULL)"
+            )
+            cursor.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in cursor.fetchall()}
+            for version, name in migrations():
+                if version in applied:
+                    continue
+                with open(os.path.join(MIGRATIONS_DIR, name)) as fh:
+                    for statement in statements(fh.read()):
+                        if already_applied(cursor, statement):
+                            logger.info("Skipping %s: already applied (%s)", name, statement.splitlines()[0])
+                            continue
+                        cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, applied_at) VALUES (%s, %s, NOW())", (version, name)
+                )
+                conn.commit()
+                logger.info("Applied migration %s", name)
+                applied_now.append(name)
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cursor.fetchone()
+    return applied_now
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    applied = apply_migrations()
+    print(f"Applied {len(applied)} migration(s)" + (f": {', '.join(applied)}" if applied else ""))
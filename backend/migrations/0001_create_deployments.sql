@@ -0,0 +1,9 @@
+-- Deployments table as the API originally used it
+CREATE TABLE IF NOT EXISTS deployments (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    model VARCHAR(255) NOT NULL,
+    version VARCHAR(64) NOT NULL,
+    status VARCHAR(32) NOT NULL,
+    last_updated DATETIME NOT NULL
+);
@@ -0,0 +1,7 @@
+-- Background deployment jobs: status is the job phase (queued, downloading,
+-- starting, ready, failed or cancelled)
+
+-- {"<phase>": {"start": <unix time>, "end": <unix time or null>}, ...}
+ALTER TABLE deployments ADD COLUMN phase_timings JSON NULL;
+-- Reason of a failed deployment job
+ALTER TABLE deployments ADD COLUMN error TEXT NULL;
@@ -0,0 +1,17 @@
+-- Multi-replica deployments: desired replica count per deployment
+ALTER TABLE deployments ADD COLUMN replicas INT NOT NULL DEFAULT 1;
+
+-- One row per serving container of a deployment. The row is the lease on its
+-- host port: UNIQUE (port) keeps two replicas from ever sharing one.
+CREATE TABLE IF NOT EXISTS deployment_replicas (
+    deployment_id INT NOT NULL,
+    replica INT NOT NULL,
+    port INT NOT NULL,
+    container_name VARCHAR(255) NOT NULL,
+    -- starting, running or exited (set by the reconciler)
+    status VARCHAR(32) NOT NULL,
+    last_updated DATETIME NOT NULL,
+    PRIMARY KEY (deployment_id, replica),
+    UNIQUE KEY uq_deployment_replicas_port (port),
+    FOREIGN KEY (deployment_id) REFERENCES deployments (id) ON DELETE CASCADE
+);
@@ -0,0 +1,8 @@
+-- Indexes behind the filtered, keyset-paginated deployment listing (newest id
+-- first), the reconciler's scan of serving deployments and the job recovery.
+-- InnoDB appends the primary key to every secondary index, so each filter
+-- below is also ordered by id. Databases created from the former schema.sql
+-- already have idx_deployments_status; migrate.py skips existing indexes.
+CREATE INDEX idx_deployments_status ON deployments (status);
+CREATE INDEX idx_deployments_model_version ON deployments (model, version);
+CREATE INDEX idx_deployments_last_updated ON deployments (last_updated);
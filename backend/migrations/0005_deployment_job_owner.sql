@@ -0,0 +1,6 @@
+-- Owner of a deployment's background job: the API process running it
+-- ("<host>:<pid>:<random>") and the last time that process was seen alive.
+-- Another process only fails a job left in an active phase once its
+-- heartbeat is stale.
+ALTER TABLE deployments ADD COLUMN job_owner VARCHAR(255) NULL;
+ALTER TABLE deployments ADD COLUMN job_heartbeat DATETIME NULL;
@@ -1,28 +1,108 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from mlflow.tracking import MlflowClient
 import mlflow
-from mlflow.entities import ViewType
+from mlflow.entities import ViewType, Metric, Param, RunTag, RunStatus
+from mlflow.exceptions import MlflowException
+from mlflow.utils.validation import MAX_ENTITIES_PER_BATCH, MAX_METRICS_PER_BATCH, MAX_PARAMS_TAGS_PER_BATCH
+from backend.artifacts import artifact_cache
+from backend.cache import TTLCache
+from backend.metrics import Instrumented
+from backend.mlflow_rest import AsyncMlflowClient
+from backend.downsample import downsample_indices
+from backend.serializers import run_to_view, run_converter, model_version_to_view, registered_model_to_view
+from backend.ingest import (
+    WriteBehindLog, METRIC_INGEST_MODE, INGEST_WAL_DIR, INGEST_FLUSH_INTERVAL, INGEST_FSYNC, INGEST_MAX_BACKOFF
+)
 
 # Tracking server URI
-MLFLOW_TRACKING_URI = "http://127.0.0.1:5000"
+MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://127.0.0.1:5000")
 # Ensure MLflow uses the tracking server URI
 mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
-client = MlflowClient(tracking_uri=MLFLOW_TRACKING_URI)
+# Request handlers use the async REST client; the blocking client is kept for
+# artifact transfers, the write-behind flusher thread and Arrow exports.
+# Both record the duration of every call at /metrics, by client method
+aclient = Instrumented(AsyncMlflowClient(MLFLOW_TRACKING_URI), "mlflow")
+client = Instrumented(MlflowClient(tracking_uri=MLFLOW_TRACKING_URI), "mlflow")
+
+# Listing runs across experiments: how many experiment IDs go into one
+# search_runs call, and how many of those calls may be in flight at once
+RUNS_FANOUT_BATCH_SIZE = int(os.getenv("RUNS_FANOUT_BATCH_SIZE", "25"))
+RUNS_FANOUT_MAX_WORKERS = int(os.getenv("RUNS_FANOUT_MAX_WORKERS", "8"))
+
+# Recursive artifact listings: threads running list_artifacts calls (shared by
+# all walks) and the default (and maximum) depth and entry caps
+ARTIFACT_LIST_MAX_WORKERS = int(os.getenv("ARTIFACT_LIST_MAX_WORKERS", "8"))
+ARTIFACT_TREE_MAX_DEPTH = int(os.getenv("ARTIFACT_TREE_MAX_DEPTH", "32"))
+ARTIFACT_TREE_MAX_ENTRIES = int(os.getenv("ARTIFACT_TREE_MAX_ENTRIES", "100000"))
+_artifact_list_pool = ThreadPoolExecutor(max_workers=ARTIFACT_LIST_MAX_WORKERS, thread_name_prefix="artifact-list")
+
+# Page sizes for cursor-paginated and streamed run listings
+RUNS_DEFAULT_PAGE_SIZE = 100
+RUNS_MAX_PAGE_SIZE = 1000
+
+# Cache for the experiment and registered-model listings; writes made through
+# this module invalidate the affected entry immediately
+LISTING_CACHE_TTL = float(os.getenv("LISTING_CACHE_TTL", "30"))
+LISTING_CACHE_MAXSIZE = int(os.getenv("LISTING_CACHE_MAXSIZE", "16"))
+EXPERIMENTS_CACHE_KEY = "experiments"
+REGISTERED_MODELS_CACHE_KEY = "registered_models"
+_listing_cache = TTLCache(maxsize=LISTING_CACHE_MAXSIZE, ttl=LISTING_CACHE_TTL)
+
+# Downsampled metric histories, keyed by (run_id, key, max_points, method)
+METRIC_HISTORY_PAGE_SIZE = int(os.getenv("METRIC_HISTORY_PAGE_SIZE", "25000"))
+METRIC_HISTORY_CACHE_TTL = float(os.getenv("METRIC_HISTORY_CACHE_TTL", "60"))
+METRIC_HISTORY_CACHE_MAXSIZE = int(os.getenv("METRIC_HISTORY_CACHE_MAXSIZE", "512"))
+_history_cache = TTLCache(maxsize=METRIC_HISTORY_CACHE_MAXSIZE, ttl=METRIC_HISTORY_CACHE_TTL)
+
+# Experiment-id index used by create_run. IDs seen in listings, point lookups or
+# creations are remembered for the life of the process (the old check also
+# accepted deleted experiments); misses are remembered only briefly because
+# experiments may be created outside this API.
+EXPERIMENT_NEGATIVE_CACHE_TTL = float(os.getenv("EXPERIMENT_NEGATIVE_CACHE_TTL", "5"))
+_known_experiment_ids = set()
+_missing_experiment_ids = TTLCache(maxsize=1024, ttl=EXPERIMENT_NEGATIVE_CACHE_TTL)
+
+def get_cache_stats():
+    """Hit/miss/eviction counters for the in-process caches"""
+    return {
+        "listings": _listing_cache.stats(),
+        "metric_history": _history_cache.stats(),
+        "known_experiment_ids": len(_known_experiment_ids),
+        "missing_experiment_ids": _missing_experiment_ids.stats(),
+        "artifacts": artifact_cache.stats(),
+    }
 
 # -------------------------------------
 #  📌 Experiments Management
 # -------------------------------------
-def get_experiments():
-    """Retrieve all MLflow experiments"""
+async def _load_experiments():
+    experiments = []
+    page_token = None
+    while True:
+        page = await aclient.search_experiments(view_type=ViewType.ALL, page_token=page_token)
+        experiments.extend(
+            {"id": exp.experiment_id, "name": exp.name, "lifecycle_stage": exp.lifecycle_stage} for exp in page
+        )
+        _known_experiment_ids.update(exp.experiment_id for exp in page)
+        page_token = page.token
+        if not page_token:
+            return experiments
+
+async def get_experiments():
+    """Retrieve all MLflow experiments (cached, treat the result as read-only)"""
     try:
-        experiments = client.search_experiments(view_type=ViewType.ALL)
-        return [{"id": exp.experiment_id, "name": exp.name, "lifecycle_stage": exp.lifecycle_stage} for exp in experiments]
+        return await _listing_cache.aget_or_load(EXPERIMENTS_CACHE_KEY, _load_experiments)
     except Exception as e:
         return {"error": str(e)}
 
-def get_experiment(experiment_id):
+async def get_experiment(experiment_id):
     """Retrieve a specific experiment by ID"""
     try:
-        experiment = client.get_experiment(experiment_id)
+        experiment = await aclient.get_experiment(experiment_id)
         return {
             "id": experiment.experiment_id,
             "name": experiment.name,
@@ -32,10 +112,10 @@ def get_experiment(experiment_id):
     except Exception as e:
         return {"error": str(e)}
 
-def get_experiment_by_name(name):
+async def get_experiment_by_name(name):
     """Retrieve an experiment by its name"""
     try:
-        experiment = client.get_experiment_by_name(name)
+        experiment = await aclient.get_experiment_by_name(name)
         if experiment:
             return {
                 "id": experiment.experiment_id,
@@ -48,34 +128,40 @@ def get_experiment_by_name(name):
     except Exception as e:
         return {"error": str(e)}
 
-def create_experiment(name):
+async def create_experiment(name):
     """Create a new experiment"""
     try:
-        experiment_id = client.create_experiment(name)
+        experiment_id = await aclient.create_experiment(name)
+        _listing_cache.invalidate(EXPERIMENTS_CACHE_KEY)
+        _known_experiment_ids.add(experiment_id)
+        _missing_experiment_ids.invalidate(experiment_id)
         return {"experiment_id": experiment_id}
     except Exception as e:
         return {"error": str(e)}
 
-def update_experiment(experiment_id, new_name):
+async def update_experiment(experiment_id, new_name):
     """Rename an experiment"""
     try:
-        client.rename_experiment(experiment_id, new_name)
+        await aclient.rename_experiment(experiment_id, new_name)
+        _listing_cache.invalidate(EXPERIMENTS_CACHE_KEY)
         return {"message": "Experiment updated"}
     except Exception as e:
         return {"error": str(e)}
 
-def delete_experiment(experiment_id):
+async def delete_experiment(experiment_id):
     """Delete an experiment"""
     try:
-        client.delete_experiment(experiment_id)
+        await aclient.delete_experiment(experiment_id)
+        _listing_cache.invalidate(EXPERIMENTS_CACHE_KEY)
         return {"message": "Experiment deleted"}
     except Exception as e:
         return {"error": str(e)}
 
-def restore_experiment(experiment_id):
+async def restore_experiment(experiment_id):
     """Restore a deleted experiment"""
     try:
-        client.restore_experiment(experiment_id)
+        await aclient.restore_experiment(experiment_id)
+        _listing_cache.invalidate(EXPERIMENTS_CACHE_KEY)
         return {"message": "Experiment restored"}
     except Exception as e:
         return {"error": str(e)}
@@ -83,394 +169,527 @@ def restore_experiment(experiment_id):
 # -------------------------------------
 #  📌 Runs Management
 # -------------------------------------
-def create_run(experiment_id, run_name):
+async def _experiment_exists(experiment_id):
+    """Check an experiment ID against the in-process index, falling back to one point lookup"""
+    if experiment_id in _known_experiment_ids:
+        return True
+    if _missing_experiment_ids.get(experiment_id):
+        return False
+    try:
+        await aclient.get_experiment(experiment_id)
+    except MlflowException as e:
+        # Unknown IDs are 404; IDs the store cannot even parse come back as 400
+        if e.get_http_status_code() in (400, 404):
+            _missing_experiment_ids.set(experiment_id, True)
+            return False
+        raise
+    _known_experiment_ids.add(experiment_id)
+    return True
+
+async def create_run(experiment_id, run_name):
     """Create an MLflow run inside an experiment"""
     try:
+        experiment_id = str(experiment_id)
         # Ensure experiment exists
-        experiment_list = client.search_experiments(view_type=ViewType.ALL)
-        experiment_ids = [exp.experiment_id for exp in experiment_list]
-        if str(experiment_id) not in [str(eid) for eid in experiment_ids]:
+        if not await _experiment_exists(experiment_id):
             return {"error": f"Experiment ID {experiment_id} does not exist."}
         # Create the run
-        run = client.create_run(experiment_id=str(experiment_id), run_name=run_name)
+        run = await aclient.create_run(experiment_id=experiment_id, run_name=run_name)
         # Log an initial parameter
-        client.log_param(run.info.run_id, "init_status", "run_started")
-        # End the run
-        client.set_terminated(run.info.run_id)
-        # Fetch the run with all details
-        finished_run = client.get_run(run.info.run_id)
-        # Prepare run info and data
-        info = finished_run.info
-        data = finished_run.data
-        run_info = {
-            "run_id": info.run_id,
-            "run_name": info.run_name if hasattr(info, "run_name") else None,
-            "experiment_id": info.experiment_id,
-            "status": info.status,
-            "start_time": info.start_time,
-            "end_time": info.end_time,
-            "artifact_uri": info.artifact_uri,
-            "lifecycle_stage": info.lifecycle_stage
-        }
-        run_data = {
-            "metrics": [{"key": k, "value": v} for k, v in data.metrics.items()] if hasattr(data, "metrics") else [],
-            "params": [{"key": k, "value": v} for k, v in data.params.items()] if hasattr(data, "params") else [],
-            "tags": [{"key": k, "value": v} for k, v in data.tags.items()] if hasattr(data, "tags") else []
-        }
-        return {"info": run_info, "data": run_data}
-    except Exception as e:
-        return {"error": str(e)}
-
-def get_runs(experiment_id):
-    """Retrieve all runs for a given experiment"""
-    try:
-        runs = client.search_runs([experiment_id], run_view_type=ViewType.ACTIVE_ONLY)
-        run_list = []
-        for run in runs:
-            info = run.info
-            data = run.data
-            run_info = {
-                "run_id": info.run_id,
-                "run_name": info.run_name if hasattr(info, "run_name") else None,
-                "experiment_id": info.experiment_id,
-                "status": info.status,
-                "start_time": info.start_time,
-                "end_time": info.end_time,
-                "artifact_uri": info.artifact_uri,
-                "lifecycle_stage": info.lifecycle_stage
-            }
-            run_data = {
-                "metrics": [{"key": k, "value": v} for k, v in data.metrics.items()] if hasattr(data, "metrics") else [],
-                "params": [{"key": k, "value": v} for k, v in data.params.items()] if hasattr(data, "params") else [],
-                "tags": [{"key": k, "value": v} for k, v in data.tags.items()] if hasattr(data, "tags") else []
-            }
-            run_list.append({"info": run_info, "data": run_data})
-        return run_list
+        await aclient.log_param(run.info.run_id, "init_status", "run_started")
+        # End the run with an explicit end time so the response can be built without re-fetching it
+        end_time = int(time.time() * 1000)
+        await aclient.set_terminated(run.info.run_id, end_time=end_time)
+        result = run_to_view(run)
+        result.info.status = RunStatus.to_string(RunStatus.FINISHED)
+        result.info.end_time = end_time
+        result.data.params = [{"key": "init_status", "value": "run_started"}]
+        return result
+    except Exception as e:
+        return {"error": str(e)}
+
+async def _search_runs_all_pages(experiment_ids):
+    """Run one multi-experiment search_runs query, following page tokens to the end"""
+    runs = []
+    page_token = None
+    while True:
+        page = await aclient.search_runs(experiment_ids, run_view_type=ViewType.ACTIVE_ONLY, page_token=page_token)
+        runs.extend(page)
+        page_token = page.token
+        if not page_token:
+            return runs
+
+async def get_runs(experiment_id, projection=None):
+    """Retrieve all runs for a given experiment, optionally projected onto a subset of fields"""
+    try:
+        convert = run_converter(projection)
+        runs = await _search_runs_all_pages([experiment_id])
+        return [convert(run) for run in runs]
+    except Exception as e:
+        return {"error": str(e)}
+
+async def get_runs_page(experiment_id, page_size=RUNS_DEFAULT_PAGE_SIZE, page_token=None, projection=None):
+    """Retrieve one page of runs for an experiment plus the cursor for the next page"""
+    try:
+        convert = run_converter(projection)
+        page = await aclient.search_runs(
+            [experiment_id], run_view_type=ViewType.ACTIVE_ONLY, max_results=page_size, page_token=page_token
+        )
+        return {"runs": [convert(run) for run in page], "next_page_token": page.token}
     except Exception as e:
         return {"error": str(e)}
 
-def get_run(run_id):
+async def iter_runs(experiment_id, page_size=RUNS_DEFAULT_PAGE_SIZE, page_token=None, projection=None):
+    """Yield the runs of an experiment one by one, fetching MLflow pages only as they are consumed.
+
+    Unlike the other helpers this raises on MLflow errors instead of returning
+    an error dict, since an async generator has no single return value to carry it.
+    """
+    convert = run_converter(projection)
+    while True:
+        page = await aclient.search_runs(
+            [experiment_id], run_view_type=ViewType.ACTIVE_ONLY, max_results=page_size, page_token=page_token
+        )
+        for run in page:
+            yield convert(run)
+        page_token = page.token
+        if not page_token:
+            return
+
+def iter_run_pages(experiment_id, page_size=RUNS_MAX_PAGE_SIZE):
+    """Yield the raw MLflow Run entities of an experiment page by page; raises on MLflow errors"""
+    page_token = None
+    while True:
+        page = client.search_runs(
+            [experiment_id], run_view_type=ViewType.ACTIVE_ONLY, max_results=page_size, page_token=page_token
+        )
+        yield list(page)
+        page_token = page.token
+        if not page_token:
+            return
+
+async def _gather_limited(coros, limit=None):
+    """``asyncio.gather`` with at most ``limit`` (default RUNS_FANOUT_MAX_WORKERS) coroutines running at once"""
+    semaphore = asyncio.Semaphore(limit or RUNS_FANOUT_MAX_WORKERS)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+    return await asyncio.gather(*(run(coro) for coro in coros))
+
+async def get_all_runs(experiment_ids, batch_size=None, projection=None):
+    """Retrieve runs for many experiments using batched, concurrent search_runs calls.
+
+    Experiment IDs are grouped into batches of ``batch_size`` (one search_runs
+    query each) and at most RUNS_FANOUT_MAX_WORKERS batches are in flight at
+    once. Results are ordered by the position of their
+    experiment in ``experiment_ids``, keeping MLflow's ordering within an
+    experiment, so the output does not depend on which batch finished first.
+    """
+    batch_size = batch_size or RUNS_FANOUT_BATCH_SIZE
+    convert = run_converter(projection)
+    try:
+        experiment_ids = [str(eid) for eid in experiment_ids]
+        batches = [experiment_ids[i:i + batch_size] for i in range(0, len(experiment_ids), batch_size)]
+        results = await _gather_limited(_search_runs_all_pages(batch) for batch in batches)
+        position = {eid: i for i, eid in enumerate(experiment_ids)}
+        merged = sorted((run for batch in results for run in batch), key=lambda run: position[run.info.experiment_id])
+        return [convert(run) for run in merged]
+    except Exception as e:
+        return {"error": str(e)}
+
+async def get_run(run_id, projection=None):
     """Retrieve a specific run by ID"""
     try:
-        run = client.get_run(run_id)
-        info = run.info
-        data = run.data
-        run_info = {
-            "run_id": info.run_id,
-            "run_name": info.run_name if hasattr(info, "run_name") else None,
-            "experiment_id": info.experiment_id,
-            "status": info.status,
-            "start_time": info.start_time,
-            "end_time": info.end_time,
-            "artifact_uri": info.artifact_uri,
-            "lifecycle_stage": info.lifecycle_stage
-        }
-        run_data = {
-            "metrics": [{"key": k, "value": v} for k, v in data.metrics.items()] if hasattr(data, "metrics") else [],
-            "params": [{"key": k, "value": v} for k, v in data.params.items()] if hasattr(data, "params") else [],
-            "tags": [{"key": k, "value": v} for k, v in data.tags.items()] if hasattr(data, "tags") else []
-        }
-        return {"info": run_info, "data": run_data}
+        return run_converter(projection)(await aclient.get_run(run_id))
     except Exception as e:
         return {"error": str(e)}
 
-def delete_run(run_id):
+async def delete_run(run_id):
     """Delete a run"""
     try:
-        client.delete_run(run_id)
+        await aclient.delete_run(run_id)
         return {"message": "Run deleted"}
     except Exception as e:
         return {"error": str(e)}
 
-def restore_run(run_id):
+async def restore_run(run_id):
     """Restore a deleted run"""
     try:
-        client.restore_run(run_id)
+        await aclient.restore_run(run_id)
         return {"message": "Run restored"}
     except Exception as e:
         return {"error": str(e)}
 
-def log_metric(run_id, key, value):
+async def log_metric(run_id, key, value):
     try:
-        client.log_metric(run_id, key, float(value))
+        if METRIC_INGEST_MODE == "wal":
+            await asyncio.to_thread(_ingest.append, [{"run_id": run_id, "type": "metric", "key": key,
+                                                      "value": float(value), "step": 0,
+                                                      "timestamp": int(time.time() * 1000)}])
+            return {"message": f"Metric {key} queued with value {value}"}
+        await aclient.log_metric(run_id, key, float(value))
         return {"message": f"Metric {key} logged with value {value}"}
     except Exception as e:
         return {"error": str(e)}
 
-def log_param(run_id, key, value):
+async def log_param(run_id, key, value):
     try:
-        client.log_param(run_id, key, value)
+        if METRIC_INGEST_MODE == "wal":
+            await asyncio.to_thread(_ingest.append, [{"run_id": run_id, "type": "param", "key": key, "value": str(value)}])
+            return {"message": f"Parameter {key} queued with value {value}"}
+        await aclient.log_param(run_id, key, value)
         return {"message": f"Parameter {key} logged with value {value}"}
     except Exception as e:
         return {"error": str(e)}
 
-def list_artifacts(run_id, path=None):
+async def _load_metric_history(run_id, key):
+    """Page through a metric's full history into step/timestamp/value arrays sorted by step"""
+    # MlflowClient.get_metric_history materialises every page as one list of
+    # Metric objects; fetching page by page lets each page become arrays straight away
+    steps, timestamps, values = [], [], []
+    page_token = None
+    while True:
+        page = await aclient.get_metric_history_page(
+            run_id, key, max_results=METRIC_HISTORY_PAGE_SIZE, page_token=page_token
+        )
+        steps.append(np.fromiter((m.step for m in page), dtype=np.int64, count=len(page)))
+        timestamps.append(np.fromiter((m.timestamp for m in page), dtype=np.int64, count=len(page)))
+        values.append(np.fromiter((m.value for m in page), dtype=np.float64, count=len(page)))
+        page_token = page.token
+        if not page_token:
+            break
+    steps, timestamps, values = np.concatenate(steps), np.concatenate(timestamps), np.concatenate(values)
+    order = np.argsort(steps, kind="stable")
+    return steps[order], timestamps[order], values[order]
+
+async def get_metric_history(run_id, key, max_points=1000, method="lttb"):
+    """Retrieve a metric's step history, downsampled server-side to at most ``max_points`` points.
+
+    Non-finite values are skipped. Results are cached per (run_id, key, max_points, method).
+    """
+    async def load():
+        steps, timestamps, values = await _load_metric_history(run_id, key)
+        finite = np.isfinite(values)
+        if not finite.all():
+            steps, timestamps, values = steps[finite], timestamps[finite], values[finite]
+        keep = downsample_indices(steps, values, max_points, method)
+        return {
+            "run_id": run_id,
+            "key": key,
+            "method": method,
+            "total_points": int(len(steps)),
+            "returned_points": int(len(keep)),
+            "steps": steps[keep].tolist(),
+            "timestamps": timestamps[keep].tolist(),
+            "values": values[keep].tolist(),
+        }
+    try:
+        return await _history_cache.aget_or_load((run_id, key, max_points, method), load)
+    except Exception as e:
+        return {"error": str(e)}
+
+def _batch_chunks(metrics, params, tags):
+    """Split entity lists into slices that respect MLflow's per-request log_batch limits"""
+    m = p = t = 0
+    while m < len(metrics) or p < len(params) or t < len(tags):
+        p_end = min(p + MAX_PARAMS_TAGS_PER_BATCH, len(params))
+        t_end = min(t + MAX_PARAMS_TAGS_PER_BATCH, len(tags))
+        room = MAX_ENTITIES_PER_BATCH - (p_end - p) - (t_end - t)
+        m_end = min(m + MAX_METRICS_PER_BATCH, m + room, len(metrics))
+        yield metrics[m:m_end], params[p:p_end], tags[t:t_end]
+        m, p, t = m_end, p_end, t_end
+
+def _batch_entity_chunks(metrics, params, tags):
+    """Turn plain metric/param/tag dicts into MLflow entities, split into log_batch-sized chunks"""
+    now = int(time.time() * 1000)
+    metric_entities = [
+        Metric(m["key"], float(m["value"]), m.get("timestamp") or now, m.get("step") or 0) for m in metrics
+    ]
+    param_entities = [Param(p["key"], str(p["value"])) for p in params]
+    tag_entities = [RunTag(t["key"], str(t["value"])) for t in tags]
+    return list(_batch_chunks(metric_entities, param_entities, tag_entities))
+
+def _send_batch(run_id, metrics, params, tags):
+    """Blocking send used by the write-behind flusher thread; returns the request count"""
+    chunks = _batch_entity_chunks(metrics, params, tags)
+    for chunk in chunks:
+        client.log_batch(run_id, *chunk)
+    return len(chunks)
+
+async def _asend_batch(run_id, metrics, params, tags):
+    """Send plain metric/param/tag dicts to MLflow in log_batch-sized chunks; returns the request count"""
+    chunks = _batch_entity_chunks(metrics, params, tags)
+    for chunk in chunks:
+        await aclient.log_batch(run_id, *chunk)
+    return len(chunks)
+
+async def log_batch(run_id, metrics=(), params=(), tags=()):
+    """Log many metrics, params and tags to a run with as few log_batch calls as MLflow allows.
+
+    ``metrics`` items are dicts with ``key``, ``value`` and optional ``step`` and
+    ``timestamp`` (ms); ``params`` and ``tags`` items are ``key``/``value`` dicts.
+    """
+    try:
+        summary = f"{len(metrics)} metrics, {len(params)} params and {len(tags)} tags"
+        if METRIC_INGEST_MODE == "wal":
+            now = int(time.time() * 1000)
+            entries = [{"run_id": run_id, "type": "metric", "key": m["key"], "value": float(m["value"]),
+                        "step": m.get("step") or 0, "timestamp": m.get("timestamp") or now} for m in metrics]
+            entries += [{"run_id": run_id, "type": "param", "key": p["key"], "value": str(p["value"])} for p in params]
+            entries += [{"run_id": run_id, "type": "tag", "key": t["key"], "value": str(t["value"])} for t in tags]
+            # The append fsyncs, so keep it off the event loop
+            await asyncio.to_thread(_ingest.append, entries)
+            return {"message": f"Queued {summary}", "requests": 0}
+        requests = await _asend_batch(run_id, metrics, params, tags)
+        return {"message": f"Logged {summary}", "requests": requests}
+    except Exception as e:
+        return {"error": str(e)}
+
+# Write-behind ingestion: used by log_metric/log_param/log_batch when METRIC_INGEST_MODE is "wal"
+_ingest = WriteBehindLog(
+    INGEST_WAL_DIR, _send_batch, flush_interval=INGEST_FLUSH_INTERVAL, fsync=INGEST_FSYNC,
+    max_backoff=INGEST_MAX_BACKOFF
+)
+
+def start_ingest():
+    """Replay the WAL and start the background flusher when write-behind ingestion is enabled"""
+    if METRIC_INGEST_MODE == "wal":
+        _ingest.start()
+
+def stop_ingest():
+    _ingest.stop()
+
+def get_ingest_stats():
+    """Queue depth, flush lag and delivery counters of the write-behind ingestion"""
+    return {"mode": METRIC_INGEST_MODE, **_ingest.stats()}
+
+async def log_batches(items):
+    """Log batches for several runs concurrently, reporting the outcome of each item separately"""
+    async def log_item(item):
+        result = await log_batch(item["run_id"], item.get("metrics", ()), item.get("params", ()), item.get("tags", ()))
+        return {"run_id": item["run_id"], **result}
+    results = await _gather_limited(log_item(item) for item in items)
+    return {"results": results, "failed": sum(1 for r in results if "error" in r)}
+
+async def list_artifacts(run_id, path=None):
     """List all artifacts for a given run"""
     try:
-        artifacts = client.list_artifacts(run_id, path)
+        artifacts = await asyncio.to_thread(client.list_artifacts, run_id, path)
         return [artifact.path for artifact in artifacts]
     except Exception as e:
         return {"error": str(e)}
 
+async def walk_artifacts(run_id, path=None, max_depth=ARTIFACT_TREE_MAX_DEPTH, max_entries=ARTIFACT_TREE_MAX_ENTRIES):
+    """Walk a run's artifact tree, yielding entries as their directories are listed.
+
+    Directories are listed concurrently on a pool of ARTIFACT_LIST_MAX_WORKERS
+    threads, so entries arrive in discovery order
+    rather than sorted. Yields ``{"path", "is_dir", "file_size", "depth"}``
+    dicts and finally one ``{"summary": ...}`` dict with the file, directory
+    and byte totals. The walk stops descending below ``max_depth`` and stops
+    after ``max_entries`` entries; either sets ``truncated`` in the summary.
+    A failing listing raises (for the root, before anything is yielded).
+    """
+    loop = asyncio.get_running_loop()
+    results = asyncio.Queue()
+    tasks = set()
+
+    async def list_dir(dir_path, depth):
+        try:
+            entries = await loop.run_in_executor(_artifact_list_pool, client.list_artifacts, run_id, dir_path)
+            results.put_nowait((depth, entries, None))
+        except Exception as e:
+            results.put_nowait((depth, None, e))
+
+    def schedule(dir_path, depth):
+        task = asyncio.ensure_future(list_dir(dir_path, depth))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    schedule(path, 1)
+    pending = 1
+    files = dirs = total_bytes = 0
+    truncated = False
+    try:
+        while pending and not (truncated and files + dirs >= max_entries):
+            depth, entries, error = await results.get()
+            pending -= 1
+            if error is not None:
+                raise error
+            for entry in entries:
+                if files + dirs >= max_entries:
+                    truncated = True
+                    break
+                if entry.is_dir:
+                    dirs += 1
+                    if depth < max_depth:
+                        schedule(entry.path, depth + 1)
+                        pending += 1
+                    else:
+                        truncated = True
+                else:
+                    files += 1
+                    total_bytes += entry.file_size or 0
+                yield {"path": entry.path, "is_dir": entry.is_dir, "file_size": entry.file_size, "depth": depth}
+    finally:
+        for task in list(tasks):
+            task.cancel()
+    yield {"summary": {"files": files, "dirs": dirs, "total_bytes": total_bytes, "truncated": truncated}}
+
 # -------------------------------------
 # NEW: Artifact Management
 # -------------------------------------
-def log_artifact(run_id, file_path, artifact_path=None):
+async def log_artifact(run_id, file_path, artifact_path=None):
     """Log an artifact (file) to a specific run"""
     try:
-        client.log_artifact(run_id, file_path, artifact_path)
+        await asyncio.to_thread(client.log_artifact, run_id, file_path, artifact_path)
+        await artifact_cache.invalidate_run(run_id)
         return {"message": f"Artifact {file_path} logged"}
     except Exception as e:
         return {"error": str(e)}
 
+async def open_artifact(run_id, path):
+    """Local path of a run's artifact file, downloaded through the on-disk artifact cache.
+
+    The file stays pinned in the cache until ``release_artifact`` is called.
+    """
+    def fetch(dst_path):
+        return client.download_artifacts(run_id, path, dst_path)
+    try:
+        return await artifact_cache.acquire(run_id, path, fetch)
+    except Exception as e:
+        return {"error": str(e)}
+
+async def release_artifact(local_path):
+    await artifact_cache.release(local_path)
+
+async def log_artifacts(run_id, local_dir, artifact_path=None):
+    """Log every file in a local directory to a specific run"""
+    try:
+        await asyncio.to_thread(client.log_artifacts, run_id, local_dir, artifact_path)
+        await artifact_cache.invalidate_run(run_id)
+        return {"message": f"Artifacts logged to run {run_id}"}
+    except Exception as e:
+        return {"error": str(e)}
+
 # -------------------------------------
 #  📌 Model Management
 # -------------------------------------
-def create_registered_model(name):
+async def create_registered_model(name):
     """Create a new registered model"""
     try:
-        client.create_registered_model(name)
-        model = client.get_registered_model(name)
-        return {
-            "name": model.name,
-            "creation_timestamp": model.creation_timestamp,
-            "last_updated_timestamp": model.last_updated_timestamp,
-            "description": model.description,
-            "latest_versions": [
-                {
-                    "name": mv.name,
-                    "version": str(mv.version),
-                    "current_stage": mv.current_stage,
-                    "creation_timestamp": mv.creation_timestamp,
-                    "last_updated_timestamp": mv.last_updated_timestamp,
-                    "description": mv.description,
-                    "source": mv.source,
-                    "run_id": mv.run_id,
-                    "status": mv.status,
-                    "status_message": mv.status_message
-                } for mv in (model.latest_versions or [])
-            ]
-        }
+        model = await aclient.create_registered_model(name)
+        _listing_cache.invalidate(REGISTERED_MODELS_CACHE_KEY)
+        return registered_model_to_view(model)
     except Exception as e:
         return {"error": str(e)}
 
-def get_registered_model(name):
+async def get_registered_model(name):
     """Retrieve details of a registered model"""
     try:
-        model = client.get_registered_model(name)
-        return {
-            "name": model.name,
-            "creation_timestamp": model.creation_timestamp,
-            "last_updated_timestamp": model.last_updated_timestamp,
-            "description": model.description,
-            "latest_versions": [
-                {
-                    "name": mv.name,
-                    "version": str(mv.version),
-                    "current_stage": mv.current_stage,
-                    "creation_timestamp": mv.creation_timestamp,
-                    "last_updated_timestamp": mv.last_updated_timestamp,
-                    "description": mv.description,
-                    "source": mv.source,
-                    "run_id": mv.run_id,
-                    "status": mv.status,
-                    "status_message": mv.status_message
-                } for mv in (model.latest_versions or [])
-            ],
-            "tags": [{"key": tag.key, "value": tag.value} for tag in (model.tags or [])]
-        }
+        model = await aclient.get_registered_model(name)
+        return registered_model_to_view(model, with_tags=True)
     except Exception as e:
         return {"error": str(e)}
 
-def rename_registered_model(name, new_name):
+async def rename_registered_model(name, new_name):
     """Rename a registered model"""
     try:
-        client.rename_registered_model(name, new_name)
-        model = client.get_registered_model(new_name)
-        return {
-            "name": model.name,
-            "creation_timestamp": model.creation_timestamp,
-            "last_updated_timestamp": model.last_updated_timestamp,
-            "description": model.description,
-            "latest_versions": [
-                {
-                    "name": mv.name,
-                    "version": str(mv.version),
-                    "current_stage": mv.current_stage,
-                    "creation_timestamp": mv.creation_timestamp,
-                    "last_updated_timestamp": mv.last_updated_timestamp,
-                    "description": mv.description,
-                    "source": mv.source,
-                    "run_id": mv.run_id,
-                    "status": mv.status,
-                    "status_message": mv.status_message
-                } for mv in (model.latest_versions or [])
-            ],
-            "tags": [{"key": tag.key, "value": tag.value} for tag in (model.tags or [])]
-        }
+        model = await aclient.rename_registered_model(name, new_name)
+        _listing_cache.invalidate(REGISTERED_MODELS_CACHE_KEY)
+        return registered_model_to_view(model, with_tags=True)
     except Exception as e:
         return {"error": str(e)}
 
-def update_registered_model(name, description):
+async def update_registered_model(name, description):
     """Update a registered models description"""
     try:
-        client.update_registered_model(name=name, description=description)
-        model = client.get_registered_model(name)
-        return {
-            "name": model.name,
-            "creation_timestamp": model.creation_timestamp,
-            "last_updated_timestamp": model.last_updated_timestamp,
-            "description": model.description,
-            "latest_versions": [
-                {
-                    "name": mv.name,
-                    "version": str(mv.version),
-                    "current_stage": mv.current_stage,
-                    "creation_timestamp": mv.creation_timestamp,
-                    "last_updated_timestamp": mv.last_updated_timestamp,
-                    "description": mv.description,
-                    "source": mv.source,
-                    "run_id": mv.run_id,
-                    "status": mv.status,
-                    "status_message": mv.status_message
-                } for mv in (model.latest_versions or [])
-            ],
-            "tags": [{"key": tag.key, "value": tag.value} for tag in (model.tags or [])]
-        }
+        model = await aclient.update_registered_model(name=name, description=description)
+        _listing_cache.invalidate(REGISTERED_MODELS_CACHE_KEY)
+        return registered_model_to_view(model, with_tags=True)
     except Exception as e:
         return {"error": str(e)}
 
-def delete_registered_model(name):
+async def delete_registered_model(name):
     try:
-        client.delete_registered_model(name)
+        await aclient.delete_registered_model(name)
+        _listing_cache.invalidate(REGISTERED_MODELS_CACHE_KEY)
         return {"message": "Model deleted"}
     except Exception as e:
         return {"error": str(e)}
 
-def create_model_version(name, source=None, run_id=None):
+async def create_model_version(name, source=None, run_id=None):
     """Create a new model version"""
     try:
         # If source not provided but run_id is given, use run's artifact URI as source
         if (not source or source == "") and run_id:
-            run = client.get_run(run_id)
+            run = await aclient.get_run(run_id)
             source = run.info.artifact_uri
-        mv = client.create_model_version(name, source, run_id)
-        return {
-            "name": mv.name,
-            "version": str(mv.version),
-            "creation_timestamp": mv.creation_timestamp,
-            "last_updated_timestamp": mv.last_updated_timestamp,
-            "current_stage": mv.current_stage,
-            "description": mv.description,
-            "source": mv.source,
-            "run_id": mv.run_id,
-            "status": mv.status,
-            "status_message": mv.status_message
-        }
+        mv = await aclient.create_model_version(name, source, run_id)
+        _listing_cache.invalidate(REGISTERED_MODELS_CACHE_KEY)
+        return model_version_to_view(mv)
     except Exception as e:
         return {"error": str(e)}
 
-def get_model_version(name, version):
+async def get_model_version(name, version):
     """Retrieve details of a model version"""
     try:
-        mv = client.get_model_version(name, version)
-        return {
-            "name": mv.name,
-            "version": str(mv.version),
-            "creation_timestamp": mv.creation_timestamp,
-            "last_updated_timestamp": mv.last_updated_timestamp,
-            "current_stage": mv.current_stage,
-            "description": mv.description,
-            "source": mv.source,
-            "run_id": mv.run_id,
-            "status": mv.status,
-            "status_message": mv.status_message,
-            "tags": [{"key": tag.key, "value": tag.value} for tag in (mv.tags or [])]
-        }
+        mv = await aclient.get_model_version(name, version)
+        return model_version_to_view(mv, with_tags=True)
     except Exception as e:
         return {"error": str(e)}
 
-def update_model_version(name, version, description):
+async def update_model_version(name, version, description):
     """Update a model version"""
     try:
-        client.update_model_version(name=name, version=version, description=description)
-        mv = client.get_model_version(name, version)
-        return {
-            "name": mv.name,
-            "version": str(mv.version),
-            "creation_timestamp": mv.creation_timestamp,
-            "last_updated_timestamp": mv.last_updated_timestamp,
-            "current_stage": mv.current_stage,
-            "description": mv.description,
-            "source": mv.source,
-            "run_id": mv.run_id,
-            "status": mv.status,
-            "status_message": mv.status_message
-        }
+        mv = await aclient.update_model_version(name=name, version=version, description=description)
+        _listing_cache.invalidate(REGISTERED_MODELS_CACHE_KEY)
+        return model_version_to_view(mv)
     except Exception as e:
         return {"error": str(e)}
 
-def delete_model_version(name, version):
+async def delete_model_version(name, version):
     """Delete a model version"""
     try:
-        client.delete_model_version(name, version)
+        await aclient.delete_model_version(name, version)
+        _listing_cache.invalidate(REGISTERED_MODELS_CACHE_KEY)
         return {"message": "Model version deleted"}
     except Exception as e:
         return {"error": str(e)}
 
-def transition_model_version_stage(name, version, stage):
+async def transition_model_version_stage(name, version, stage):
     """Transition a model version to a different stage"""
     try:
-        mv = client.transition_model_version_stage(name, version, stage)
-        return {
-            "name": mv.name,
-            "version": str(mv.version),
-            "creation_timestamp": mv.creation_timestamp,
-            "last_updated_timestamp": mv.last_updated_timestamp,
-            "current_stage": mv.current_stage,
-            "description": mv.description,
-            "source": mv.source,
-            "run_id": mv.run_id,
-            "status": mv.status,
-            "status_message": mv.status_message
-        }
+        mv = await aclient.transition_model_version_stage(name, version, stage)
+        _listing_cache.invalidate(REGISTERED_MODELS_CACHE_KEY)
+        return model_version_to_view(mv)
     except Exception as e:
         return {"error": str(e)}
 
-def search_registered_models():
-    """Search for registered models"""
-    try:
-        models = client.search_registered_models()
-        result = []
-        for model in models:
-            result.append({
-                "name": model.name,
-                "creation_timestamp": model.creation_timestamp,
-                "last_updated_timestamp": model.last_updated_timestamp,
-                "description": model.description,
-                "latest_versions": [
-                    {
-                        "name": mv.name,
-                        "version": str(mv.version),
-                        "current_stage": mv.current_stage,
-                        "creation_timestamp": mv.creation_timestamp,
-                        "last_updated_timestamp": mv.last_updated_timestamp,
-                        "description": mv.description,
-                        "source": mv.source,
-                        "run_id": mv.run_id,
-                        "status": mv.status,
-                        "status_message": mv.status_message
-                    } for mv in (model.latest_versions or [])
-                ]
-            })
-        return result
+async def _load_registered_models():
+    models = []
+    page_token = None
+    while True:
+        page = await aclient.search_registered_models(page_token=page_token)
+        models.extend(page)
+        page_token = page.token
+        if not page_token:
+            break
+    return [registered_model_to_view(model) for model in models]
+
+async def search_registered_models():
+    """Search for registered models (cached, treat the result as read-only)"""
+    try:
+        return await _listing_cache.aget_or_load(REGISTERED_MODELS_CACHE_KEY, _load_registered_models)
     except Exception as e:
         return {"error": str(e)}
 
-def set_registered_model_tag(name, key, value):
+async def set_registered_model_tag(name, key, value):
     """Set a tag for a registered model"""
     try:
-        client.set_registered_model_tag(name, key, value)
+        await aclient.set_registered_model_tag(name, key, value)
+        _listing_cache.invalidate(REGISTERED_MODELS_CACHE_KEY)
         return {"message": "Model tag set"}
     except Exception as e:
         return {"error": str(e)}
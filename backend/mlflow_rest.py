@@ -0,0 +1,257 @@
+import asyncio
+import os
+import time
+
+import aiohttp
+import orjson
+from mlflow.entities import Experiment, Metric, Run, ViewType
+from mlflow.entities.model_registry import ModelVersion, RegisteredModel
+from mlflow.exceptions import MlflowException, RestException
+from mlflow.protos import model_registry_pb2 as registry_pb
+from mlflow.protos import service_pb2 as tracking_pb
+from mlflow.store.entities.paged_list import PagedList
+from mlflow.utils.proto_json_utils import parse_dict
+
+from backend.http_session import LoopSession
+
+# Connection pool and timeouts for the async MLflow REST client
+MLFLOW_HTTP_MAX_CONNECTIONS = int(os.getenv("MLFLOW_HTTP_MAX_CONNECTIONS", "100"))
+# Idle keep-alive connections are closed after this many seconds
+MLFLOW_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("MLFLOW_HTTP_KEEPALIVE_EXPIRY", "30"))
+MLFLOW_HTTP_TIMEOUT = float(os.getenv("MLFLOW_HTTP_TIMEOUT", "30"))
+MLFLOW_HTTP_CONNECT_TIMEOUT = float(os.getenv("MLFLOW_HTTP_CONNECT_TIMEOUT", "5"))
+# How long a request may wait for a free pooled connection (including connecting)
+MLFLOW_HTTP_POOL_TIMEOUT = float(os.getenv("MLFLOW_HTTP_POOL_TIMEOUT", "10"))
+MLFLOW_HTTP_MAX_RETRIES = int(os.getenv("MLFLOW_HTTP_MAX_RETRIES", "2"))
+
+API_PREFIX = "/api/2.0/mlflow/"
+# Only retried when the server cannot have acted on the request
+RETRY_STATUS_CODES = (429, 503)
+
+
+def _parse(payload, proto_cls):
+    message = proto_cls()
+    parse_dict(payload, message)
+    return message
+
+
+class AsyncMlflowClient:
+    """Async client for the MLflow tracking and model-registry REST API.
+
+    Method names and return types follow ``MlflowClient`` (entities and
+    ``PagedList`` pages), so callers can switch by adding ``await``. All
+    requests share one keep-alive ``aiohttp`` connection pool; it is created on
+    first use in the running event loop and closed by ``aclose``. Failed calls
+    raise ``RestException`` carrying MLflow's error code, like the sync client.
+    """
+
+    def __init__(self, tracking_uri, max_connections=MLFLOW_HTTP_MAX_CONNECTIONS,
+                 keepalive_expiry=MLFLOW_HTTP_KEEPALIVE_EXPIRY, timeout=MLFLOW_HTTP_TIMEOUT,
+                 connect_timeout=MLFLOW_HTTP_CONNECT_TIMEOUT, pool_timeout=MLFLOW_HTTP_POOL_TIMEOUT,
+                 max_retries=MLFLOW_HTTP_MAX_RETRIES):
+        self.base_url = tracking_uri.rstrip("/") + API_PREFIX
+        self.max_retries = max_retries
+        headers = {}
+        if os.getenv("MLFLOW_TRACKING_TOKEN"):
+            headers["Authorization"] = f"Bearer {os.environ['MLFLOW_TRACKING_TOKEN']}"
+        auth = None
+        if os.getenv("MLFLOW_TRACKING_USERNAME"):
+            auth = aiohttp.BasicAuth(os.environ["MLFLOW_TRACKING_USERNAME"], os.getenv("MLFLOW_TRACKING_PASSWORD", ""))
+        self._http = LoopSession(
+            max_connections, keepalive_expiry,
+            aiohttp.ClientTimeout(total=timeout, connect=pool_timeout, sock_connect=connect_timeout),
+            headers=headers, auth=auth,
+        )
+
+    def _session(self):
+        return self._http.get()
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    async def _call(self, method, endpoint, payload=None):
+        http = self._session()
+        payload = {k: v for k, v in (payload or {}).items() if v is not None}
+        if method == "GET":
+            kwargs = {"params": {k: str(v) for k, v in payload.items()}}
+        else:
+            kwargs = {"data": orjson.dumps(payload), "headers": {"Content-Type": "application/json"}}
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with http.request(method, self.base_url + endpoint, **kwargs) as response:
+                    status, content = response.status, await response.read()
+            except (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError) as e:
+                # Nothing was sent yet, so any request may be retried
+                if attempt == self.max_retries:
+                    raise MlflowException(f"API request to {endpoint} failed: {e!r}") from e
+            else:
+                if status not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    break
+            await asyncio.sleep(0.1 * 2 ** attempt)
+        if status == 200:
+            return orjson.loads(content) if content else {}
+        try:
+            error = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            raise MlflowException(
+                f"API request to {endpoint} failed with code {status}: {content.decode(errors='replace')}"
+            )
+        raise RestException(error)
+
+    # ---- experiments ------------------------------------------------------
+    async def search_experiments(self, view_type=ViewType.ACTIVE_ONLY, max_results=None, filter_string=None,
+                                 order_by=None, page_token=None):
+        payload = {"view_type": ViewType.to_string(view_type).upper(), "max_results": max_results or 1000,
+                   "filter": filter_string, "order_by": order_by, "page_token": page_token}
+        response = _parse(await self._call("POST", "experiments/search", payload),
+                          tracking_pb.SearchExperiments.Response)
+        return PagedList([Experiment.from_proto(e) for e in response.experiments], response.next_page_token or None)
+
+    async def get_experiment(self, experiment_id):
+        response = _parse(await self._call("GET", "experiments/get", {"experiment_id": experiment_id}),
+                          tracking_pb.GetExperiment.Response)
+        return Experiment.from_proto(response.experiment)
+
+    async def get_experiment_by_name(self, name):
+        try:
+            payload = await self._call("GET", "experiments/get-by-name", {"experiment_name": name})
+        except MlflowException as e:
+            if e.get_http_status_code() == 404:
+                return None
+            raise
+        return Experiment.from_proto(_parse(payload, tracking_pb.GetExperimentByName.Response).experiment)
+
+    async def create_experiment(self, name):
+        return (await self._call("POST", "experiments/create", {"name": name}))["experiment_id"]
+
+    async def rename_experiment(self, experiment_id, new_name):
+        await self._call("POST", "experiments/update", {"experiment_id": experiment_id, "new_name": new_name})
+
+    async def delete_experiment(self, experiment_id):
+        await self._call("POST", "experiments/delete", {"experiment_id": experiment_id})
+
+    async def restore_experiment(self, experiment_id):
+        await self._call("POST", "experiments/restore", {"experiment_id": experiment_id})
+
+    # ---- runs -------------------------------------------------------------
+    async def search_runs(self, experiment_ids, filter_string="", run_view_type=ViewType.ACTIVE_ONLY,
+                          max_results=1000, order_by=None, page_token=None):
+        payload = {"experiment_ids": [str(eid) for eid in experiment_ids], "filter": filter_string,
+                   "run_view_type": ViewType.to_string(run_view_type).upper(), "max_results": max_results,
+                   "order_by": order_by, "page_token": page_token}
+        response = _parse(await self._call("POST", "runs/search", payload), tracking_pb.SearchRuns.Response)
+        return PagedList([Run.from_proto(r) for r in response.runs], response.next_page_token or None)
+
+    async def get_run(self, run_id):
+        response = _parse(await self._call("GET", "runs/get", {"run_id": run_id}), tracking_pb.GetRun.Response)
+        return Run.from_proto(response.run)
+
+    async def create_run(self, experiment_id, run_name=None, start_time=None, tags=None):
+        payload = {"experiment_id": str(experiment_id), "run_name": run_name,
+                   "start_time": start_time or int(time.time() * 1000),
+                   "tags": [{"key": k, "value": v} for k, v in (tags or {}).items()]}
+        response = _parse(await self._call("POST", "runs/create", payload), tracking_pb.CreateRun.Response)
+        return Run.from_proto(response.run)
+
+    async def set_terminated(self, run_id, status=None, end_time=None):
+        await self._call("POST", "runs/update", {
+            "run_id": run_id, "status": status or "FINISHED", "end_time": end_time or int(time.time() * 1000),
+        })
+
+    async def delete_run(self, run_id):
+        await self._call("POST", "runs/delete", {"run_id": run_id})
+
+    async def restore_run(self, run_id):
+        await self._call("POST", "runs/restore", {"run_id": run_id})
+
+    async def log_metric(self, run_id, key, value, timestamp=None, step=None):
+        await self._call("POST", "runs/log-metric", {
+            "run_id": run_id, "key": key, "value": value, "timestamp": timestamp or int(time.time() * 1000),
+            "step": step or 0,
+        })
+
+    async def log_param(self, run_id, key, value):
+        await self._call("POST", "runs/log-parameter", {"run_id": run_id, "key": key, "value": str(value)})
+
+    async def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        await self._call("POST", "runs/log-batch", {
+            "run_id": run_id,
+            "metrics": [{"key": m.key, "value": m.value, "timestamp": m.timestamp, "step": m.step} for m in metrics],
+            "params": [{"key": p.key, "value": p.value} for p in params],
+            "tags": [{"key": t.key, "value": t.value} for t in tags],
+        })
+
+    async def get_metric_history_page(self, run_id, key, max_results=None, page_token=None):
+        """One page of a metric's history (the paged store API, not MlflowClient.get_metric_history)"""
+        payload = {"run_id": run_id, "metric_key": key, "max_results": max_results, "page_token": page_token}
+        response = _parse(await self._call("GET", "metrics/get-history", payload),
+                          tracking_pb.GetMetricHistory.Response)
+        return PagedList([Metric.from_proto(m) for m in response.metrics], response.next_page_token or None)
+
+    # ---- model registry ---------------------------------------------------
+    async def create_registered_model(self, name):
+        response = _parse(await self._call("POST", "registered-models/create", {"name": name}),
+                          registry_pb.CreateRegisteredModel.Response)
+        return RegisteredModel.from_proto(response.registered_model)
+
+    async def get_registered_model(self, name):
+        response = _parse(await self._call("GET", "registered-models/get", {"name": name}),
+                          registry_pb.GetRegisteredModel.Response)
+        return RegisteredModel.from_proto(response.registered_model)
+
+    async def rename_registered_model(self, name, new_name):
+        response = _parse(await self._call("POST", "registered-models/rename", {"name": name, "new_name": new_name}),
+                          registry_pb.RenameRegisteredModel.Response)
+        return RegisteredModel.from_proto(response.registered_model)
+
+    async def update_registered_model(self, name, description=None):
+        response = _parse(
+            await self._call("PATCH", "registered-models/update", {"name": name, "description": description}),
+            registry_pb.UpdateRegisteredModel.Response,
+        )
+        return RegisteredModel.from_proto(response.registered_model)
+
+    async def delete_registered_model(self, name):
+        await self._call("DELETE", "registered-models/delete", {"name": name})
+
+    async def search_registered_models(self, filter_string=None, max_results=None, order_by=None, page_token=None):
+        payload = {"filter": filter_string, "max_results": max_results or 100, "order_by": order_by,
+                   "page_token": page_token}
+        response = _parse(await self._call("GET", "registered-models/search", payload),
+                          registry_pb.SearchRegisteredModels.Response)
+        return PagedList(
+            [RegisteredModel.from_proto(m) for m in response.registered_models], response.next_page_token or None
+        )
+
+    async def set_registered_model_tag(self, name, key, value):
+        await self._call("POST", "registered-models/set-tag", {"name": name, "key": key, "value": str(value)})
+
+    async def create_model_version(self, name, source, run_id=None):
+        response = _parse(
+            await self._call("POST", "model-versions/create", {"name": name, "source": source, "run_id": run_id}),
+            registry_pb.CreateModelVersion.Response,
+        )
+        return ModelVersion.from_proto(response.model_version)
+
+    async def get_model_version(self, name, version):
+        response = _parse(await self._call("GET", "model-versions/get", {"name": name, "version": str(version)}),
+                          registry_pb.GetModelVersion.Response)
+        return ModelVersion.from_proto(response.model_version)
+
+    async def update_model_version(self, name, version, description=None):
+        response = _parse(
+            await self._call("PATCH", "model-versions/update",
+                             {"name": name, "version": str(version), "description": description}),
+            registry_pb.UpdateModelVersion.Response,
+        )
+        return ModelVersion.from_proto(response.model_version)
+
+    async def delete_model_version(self, name, version):
+        await self._call("DELETE", "model-versions/delete", {"name": name, "version": str(version)})
+
+    async def transition_model_version_stage(self, name, version, stage, archive_existing_versions=False):
+        payload = {"name": name, "version": str(version), "stage": stage,
+                   "archive_existing_versions": archive_existing_versions}
+        response = _parse(await self._call("POST", "model-versions/transition-stage", payload),
+                          registry_pb.TransitionModelVersionStage.Response)
+        return ModelVersion.from_proto(response.model_version)
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Downloaded model versions for deployments, deduplicated by content and
+# evicted least recently used first once the store exceeds its disk budget
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "/app/model_cache")
+MODEL_CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", str(50 * 1024 ** 3)))
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while chunk := fh.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+def _read(path):
+    try:
+        with open(path) as fh:
+            return fh.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+class ModelCache:
+    """Content-addressed store of model version files shared by deployments.
+
+    Layout under ``directory``::
+
+        objects/<sha256>        one copy of every distinct file
+        trees/<tree hash>/      a model directory; its files are hard links into objects/
+        trees/<tree hash>.json  manifest: relative path -> sha256, and the tree's size
+        sources/<uri digest>    tree hash that a version's source URI resolved to
+        refs/<name>             tree hash mounted by the deployment container <name>
+
+    A version is looked up by its exact source URI; on a miss it is downloaded,
+    every file is hashed and moved into ``objects/`` unless an identical file
+    is already there, and the tree is named by the hash of its manifest, so
+    versions with identical contents share one tree and versions differing in a
+    few files share the rest. Containers mount a tree read-only, so any number
+    of deployments of a version use one copy on disk.
+
+    When the objects exceed ``max_bytes``, trees that no ref points at are
+    removed least recently used first, along with objects no remaining tree
+    links to. Refs live on disk, so they survive restarts.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._source_locks = {}
+        self._ingesting = 0
+        self._total = None
+        self.hits = 0
+        self.misses = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+
+    def _dir(self, name):
+        path = os.path.join(self.directory, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _manifest_path(self, tree_hash):
+        return os.path.join(self._dir("trees"), f"{tree_hash}.json")
+
+    def _load_manifest(self, tree_hash):
+        text = _read(self._manifest_path(tree_hash))
+        return json.loads(text) if text else None
+
+    def _object_bytes(self):
+        # Only called with self._lock held
+        if self._total is None:
+            self._total = sum(entry.stat().st_size for entry in os.scandir(self._dir("objects")) if entry.is_file())
+        return self._total
+
+    def _source_lock(self, source):
+        with self._lock:
+            return self._source_locks.setdefault(source, threading.Lock())
+
+    def materialize(self, source, download, ref):
+        """Local directory holding the model at ``source``, recorded as used by ``ref``.
+
+        ``download(dst_dir)`` must fetch the model into ``dst_dir`` and return
+        the directory it wrote; it is only called on a miss, and concurrent
+        requests for the same source wait for one download.
+        """
+        source_file = os.path.join(self._dir("sources"), _digest(source))
+        with self._source_lock(source):
+            tree_hash = _read(source_file)
+            manifest = self._load_manifest(tree_hash) if tree_hash else None
+            if manifest is not None and os.path.isdir(os.path.join(self._dir("trees"), tree_hash)):
+                with self._lock:
+                    self.hits += 1
+                    self.bytes_saved += manifest["size"]
+                # Manifest mtime is the LRU clock
+                os.utime(self._manifest_path(tree_hash))
+            else:
+                with self._lock:
+                    self.misses += 1
+                tree_hash = self._ingest(source, download)
+                _write_atomic(source_file, tree_hash)
+            _write_atomic(os.path.join(self._dir("refs"), ref), tree_hash)
+        self.evict()
+        return os.path.join(self._dir("trees"), tree_hash)
+
+    def _ingest(self, source, download):
+        staging = tempfile.mkdtemp(prefix="download-", dir=self._dir("staging"))
+        with self._lock:
+            self._ingesting += 1
+        try:
+            root = download(staging)
+            if os.path.isfile(root):
+                root = os.path.dirname(root)
+            files = {}
+            downloaded = saved = added = 0
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    size = os.path.getsize(path)
+                    sha = _file_sha256(path)
+                    files[os.path.relpath(path, root)] = sha
+                    downloaded += size
+                    obj = os.path.join(self._dir("objects"), sha)
+                    with self._lock:
+                        if os.path.exists(obj):
+                            saved += size
+                        else:
+                            total = self._object_bytes()
+                            os.replace(path, obj)
+                            os.chmod(obj, 0o444)
+                            added += size
+                            self._total = total + size
+            manifest = {"source": source, "files": dict(sorted(files.items())), "size": downloaded}
+            tree_hash = _digest(json.dumps(manifest["files"]))
+            tree_dir = os.path.join(self._dir("trees"), tree_hash)
+            if not os.path.isdir(tree_dir):
+                building = tempfile.mkdtemp(prefix=f"{tree_hash}-", dir=self._dir("staging"))
+                for relpath, sha in manifest["files"].items():
+                    target = os.path.join(building, relpath)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.link(os.path.join(self._dir("objects"), sha), target)
+                try:
+                    os.rename(building, tree_dir)
+                except OSError:
+                    # Another source with identical contents finished first
+                    shutil.rmtree(building, ignore_errors=True)
+            _write_atomic(self._manifest_path(tree_hash), json.dumps(manifest))
+            with self._lock:
+                self.bytes_downloaded += downloaded
+                self.bytes_saved += saved
+            logger.info("Cached %s as tree %s (%d bytes new, %d deduplicated)", source, tree_hash[:12], added, saved)
+            return tree_hash
+        finally:
+            with self._lock:
+                self._ingesting -= 1
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def release(self, ref):
+        """Forget that ``ref`` uses its tree, making the tree evictable"""
+        try:
+            os.remove(os.path.join(self._dir("refs"), ref))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """Remove unreferenced trees, least recently used first, until the objects fit the budget"""
+        with self._lock:
+            # An ingest may be about to link objects that only unreferenced trees hold
+            if self._ingesting or self._object_bytes() <= self.max_bytes:
+                return
+            referenced = {_read(entry.path) for entry in os.scandir(self._dir("refs"))}
+            busy = {
+                _read(os.path.join(self._dir("sources"), _digest(source)))
+                for source, lock in self._source_locks.items() if lock.locked()
+            }
+            trees = sorted(
+                (entry.stat().st_mtime, entry.name[:-len(".json")])
+                for entry in os.scandir(self._dir("trees")) if entry.name.endswith(".json")
+            )
+            for _, tree_hash in trees:
+                if self._total <= self.max_bytes:
+                    break
+                if tree_hash in referenced or tree_hash in busy:
+                    continue
+                manifest = self._load_manifest(tree_hash)
+                shutil.rmtree(os.path.join(self._dir("trees"), tree_hash), ignore_errors=True)
+                os.remove(self._manifest_path(tree_hash))
+                for entry in os.scandir(self._dir("sources")):
+                    if _read(entry.path) == tree_hash:
+                        os.remove(entry.path)
+                for sha in set(manifest["files"].values()):
+                    obj = os.path.join(self._dir("objects"), sha)
+                    stat = os.stat(obj)
+                    # Only the object itself is left: no other tree links to it
+                    if stat.st_nlink == 1:
+                        os.remove(obj)
+                        self._total -= stat.st_size
+                self.evictions += 1
+                logger.info("Evicted model tree %s (%s)", tree_hash[:12], manifest["source"])
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "bytes_downloaded": self.bytes_downloaded,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+            }
+
+
+model_cache = ModelCache(MODEL_CACHE_DIR, MODEL_CACHE_MAX_BYTES)
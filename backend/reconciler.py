@@ -0,0 +1,163 @@
+import logging
+import os
+import threading
+import time
+
+from backend.database import db_connection
+from backend.deployment_jobs import DEGRADED, DOWN, READY, SERVING_PHASES
+from backend.runtime import container_runtime
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two reconciliation passes; 0 turns the reconciler off
+RECONCILE_INTERVAL = float(os.getenv("RECONCILE_INTERVAL", "10"))
+
+# Replica rows in these states are reconciled; "starting" rows belong to a running job
+RECONCILED_REPLICA_STATES = ("running", "exited")
+
+
+def list_containers():
+    """{container name: state} of every deployment container, from a single listing call"""
+    return container_runtime.list_containers("deployment_")
+
+
+def deployment_status(replica_states, desired):
+    """Serving status of a deployment from the states of its replicas"""
+    running = sum(state == "running" for state in replica_states)
+    if running == 0:
+        return DOWN
+    return READY if running >= desired else DEGRADED
+
+
+def plan_changes(deployments, replicas, containers):
+    """Status updates that bring the table in line with the containers.
+
+    ``deployments`` holds (id, status, desired replicas) rows, ``replicas``
+    (deployment_id, replica, container_name, status) rows and ``containers``
+    maps container names to their docker state. Returns the replica updates
+    as (new status, deployment_id, replica, old status) and the deployment
+    updates as (new status, id, old status).
+    """
+    replica_updates = []
+    states = {}
+    for deployment_id, replica, container_name, status in replicas:
+        if status in RECONCILED_REPLICA_STATES:
+            # Containers run with --rm, so a dead one is usually gone from the listing altogether
+            new_status = "running" if containers.get(container_name) == "running" else "exited"
+            if new_status != status:
+                replica_updates.append((new_status, deployment_id, replica, status))
+            status = new_status
+        states.setdefault(deployment_id, []).append(status)
+    deployment_updates = []
+    for deployment_id, status, desired in deployments:
+        if status in SERVING_PHASES:
+            new_status = deployment_status(states.get(deployment_id, ()), desired)
+            if new_status != status:
+                deployment_updates.append((new_status, deployment_id, status))
+    return replica_updates, deployment_updates
+
+
+class DeploymentReconciler:
+    """Background thread keeping deployment and replica status in line with Docker.
+
+    Every ``interval`` seconds it reads the deployment and replica rows, lists
+    all deployment containers with one runtime call and writes every status
+    that differs in a single transaction. Replicas become ``running`` or
+    ``exited``; deployments that finished their job become ``ready`` (all
+    desired replicas run), ``degraded`` (some do) or ``down`` (none do). Each
+    update only applies if the row still has the status the pass read, so rows
+    changed meanwhile by a deployment job or the API are left for the next pass.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread = None
+        self.passes = 0
+        self.failures = 0
+        self.replica_changes = 0
+        self.deployment_changes = 0
+        self.last_pass_at = None
+        self.last_pass_seconds = None
+        self.last_error = None
+
+    def start(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="deployment-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.reconcile()
+            except Exception as e:
+                logger.exception("Deployment reconciliation failed")
+                self.failures += 1
+                self.last_error = str(e)
+
+    def reconcile(self):
+        """Run one pass; returns the number of rows changed"""
+        started = time.perf_counter()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            # Rows are read before the containers are listed: a replica marked running
+            # here already had its container started when docker ps runs
+            # Only serving deployments are reconciled; the status index keeps this
+            # independent of the number of historical rows
+            cursor.execute(
+                f"SELECT id, status, replicas FROM deployments WHERE status IN ({', '.join(['%s'] * len(SERVING_PHASES))})",
+                SERVING_PHASES
+            )
+            deployments = cursor.fetchall()
+            cursor.execute("SELECT deployment_id, replica, container_name, status FROM deployment_replicas")
+            replicas = cursor.fetchall()
+            conn.commit()
+            containers = list_containers()
+            replica_updates, deployment_updates = plan_changes(deployments, replicas, containers)
+            if replica_updates or deployment_updates:
+                if replica_updates:
+                    cursor.executemany(
+                        "UPDATE deployment_replicas SET status = %s, last_updated = NOW() "
+                        "WHERE deployment_id = %s AND replica = %s AND status = %s",
+                        replica_updates
+                    )
+                if deployment_updates:
+                    cursor.executemany(
+                        "UPDATE deployments SET status = %s, last_updated = NOW() WHERE id = %s AND status = %s",
+                        deployment_updates
+                    )
+                conn.commit()
+        for new_status, deployment_id, old_status in deployment_updates:
+            logger.info("Deployment %s is now %s (was %s)", deployment_id, new_status, old_status)
+        self.passes += 1
+        self.replica_changes += len(replica_updates)
+        self.deployment_changes += len(deployment_updates)
+        self.last_pass_at = time.time()
+        self.last_pass_seconds = time.perf_counter() - started
+        self.last_error = None
+        return len(replica_updates) + len(deployment_updates)
+
+    def stats(self):
+        return {
+            "running": self._thread is not None,
+            "interval": self.interval,
+            "passes": self.passes,
+            "failures": self.failures,
+            "replica_changes": self.replica_changes,
+            "deployment_changes": self.deployment_changes,
+            "last_pass_at": self.last_pass_at,
+            "last_pass_seconds": self.last_pass_seconds,
+            "last_error": self.last_error,
+        }
+
+
+deployment_reconciler = DeploymentReconciler(RECONCILE_INTERVAL)
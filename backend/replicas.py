@@ -0,0 +1,198 @@
+import logging
+import os
+
+import mysql.connector
+from mysql.connector import errorcode
+
+from backend.database import db_connection
+from backend.runtime import ContainerNotFound, container_runtime
+
+logger = logging.getLogger(__name__)
+
+# Host ports handed out to serving containers. A replica's row in
+# deployment_replicas is its port lease: the UNIQUE port column keeps two
+# replicas (even from different API processes) from getting the same port.
+DEPLOY_PORT_MIN = int(os.getenv("DEPLOY_PORT_MIN", "5001"))
+DEPLOY_PORT_MAX = int(os.getenv("DEPLOY_PORT_MAX", "5999"))
+DEPLOY_MAX_REPLICAS = int(os.getenv("DEPLOY_MAX_REPLICAS", "16"))
+PORT_LEASE_ATTEMPTS = 5
+
+SERVING_IMAGE = "my-mlflow-serving-image"
+# Port the serving process listens on inside the container
+CONTAINER_PORT = 5001
+
+REPLICA_COLUMNS = "deployment_id, replica, port, container_name, status, last_updated"
+# Unique key whose violation means another allocator leased the same port
+PORT_UNIQUE_KEY = "uq_deployment_replicas_port"
+
+
+class PortsExhausted(Exception):
+    """No free port left in DEPLOY_PORT_MIN..DEPLOY_PORT_MAX"""
+
+
+class ReplicaExists(Exception):
+    """The replica number already has a row, e.g. started by a concurrent scale request"""
+
+
+def replica_container_name(deployment_id, replica):
+    return f"deployment_{deployment_id}_{replica}"
+
+
+def start_container(name, model_path, port):
+    # The cached model files are shared between deployments, so they are mounted read-only
+    container_runtime.run(name, SERVING_IMAGE, ["--model-uri", "/model"], {CONTAINER_PORT: port}, {model_path: "/model"})
+
+
+def stop_container(name):
+    container_runtime.stop(name)
+
+
+def replica_to_dict(row):
+    return {
+        "replica": row[1],
+        "port": row[2],
+        "container_name": row[3],
+        "status": row[4],
+        "last_updated": row[5],
+    }
+
+
+def fetch_replicas(cursor, deployment_id=None, deployment_ids=None):
+    """Replica dicts grouped by deployment id.
+
+    Covers one deployment, the listed ``deployment_ids``, or all deployments
+    when neither is given.
+    """
+    if deployment_id is not None:
+        deployment_ids = [deployment_id]
+    if deployment_ids is None:
+        cursor.execute(f"SELECT {REPLICA_COLUMNS} FROM deployment_replicas ORDER BY deployment_id, replica")
+    elif not deployment_ids:
+        return {}
+    else:
+        cursor.execute(
+            f"SELECT {REPLICA_COLUMNS} FROM deployment_replicas "
+            f"WHERE deployment_id IN ({', '.join(['%s'] * len(deployment_ids))}) ORDER BY deployment_id, replica",
+            tuple(deployment_ids)
+        )
+    grouped = {}
+    for row in cursor.fetchall():
+        grouped.setdefault(row[0], []).append(replica_to_dict(row))
+    return grouped
+
+
+def lease_port(deployment_id, replica):
+    """Insert the replica's row with the lowest free port; returns the port"""
+    for _ in range(PORT_LEASE_ATTEMPTS):
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT port FROM deployment_replicas WHERE port BETWEEN %s AND %s", (DEPLOY_PORT_MIN, DEPLOY_PORT_MAX)
+            )
+            used = {row[0] for row in cursor.fetchall()}
+            port = next((p for p in range(DEPLOY_PORT_MIN, DEPLOY_PORT_MAX + 1) if p not in used), None)
+            if port is None:
+                raise PortsExhausted(f"All ports {DEPLOY_PORT_MIN}-{DEPLOY_PORT_MAX} are leased")
+            try:
+                cursor.execute(
+                    "INSERT INTO deployment_replicas (deployment_id, replica, port, container_name, status, last_updated) "
+                    "VALUES (%s, %s, %s, %s, %s, NOW())",
+                    (deployment_id, replica, port, replica_container_name(deployment_id, replica), "starting")
+                )
+                conn.commit()
+                return port
+            except mysql.connector.IntegrityError as e:
+                conn.rollback()
+                if e.errno == errorcode.ER_DUP_ENTRY and PORT_UNIQUE_KEY in (e.msg or ""):
+                    # Another allocator leased the same port first: pick again
+                    continue
+                if e.errno == errorcode.ER_DUP_ENTRY:
+                    # The (deployment_id, replica) primary key: another port would not help
+                    raise ReplicaExists(f"Replica {replica} of deployment {deployment_id} already exists") from e
+                raise
+    raise PortsExhausted(f"Could not lease a port after {PORT_LEASE_ATTEMPTS} attempts")
+
+
+def _set_replica_status(deployment_id, replica, status):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE deployment_replicas SET status = %s, last_updated = NOW() WHERE deployment_id = %s AND replica = %s",
+            (status, deployment_id, replica)
+        )
+        conn.commit()
+
+
+def release_port(deployment_id, replica):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM deployment_replicas WHERE deployment_id = %s AND replica = %s", (deployment_id, replica)
+        )
+        conn.commit()
+
+
+def start_replica(deployment_id, replica, model_path):
+    """Lease a port and start one serving container; the lease is released again if the start fails"""
+    port = lease_port(deployment_id, replica)
+    try:
+        start_container(replica_container_name(deployment_id, replica), model_path, port)
+    except Exception:
+        release_port(deployment_id, replica)
+        raise
+    _set_replica_status(deployment_id, replica, "running")
+    return port
+
+
+def stop_replica(deployment_id, replica, status="running"):
+    """Stop a replica's container (if it still runs) and release its port.
+
+    Containers the reconciler found ``exited`` are gone already (they run with
+    --rm), so only their lease is released.
+    """
+    name = replica_container_name(deployment_id, replica)
+    if status != "exited":
+        try:
+            stop_container(name)
+        except ContainerNotFound:
+            logger.warning("Container %s was not running", name)
+    release_port(deployment_id, replica)
+
+
+def stop_all_replicas(deployment_id):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        replicas = fetch_replicas(cursor, deployment_id).get(deployment_id, [])
+    for replica in replicas:
+        stop_replica(deployment_id, replica["replica"], replica["status"])
+
+
+def scale_replicas(deployment_id, model_path, replicas):
+    """Start or stop replicas until exactly ``replicas`` run; returns the replica dicts.
+
+    Replicas whose container has exited are replaced, so scaling also repairs
+    a degraded or down deployment, which is then ready again.
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        existing = fetch_replicas(cursor, deployment_id).get(deployment_id, [])
+    current = []
+    for r in existing:
+        if r["status"] == "exited":
+            release_port(deployment_id, r["replica"])
+        else:
+            current.append(r["replica"])
+    # Scale up into the lowest free replica numbers, scale down from the highest
+    missing = [r for r in range(replicas + len(current)) if r not in current][:max(replicas - len(current), 0)]
+    for replica in missing:
+        start_replica(deployment_id, replica, model_path)
+    for replica in sorted(current, reverse=True)[:max(len(current) - replicas, 0)]:
+        stop_replica(deployment_id, replica)
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE deployments SET replicas = %s, status = %s, last_updated = NOW() WHERE id = %s",
+            (replicas, "ready", deployment_id)
+        )
+        conn.commit()
+        return fetch_replicas(cursor, deployment_id).get(deployment_id, [])
@@ -0,0 +1,32 @@
+from fastapi.responses import FileResponse, JSONResponse
+
+from backend.serializers import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Routes that return one directly also skip FastAPI's jsonable_encoder pass,
+    which is where most of the time goes for large run lists.
+    """
+
+    def render(self, content):
+        return dumps(content)
+
+
+class ReleasingFileResponse(FileResponse):
+    """FileResponse that awaits ``release()`` once it is done with the file.
+
+    Unlike a background task, the release also runs when sending fails, e.g.
+    when a client drops a ranged download half way.
+    """
+
+    def __init__(self, path, release, **kwargs):
+        super().__init__(path, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.release()
@@ -1,121 +1,313 @@
-import os
-import subprocess
-from fastapi import APIRouter, HTTPException
-from backend.database import get_db_connection
-from mlflow.tracking import MlflowClient
+import asyncio
+import json
+from datetime import datetime
+import aiohttp
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from backend.database import db_connection
+from backend.gateway import (
+    PREDICT_BATCH_MAX_SIZE, PREDICT_BATCH_MAX_WAIT_MS, NoReplicas, UpstreamError, inference_gateway
+)
+from backend.deployment_jobs import ACTIVE_PHASES, SERVING_PHASES, deployment_jobs, fetch_model, model_ref, phase_durations
+from backend.log_stream import LOG_BUFFER_LINES, log_hub
+from backend.http_cache import conditional_response, json_response, make_etag
+from backend.serializers import dumps
 from mlflow import *
+from mlflow.exceptions import MlflowException, RestException
+from backend.mlflow_api import client
+from backend.model_cache import model_cache
+from backend.runtime import ContainerError, ContainerNotFound, container_runtime
+from backend.replicas import (
+    DEPLOY_MAX_REPLICAS, PortsExhausted, ReplicaExists, fetch_replicas, replica_container_name, scale_replicas,
+    stop_all_replicas
+)
 
 router = APIRouter()
-client = MlflowClient(tracking_uri="http://localhost:5000")
 
-# Base directory where deployments will be managed
-DEPLOYMENT_DIR = "/app/deployments"
+# MLflow error codes meaning the requested model version does not exist, as
+# opposed to the registry being unreachable or failing
+INVALID_MODEL_VERSION_CODES = ("RESOURCE_DOES_NOT_EXIST", "INVALID_PARAMETER_VALUE")
+
+# Cheap change detector for the deployments and deployment_replicas tables: row
+# counts, newest updates and a checksum over every row, computed server-side
+# without transferring the rows
+DEPLOYMENTS_FINGERPRINT_SQL = """
+    SELECT * FROM
+        (SELECT COUNT(*), MAX(last_updated),
+                BIT_XOR(CRC32(CONCAT_WS('|', id, name, model, version, replicas, status, last_updated, phase_timings)))
+         FROM deployments) AS d,
+        (SELECT COUNT(*), MAX(last_updated),
+                BIT_XOR(CRC32(CONCAT_WS('|', deployment_id, replica, port, status, last_updated)))
+         FROM deployment_replicas) AS r
+"""
+DEPLOYMENT_COLUMNS = "id, name, model, version, status, last_updated, phase_timings, error, replicas"
+
+# Keyset pages of the deployment listing, newest deployment first
+DEPLOYMENTS_DEFAULT_PAGE_SIZE = 100
+DEPLOYMENTS_MAX_PAGE_SIZE = 1000
+
+
+def _deployment_to_dict(dep, replicas=()):
+    return {
+        "id": dep[0],
+        "name": dep[1],
+        "model": dep[2],
+        "version": dep[3],
+        "status": dep[4],
+        "last_updated": dep[5],
+        "phase_timings": json.loads(dep[6]) if dep[6] else None,
+        "error": dep[7],
+        "desired_replicas": dep[8],
+        "replicas": list(replicas)
+    }
 
-# Ensure the deployment directory exists
-os.makedirs(DEPLOYMENT_DIR, exist_ok=True)
 
+def deployments_query(status=None, model=None, version=None, updated_since=None, after_id=None, limit=None):
+    """SQL and parameters listing deployments newest first, with every filter in the WHERE clause.
 
-# List all active deployments
+    ``status`` is a list of statuses; ``after_id`` continues a keyset page
+    after the deployment with that id. Each filter is served by an index
+    (see migrations/0004_deployment_indexes.sql).
+    """
+    clauses, params = [], []
+    if status:
+        clauses.append(f"status IN ({', '.join(['%s'] * len(status))})")
+        params.extend(status)
+    if model is not None:
+        clauses.append("model = %s")
+        params.append(model)
+    if version is not None:
+        clauses.append("version = %s")
+        params.append(version)
+    if updated_since is not None:
+        clauses.append("last_updated >= %s")
+        params.append(updated_since)
+    if after_id is not None:
+        clauses.append("id < %s")
+        params.append(after_id)
+    sql = f"SELECT {DEPLOYMENT_COLUMNS} FROM deployments"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY id DESC"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return sql, params
+
+
+# List deployments, optionally filtered and one keyset page at a time
 @router.get("/")
-def list_deployments():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM deployments")
-    deployments = cursor.fetchall()
-    conn.close()
-
-    return [
-        {
-            "id": dep[0],
-            "name": dep[1],
-            "model": dep[2],
-            "version": dep[3],
-            "status": dep[4],
-            "last_updated": dep[5]
-        }
-        for dep in deployments
-    ]
+def list_deployments(
+    request: Request,
+    status: str = None,
+    model: str = None,
+    version: str = None,
+    updated_since: datetime = None,
+    page_size: int = Query(None, ge=1, le=DEPLOYMENTS_MAX_PAGE_SIZE),
+    page_token: str = None,
+):
+    """List deployments, newest first.
+
+    ``status`` takes one or more comma-separated statuses, ``model`` and
+    ``version`` match exactly and ``updated_since`` keeps deployments changed
+    at or after that time (server local time). Without paging parameters all
+    matching deployments are returned as a list; with ``page_size`` and/or
+    ``page_token`` a single page is returned together with ``next_page_token``.
+    """
+    statuses = [s.strip() for s in status.split(",") if s.strip()] if status else None
+    if updated_since is not None and updated_since.tzinfo is not None:
+        # last_updated holds the database server's local time
+        updated_since = updated_since.astimezone().replace(tzinfo=None)
+    filters = {"status": statuses, "model": model, "version": version, "updated_since": updated_since}
+
+    if page_size or page_token:
+        try:
+            after_id = int(page_token) if page_token else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid page_token")
+        page_size = page_size or DEPLOYMENTS_DEFAULT_PAGE_SIZE
+        # One extra row tells whether another page follows
+        sql, params = deployments_query(**filters, after_id=after_id, limit=page_size + 1)
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            deployments = cursor.fetchall()
+            more = len(deployments) > page_size
+            deployments = deployments[:page_size]
+            replicas = fetch_replicas(cursor, deployment_ids=[dep[0] for dep in deployments])
+        return json_response(request, {
+            "deployments": [_deployment_to_dict(dep, replicas.get(dep[0], ())) for dep in deployments],
+            "next_page_token": str(deployments[-1][0]) if more else None,
+        })
+
+    if any(value is not None for value in filters.values()):
+        sql, params = deployments_query(**filters)
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            deployments = cursor.fetchall()
+            replicas = fetch_replicas(cursor, deployment_ids=[dep[0] for dep in deployments])
+        return json_response(request, [_deployment_to_dict(dep, replicas.get(dep[0], ())) for dep in deployments])
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        # Both queries run in the same transaction snapshot, so the ETag describes the rows sent
+        cursor.execute(DEPLOYMENTS_FINGERPRINT_SQL)
+        etag = make_etag(repr(cursor.fetchone()).encode())
+
+        def render():
+            cursor.execute(*deployments_query())
+            deployments = cursor.fetchall()
+            replicas = fetch_replicas(cursor)
+            return dumps([_deployment_to_dict(dep, replicas.get(dep[0], ())) for dep in deployments])
+
+        # A matching If-None-Match gets a 304 without the rows ever being read
+        return conditional_response(request, etag, render)
 
 
 # Get deployment details by ID
 @router.get("/{deployment_id}")
 def get_deployment(deployment_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM deployments WHERE id = %s", (deployment_id,))
-    deployment = cursor.fetchone()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {DEPLOYMENT_COLUMNS} FROM deployments WHERE id = %s", (deployment_id,))
+        deployment = cursor.fetchone()
+        replicas = fetch_replicas(cursor, deployment_id).get(deployment_id, ())
 
     if not deployment:
         raise HTTPException(status_code=404, detail="Deployment not found")
 
+    return _deployment_to_dict(deployment, replicas)
+
+
+# Queue a deployment: the model is pulled from MLflow and run in Docker containers by a background job
+@router.post("/create", status_code=202)
+def create_deployment(name: str, model: str, version: str, replicas: int = Query(1, ge=1, le=DEPLOY_MAX_REPLICAS)):
+    # Resolve exactly the requested version
+    try:
+        model_version = client.get_model_version(model, version)
+    except MlflowException as e:
+        if e.error_code in INVALID_MODEL_VERSION_CODES:
+            raise HTTPException(status_code=400, detail="Invalid model version")
+        if isinstance(e, RestException):
+            # The tracking server answered with an error of its own
+            raise HTTPException(status_code=502, detail=f"Model registry request failed: {e.message}")
+        # No answer: connection errors and timeouts once the client's retries are spent
+        raise HTTPException(status_code=503, detail=f"Model registry unavailable: {e.message}")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Model registry unavailable: {e}")
+
+    deployment_id = deployment_jobs.submit(name, model, version, model_version.source, replicas)
     return {
-        "id": deployment[0],
-        "name": deployment[1],
-        "model": deployment[2],
-        "version": deployment[3],
-        "status": deployment[4],
-        "last_updated": deployment[5]
+        "message": "Deployment queued",
+        "job_id": deployment_id,
+        "name": name,
+        "model": model,
+        "version": version,
+        "replicas": replicas,
+        "status": "queued",
+        "status_url": f"/deployments/{deployment_id}/status",
     }
 
 
-# Create a new deployment by pulling the model from MLflow and running it in a Docker container
-@router.post("/create")
-def create_deployment(name: str, model: str, version: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+# Progress of a deployment job
+@router.get("/{deployment_id}/status")
+def get_deployment_status(deployment_id: int):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT status, phase_timings, error FROM deployments WHERE id = %s", (deployment_id,))
+        deployment = cursor.fetchone()
 
-    # Ensure model version exists in MLflow
-    model_versions = client.search_model_versions(f"name='{model}'")
-    model_version_list = [v.version for v in model_versions]
+    if not deployment:
+        raise HTTPException(status_code=404, detail="Deployment not found")
 
-    if version not in model_version_list:
-        raise HTTPException(status_code=400, detail="Invalid model version")
+    status, timings, error = deployment
+    timings = json.loads(timings) if timings else None
+    return {
+        "job_id": deployment_id,
+        "status": status,
+        "done": status not in ACTIVE_PHASES,
+        "phase_seconds": phase_durations(timings),
+        "phase_timings": timings,
+        "error": error,
+    }
 
-    # Get model's download URI from MLflow
-    model_uri = f"models:/{model}/{version}"
-    local_model_path = os.path.join(DEPLOYMENT_DIR, f"{model}_{version}")
 
-    try:
-        client.download_artifacts(run_id=model_versions[0].run_id, path="", dst_path=local_model_path)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to download model artifacts: {str(e)}")
+# Cancel a queued or running deployment job
+@router.post("/{deployment_id}/cancel")
+def cancel_deployment(deployment_id: int):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT status FROM deployments WHERE id = %s", (deployment_id,))
+        deployment = cursor.fetchone()
 
-    # Define container name and port
-    container_name = f"deployment_{model}_{version}"
-    port = 5001  # Change dynamically if needed
+    if not deployment:
+        raise HTTPException(status_code=404, detail="Deployment not found")
+    if deployment[0] not in ACTIVE_PHASES or not deployment_jobs.cancel(deployment_id):
+        raise HTTPException(status_code=409, detail=f"Deployment job is not running (status: {deployment[0]})")
 
-    # Run the model inside a Docker container
-    docker_run_cmd = f"""
-        docker run -d --rm --name {container_name} -p {port}:5001 \
-        -v {local_model_path}:/model \
-        my-mlflow-serving-image --model-uri /model
-    """
+    return {"message": f"Cancellation of deployment {deployment_id} requested", "status_url": f"/deployments/{deployment_id}/status"}
+
+
+# Start or stop replicas of a serving deployment, each on its own leased host port.
+# Exited replicas are replaced, so this also repairs a degraded or down deployment.
+@router.post("/{deployment_id}/scale")
+def scale_deployment(deployment_id: int, replicas: int = Query(..., ge=1, le=DEPLOY_MAX_REPLICAS)):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT model, version, status FROM deployments WHERE id = %s", (deployment_id,))
+        deployment = cursor.fetchone()
+
+    if not deployment:
+        raise HTTPException(status_code=404, detail="Deployment not found")
+    model, version, status = deployment
+    if status not in SERVING_PHASES:
+        raise HTTPException(status_code=409, detail=f"Only serving deployments can be scaled (status: {status})")
 
     try:
-        subprocess.run(docker_run_cmd, shell=True, check=True)
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(status_code=500, detail=f"Failed to start deployment: {str(e)}")
-
-    # Insert deployment record into the database
-    cursor.execute(
-        "INSERT INTO deployments (name, model, version, status, last_updated) VALUES (%s, %s, %s, %s, NOW())",
-        (name, model, version, "Running")
-    )
-    conn.commit()
-    conn.close()
+        # A cache hit unless the files were evicted after a restart
+        model_path = fetch_model(deployment_id, client.get_model_version(model, version).source)
+        scaled = scale_replicas(deployment_id, model_path, replicas)
+    except PortsExhausted as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ReplicaExists as e:
+        raise HTTPException(status_code=409, detail=f"Deployment is being scaled concurrently: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to scale deployment: {str(e)}")
+
+    return {"deployment_id": deployment_id, "desired_replicas": replicas, "replicas": scaled}
+
+
+# Score requests on the deployment's replicas through the pooled gateway. Single-row JSON
+# requests are micro-batched with concurrent ones when max_wait_ms > 0.
+@router.post("/{deployment_id}/predict")
+async def predict(
+    deployment_id: int,
+    request: Request,
+    max_batch_size: int = Query(PREDICT_BATCH_MAX_SIZE, ge=1, le=1024),
+    max_wait_ms: float = Query(PREDICT_BATCH_MAX_WAIT_MS, ge=0, le=1000),
+):
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+    body = await request.body()
+    try:
+        status, content, media_type = await inference_gateway.predict(
+            deployment_id, body, content_type, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+        )
+    except NoReplicas as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except (UpstreamError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+        raise HTTPException(status_code=502, detail=f"Prediction failed: {str(e)}")
 
-    return {"message": "Deployment created", "name": name, "model": model, "version": version, "port": port}
+    return Response(content=content, status_code=status, media_type=media_type)
 
 
 # Update deployment status
 @router.put("/{deployment_id}/update_status")
 def update_deployment_status(deployment_id: int, status: str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE deployments SET status = %s, last_updated = NOW() WHERE id = %s", (status, deployment_id))
-    conn.commit()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE deployments SET status = %s, last_updated = NOW() WHERE id = %s", (status, deployment_id))
+        conn.commit()
 
     return {"message": f"Deployment {deployment_id} updated to {status}"}
 
@@ -123,55 +315,81 @@ def update_deployment_status(deployment_id: int, status: str):
 # Stop and delete a deployment
 @router.delete("/{deployment_id}")
 def delete_deployment(deployment_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
     # Fetch deployment details
-    cursor.execute("SELECT model, version FROM deployments WHERE id = %s", (deployment_id,))
-    deployment = cursor.fetchone()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT status FROM deployments WHERE id = %s", (deployment_id,))
+        deployment = cursor.fetchone()
     if not deployment:
         raise HTTPException(status_code=404, detail="Deployment not found")
 
-    model, version = deployment
-    container_name = f"deployment_{model}_{version}"
+    status = deployment[0]
+    if status in ACTIVE_PHASES:
+        raise HTTPException(status_code=409, detail=f"Deployment job is still {status}; cancel it first")
 
-    # Stop the running container
-    docker_stop_cmd = f"docker stop {container_name}"
+    # Stop the replica containers and release their ports (failed and cancelled jobs have none left)
     try:
-        subprocess.run(docker_stop_cmd, shell=True, check=True)
-    except subprocess.CalledProcessError:
-        raise HTTPException(status_code=500, detail="Failed to stop deployment container")
+        stop_all_replicas(deployment_id)
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to stop deployment containers")
+    # The model files may now be evicted from the cache
+    model_cache.release(model_ref(deployment_id))
 
     # Remove deployment record from database
-    cursor.execute("DELETE FROM deployments WHERE id = %s", (deployment_id,))
-    conn.commit()
-    conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM deployments WHERE id = %s", (deployment_id,))
+        conn.commit()
 
     return {"message": f"Deployment {deployment_id} stopped and deleted"}
 
 
-# Fetch real deployment logs from Docker containers
-@router.get("/{deployment_id}/logs")
-def get_deployment_logs(deployment_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Fetch deployment details
-    cursor.execute("SELECT model, version FROM deployments WHERE id = %s", (deployment_id,))
-    deployment = cursor.fetchone()
-    conn.close()
+def _check_replica(deployment_id, replica):
+    """Raise unless the deployment has a replica with a live container"""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM deployments WHERE id = %s", (deployment_id,))
+        deployment = cursor.fetchone()
+        replicas = fetch_replicas(cursor, deployment_id).get(deployment_id, [])
 
     if not deployment:
         raise HTTPException(status_code=404, detail="Deployment not found")
+    state = next((r["status"] for r in replicas if r["replica"] == replica), None)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Replica not found")
+    # The reconciler saw the container exit; with --rm its logs are gone too
+    if state == "exited":
+        raise HTTPException(status_code=409, detail="Replica container has exited")
 
-    model, version = deployment
-    container_name = f"deployment_{model}_{version}"
 
-    # Fetch logs from the running container
-    docker_logs_cmd = f"docker logs {container_name} --tail 50"
+# Fetch real deployment logs from the container runtime
+@router.get("/{deployment_id}/logs")
+def get_deployment_logs(deployment_id: int, replica: int = 0):
+    _check_replica(deployment_id, replica)
+
+    # Fetch logs from the replica's container
     try:
-        logs = subprocess.check_output(docker_logs_cmd, shell=True, text=True)
-    except subprocess.CalledProcessError:
+        logs = container_runtime.logs(replica_container_name(deployment_id, replica), tail=50)
+    except ContainerNotFound:
+        raise HTTPException(status_code=404, detail="Replica container not found")
+    except ContainerError:
         raise HTTPException(status_code=500, detail="Failed to fetch deployment logs")
 
-    return {"deployment_id": deployment_id, "logs": logs.split("\n")}
+    return {"deployment_id": deployment_id, "replica": replica, "logs": logs.split("\n")}
+
+
+# Follow deployment logs live as Server-Sent Events; all viewers of a replica share one upstream stream
+@router.get("/{deployment_id}/logs/stream")
+async def stream_deployment_logs(
+    deployment_id: int, request: Request, replica: int = 0, tail: int = Query(50, ge=0, le=LOG_BUFFER_LINES)
+):
+    await asyncio.to_thread(_check_replica, deployment_id, replica)
+    # Browsers send the id of the last event they got when they reconnect
+    last_event_id = request.headers.get("last-event-id")
+    last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
+    return StreamingResponse(
+        log_hub.events(replica_container_name(deployment_id, replica), tail, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
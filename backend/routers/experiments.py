@@ -1,4 +1,6 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from backend.http_cache import cached_json_response
+from backend.serializers import parse_experiment_fields, project_experiment
 from backend.mlflow_api import (
     get_experiments, get_experiment, get_experiment_by_name,
     create_experiment, delete_experiment, restore_experiment, update_experiment
@@ -10,20 +12,35 @@ router = APIRouter()
 # 📌 List Experiments
 # -------------------------------------
 @router.get("/")
-def list_experiments():
-    """Fetch all MLflow experiments."""
-    experiments = get_experiments()
+async def list_experiments(request: Request, fields: str = None):
+    """Fetch all MLflow experiments, optionally limited to some fields (e.g. ``id,name``).
+
+    Responses carry an ETag; a matching If-None-Match gets a 304.
+    """
+    names = None
+    if fields:
+        try:
+            names = parse_experiment_fields(fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    experiments = await get_experiments()
     if isinstance(experiments, dict) and "error" in experiments:
         raise HTTPException(status_code=500, detail=experiments["error"])
-    return {"experiments": experiments}
+
+    def build(experiments):
+        if names:
+            experiments = [project_experiment(exp, names) for exp in experiments]
+        return {"experiments": experiments}
+
+    return cached_json_response(request, ("experiments", names), experiments, build)
 
 # -------------------------------------
 # 📌 Get Experiment by ID
 # -------------------------------------
 @router.get("/{experiment_id}")
-def get_experiment_route(experiment_id: str):
+async def get_experiment_route(experiment_id: str):
     """Fetch a single experiment by ID."""
-    experiment = get_experiment(experiment_id)
+    experiment = await get_experiment(experiment_id)
     if isinstance(experiment, dict) and "error" in experiment:
         raise HTTPException(status_code=404, detail=experiment["error"])
     return experiment
@@ -32,9 +49,9 @@ def get_experiment_route(experiment_id: str):
 # 📌 Get Experiment by Name
 # -------------------------------------
 @router.get("/by_name/{name}")
-def get_experiment_by_name_route(name: str):
+async def get_experiment_by_name_route(name: str):
     """Fetch an experiment by name."""
-    experiment = get_experiment_by_name(name)
+    experiment = await get_experiment_by_name(name)
     if isinstance(experiment, dict) and "error" in experiment:
         raise HTTPException(status_code=404, detail=experiment["error"])
     return experiment
@@ -43,9 +60,9 @@ def get_experiment_by_name_route(name: str):
 # 📌 Create Experiment
 # -------------------------------------
 @router.post("/create")
-def create_experiment_route(name: str):
+async def create_experiment_route(name: str):
     """Create a new MLflow experiment."""
-    response = create_experiment(name)
+    response = await create_experiment(name)
     if isinstance(response, dict) and "error" in response:
         raise HTTPException(status_code=500, detail=response["error"])
     return {"message": "Experiment created", "id": response["experiment_id"]}
@@ -54,9 +71,9 @@ def create_experiment_route(name: str):
 # 📌 Delete Experiment
 # -------------------------------------
 @router.delete("/{experiment_id}")
-def delete_experiment_route(experiment_id: str):
+async def delete_experiment_route(experiment_id: str):
     """Soft-delete an MLflow experiment."""
-    response = delete_experiment(experiment_id)
+    response = await delete_experiment(experiment_id)
     if isinstance(response, dict) and "error" in response:
         raise HTTPException(status_code=500, detail=response["error"])
     return {"message": "Experiment deleted"}
@@ -65,9 +82,9 @@ def delete_experiment_route(experiment_id: str):
 # 📌 Restore Deleted Experiment
 # -------------------------------------
 @router.post("/restore/{experiment_id}")
-def restore_experiment_route(experiment_id: str):
+async def restore_experiment_route(experiment_id: str):
     """Restore a deleted MLflow experiment."""
-    response = restore_experiment(experiment_id)
+    response = await restore_experiment(experiment_id)
     if isinstance(response, dict) and "error" in response:
         raise HTTPException(status_code=500, detail=response["error"])
     return {"message": "Experiment restored"}
@@ -76,15 +93,15 @@ def restore_experiment_route(experiment_id: str):
 # 📌 Update Experiment Name
 # -------------------------------------
 @router.put("/{experiment_id}")
-def update_experiment_route(experiment_id: str, new_name: str):
+async def update_experiment_route(experiment_id: str, new_name: str):
     """Rename an existing experiment."""
-    response = update_experiment(experiment_id, new_name)
+    response = await update_experiment(experiment_id, new_name)
     if isinstance(response, dict) and "error" in response:
         raise HTTPException(status_code=500, detail=response["error"])
     return {"message": "Experiment updated"}
 
 @router.get("/debug")
-def debug_experiments():
+async def debug_experiments():
     """Check all available experiments in MLflow."""
-    experiments = get_experiments()
+    experiments = await get_experiments()
     return {"experiments": experiments}
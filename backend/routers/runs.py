@@ -1,51 +1,177 @@
-from fastapi import APIRouter, HTTPException
+import mimetypes
+import os
+from typing import List, Optional, Union
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from backend.mlflow_api import (
-    get_experiments, get_runs, get_run, create_run, delete_run, restore_run,
-    log_metric, log_param, list_artifacts, log_artifact
+    get_experiments, get_runs, get_all_runs, get_runs_page, iter_runs, iter_run_pages, get_run, create_run, delete_run,
+    restore_run, log_metric, log_param, log_batch, log_batches, get_metric_history, list_artifacts, log_artifact,
+    log_artifacts, open_artifact, release_artifact, walk_artifacts,
+    RUNS_DEFAULT_PAGE_SIZE, RUNS_MAX_PAGE_SIZE, ARTIFACT_TREE_MAX_DEPTH, ARTIFACT_TREE_MAX_ENTRIES
 )
+from backend.artifacts import UploadError, make_spool_dir, remove_spool_dir, spool_multipart
+from backend.downsample import DOWNSAMPLE_METHODS
+from backend.export import EXPORT_FORMATS, EXPORT_MEDIA_TYPES, export_runs
+from backend.http_cache import json_response
+from backend.responses import ReleasingFileResponse
+from backend.serializers import dumps, parse_run_fields
 
 router = APIRouter()
 
+class MetricEntry(BaseModel):
+    key: str
+    value: float
+    step: int = 0
+    timestamp: Optional[int] = None
+
+class KeyValueEntry(BaseModel):
+    key: str
+    value: Union[str, int, float, bool]
+
+class RunBatch(BaseModel):
+    metrics: List[MetricEntry] = []
+    params: List[KeyValueEntry] = []
+    tags: List[KeyValueEntry] = []
+
+class MultiRunBatchItem(RunBatch):
+    run_id: str
+
+class MultiRunBatch(BaseModel):
+    items: List[MultiRunBatchItem]
+
+def _run_projection(fields):
+    """Parse the ``fields=`` selector (e.g. ``info.run_id,metrics.accuracy``); None means full runs."""
+    if not fields:
+        return None
+    try:
+        return parse_run_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # -------------------------------------
 # 📌 List All Runs
 # -------------------------------------
 @router.get("/")
-def list_all_runs():
-    """Fetch all runs from all experiments."""
+async def list_all_runs(request: Request, fields: str = None):
+    """Fetch all runs from all experiments (ETag / If-None-Match aware).
+
+    The ETag is a hash of the rendered body, so a matching If-None-Match saves
+    the transfer but not the search_runs fan-out and rendering behind it:
+    MLflow runs carry no last-update time, and metrics logged straight to the
+    tracking server change no experiment, so there is no cheaper fingerprint
+    that would notice every change.
+    """
+    projection = _run_projection(fields)
     try:
-        experiments = get_experiments()
+        experiments = await get_experiments()
         if isinstance(experiments, dict) and "error" in experiments:
             raise HTTPException(status_code=500, detail=experiments["error"])
-        
-        all_runs = []
-        for exp in experiments:
-            runs = get_runs(exp["id"])
-            if isinstance(runs, dict) and "error" in runs:
-                raise HTTPException(status_code=500, detail=runs["error"])
-            all_runs.extend(runs)
-        
-        return {"runs": all_runs}
+
+        all_runs = await get_all_runs([exp["id"] for exp in experiments], projection=projection)
+        if isinstance(all_runs, dict) and "error" in all_runs:
+            raise HTTPException(status_code=500, detail=all_runs["error"])
+
+        return json_response(request, {"runs": all_runs})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # -------------------------------------
 # 📌 List Runs for Specific Experiment
 # -------------------------------------
+async def _ndjson_lines(head, items):
+    """Serialise items (runs, artifact entries) one per line; an MLflow failure mid-stream becomes a final error line."""
+    try:
+        for item in head:
+            yield dumps(item) + b"\n"
+        async for item in items:
+            yield dumps(item) + b"\n"
+    except Exception as e:
+        yield dumps({"error": str(e)}) + b"\n"
+
 @router.get("/{experiment_id}")
-def list_runs(experiment_id: str):
-    """Fetch all runs for a given experiment."""
-    runs = get_runs(experiment_id)
+async def list_runs(
+    request: Request,
+    experiment_id: str,
+    page_size: int = Query(None, ge=1, le=RUNS_MAX_PAGE_SIZE),
+    page_token: str = None,
+    stream: str = None,
+    fields: str = None,
+):
+    """Fetch runs for a given experiment.
+
+    Without paging parameters every run is returned. With ``page_size`` and/or
+    ``page_token`` a single page is returned together with ``next_page_token``.
+    With ``stream=ndjson`` runs are written one JSON object per line while
+    MLflow pages are fetched lazily. ``fields`` limits each run to the listed
+    parts, e.g. ``info.run_id,metrics.accuracy,params.lr``. Non-streamed
+    responses carry an ETag and answer a matching If-None-Match with 304.
+    """
+    projection = _run_projection(fields)
+    if stream is not None:
+        if stream != "ndjson":
+            raise HTTPException(status_code=400, detail=f"Unsupported stream format '{stream}'")
+        runs = iter_runs(experiment_id, page_size or RUNS_DEFAULT_PAGE_SIZE, page_token, projection)
+        # Fetch the first page up front so a bad experiment ID still yields a proper error status
+        try:
+            first = await anext(runs, None)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        head = [first] if first is not None else []
+        return StreamingResponse(_ndjson_lines(head, runs), media_type="application/x-ndjson")
+
+    if page_size or page_token:
+        page = await get_runs_page(experiment_id, page_size or RUNS_DEFAULT_PAGE_SIZE, page_token, projection)
+        if isinstance(page, dict) and "error" in page:
+            raise HTTPException(status_code=500, detail=page["error"])
+        return json_response(request, page)
+
+    runs = await get_runs(experiment_id, projection)
     if isinstance(runs, dict) and "error" in runs:
         raise HTTPException(status_code=500, detail=runs["error"])
-    return {"runs": runs}
+    return json_response(request, {"runs": runs})
+
+def _key_list(keys):
+    """``a,b`` -> ["a", "b"]; an empty string selects no keys and None lets the export discover them"""
+    if keys is None:
+        return None
+    return [key.strip() for key in keys.split(",") if key.strip()]
+
+# -------------------------------------
+# 📌 Export Runs (Arrow / Parquet)
+# -------------------------------------
+@router.get("/{experiment_id}/export")
+def export_runs_route(experiment_id: str, format: str = "arrow", metrics: str = None, params: str = None):
+    """Export an experiment's runs as a flat columnar table (Arrow IPC stream or Parquet file).
+
+    Columns are the run info fields, ``metrics.<key>`` (float64) and
+    ``params.<key>`` (string). ``metrics`` and ``params`` (comma separated,
+    possibly empty) fix those columns; a list left out is found by a first
+    pass over the runs that collects only their keys, then the runs are
+    fetched again and streamed page by page.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format '{format}', expected one of {EXPORT_FORMATS}")
+    # As with NDJSON streaming, export_runs fetches the first page (and any key scan) eagerly so MLflow errors map to a status code
+    try:
+        body = export_runs(
+            lambda: iter_run_pages(experiment_id), format, _key_list(metrics), _key_list(params)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="runs-{experiment_id}.{format}"'},
+    )
 
 # -------------------------------------
 # 📌 Create a Run
 # -------------------------------------
 @router.post("/create")
-def create_run_route(experiment_id: str, run_name: str):
+async def create_run_route(experiment_id: str, run_name: str):
     """Create a new MLflow run."""
-    run = create_run(experiment_id, run_name)
+    run = await create_run(experiment_id, run_name)
     if isinstance(run, dict) and "error" in run:
         raise HTTPException(status_code=500, detail=run["error"])
     # Return the run info and data aligned with MLflow API
@@ -55,9 +181,9 @@ def create_run_route(experiment_id: str, run_name: str):
 # 📌 Get Specific Run by Run ID
 # -------------------------------------
 @router.get("/run/{run_id}")
-def get_run_route(run_id: str):
+async def get_run_route(run_id: str, fields: str = None):
     """Fetch details of a specific run."""
-    run = get_run(run_id)
+    run = await get_run(run_id, _run_projection(fields))
     if isinstance(run, dict) and "error" in run:
         raise HTTPException(status_code=404, detail=run["error"])
     return {"run": run}
@@ -66,9 +192,9 @@ def get_run_route(run_id: str):
 # 📌 Delete Run
 # -------------------------------------
 @router.delete("/{run_id}")
-def delete_run_route(run_id: str):
+async def delete_run_route(run_id: str):
     """Delete a specific run."""
-    response = delete_run(run_id)
+    response = await delete_run(run_id)
     if isinstance(response, dict) and "error" in response:
         raise HTTPException(status_code=500, detail=response["error"])
     return {"message": "Run deleted"}
@@ -77,9 +203,9 @@ def delete_run_route(run_id: str):
 # 📌 Restore Deleted Run
 # -------------------------------------
 @router.post("/restore/{run_id}")
-def restore_run_route(run_id: str):
+async def restore_run_route(run_id: str):
     """Restore a deleted run."""
-    response = restore_run(run_id)
+    response = await restore_run(run_id)
     if isinstance(response, dict) and "error" in response:
         raise HTTPException(status_code=500, detail=response["error"])
     return {"message": "Run restored"}
@@ -88,8 +214,8 @@ def restore_run_route(run_id: str):
 # 📌 Log Metric to Run
 # -------------------------------------
 @router.post("/{run_id}/log_metric")
-def log_metric_route(run_id: str, key: str, value: float):
-    response = log_metric(run_id, key, value)
+async def log_metric_route(run_id: str, key: str, value: float):
+    response = await log_metric(run_id, key, value)
     if "error" in response:
         raise HTTPException(status_code=500, detail=response["error"])
     return response
@@ -98,29 +224,134 @@ def log_metric_route(run_id: str, key: str, value: float):
 # 📌 Log Parameter to Run
 # -------------------------------------
 @router.post("/{run_id}/log_param")
-def log_param_route(run_id: str, key: str, value: str):
-    response = log_param(run_id, key, value)
+async def log_param_route(run_id: str, key: str, value: str):
+    response = await log_param(run_id, key, value)
     if "error" in response:
         raise HTTPException(status_code=500, detail=response["error"])
     return response
 
+# -------------------------------------
+# 📌 Log a Batch of Metrics/Params/Tags to Run
+# -------------------------------------
+@router.post("/{run_id}/log_batch")
+async def log_batch_route(run_id: str, batch: RunBatch):
+    """Log many metrics (with step and timestamp), params and tags in one request."""
+    batch = batch.model_dump()
+    response = await log_batch(run_id, batch["metrics"], batch["params"], batch["tags"])
+    if "error" in response:
+        raise HTTPException(status_code=500, detail=response["error"])
+    return response
+
+# -------------------------------------
+# 📌 Log Batches to Several Runs
+# -------------------------------------
+@router.post("/log_batch")
+async def log_batches_route(batch: MultiRunBatch):
+    """Log batches for several runs; failures are reported per item instead of failing the request."""
+    return await log_batches(batch.model_dump()["items"])
+
+# -------------------------------------
+# 📌 Downsampled Metric History
+# -------------------------------------
+@router.get("/{run_id}/metrics/{key:path}/history")
+async def metric_history_route(run_id: str, key: str, max_points: int = Query(1000, ge=3, le=20000), method: str = "lttb"):
+    """Fetch a metric's step history, downsampled server-side to at most max_points points."""
+    if method not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {', '.join(DOWNSAMPLE_METHODS)}")
+    history = await get_metric_history(run_id, key, max_points, method)
+    if isinstance(history, dict) and "error" in history:
+        raise HTTPException(status_code=500, detail=history["error"])
+    return history
+
 # -------------------------------------
 # 📌 List Artifacts of a Run
 # -------------------------------------
 @router.get("/artifacts/{run_id}")
-def list_artifacts_route(run_id: str):
-    """List artifacts for a given run."""
-    artifacts = list_artifacts(run_id)
-    if isinstance(artifacts, dict) and "error" in artifacts:
-        raise HTTPException(status_code=500, detail=artifacts["error"])
-    return {"artifacts": artifacts}
+async def list_artifacts_route(
+    run_id: str,
+    path: str = None,
+    recursive: bool = False,
+    max_depth: int = Query(ARTIFACT_TREE_MAX_DEPTH, ge=1, le=ARTIFACT_TREE_MAX_DEPTH),
+    max_entries: int = Query(ARTIFACT_TREE_MAX_ENTRIES, ge=1, le=ARTIFACT_TREE_MAX_ENTRIES),
+):
+    """List artifacts for a given run.
+
+    With ``recursive=true`` the whole tree below ``path`` is walked server-side
+    and streamed as NDJSON: one ``{"path", "is_dir", "file_size", "depth"}``
+    line per entry in discovery order, then a ``{"summary": ...}`` line with
+    file/dir counts, ``total_bytes`` and whether ``max_depth``/``max_entries``
+    truncated the walk.
+    """
+    if not recursive:
+        artifacts = await list_artifacts(run_id, path)
+        if isinstance(artifacts, dict) and "error" in artifacts:
+            raise HTTPException(status_code=500, detail=artifacts["error"])
+        return {"artifacts": artifacts}
+    entries = walk_artifacts(run_id, path, max_depth=max_depth, max_entries=max_entries)
+    try:
+        first = await anext(entries)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(_ndjson_lines([first], entries), media_type="application/x-ndjson")
 
 # -------------------------------------
 # NEW: Log Artifact to Run
 # -------------------------------------
 @router.post("/{run_id}/log_artifact")
-def log_artifact_route(run_id: str, file_path: str, artifact_path: str = None):
-    response = log_artifact(run_id, file_path, artifact_path)
+async def log_artifact_route(run_id: str, file_path: str, artifact_path: str = None):
+    response = await log_artifact(run_id, file_path, artifact_path)
     if "error" in response:
          raise HTTPException(status_code=500, detail=response["error"])
     return response
+
+# -------------------------------------
+# 📌 Upload Artifacts (streaming multipart)
+# -------------------------------------
+@router.post("/{run_id}/artifacts")
+async def upload_artifacts_route(request: Request, run_id: str, artifact_path: str = None,
+                                 checksum: bool = False, sha256: str = None):
+    """Log the files of a multipart/form-data upload to a run.
+
+    The body is streamed to a temporary spool directory (never held in memory
+    as a whole) and removed after MLflow has stored it. With ``checksum=true``
+    the SHA-256 of each file is returned; passing ``sha256`` (single-file
+    uploads) also rejects the upload if the received bytes do not match.
+    """
+    spool_dir = make_spool_dir()
+    try:
+        try:
+            files = await spool_multipart(
+                request.headers.get("content-type"), request.stream(), spool_dir, checksum=checksum or bool(sha256)
+            )
+        except UploadError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if sha256:
+            if len(files) != 1:
+                raise HTTPException(status_code=400, detail="sha256 can only be checked for single-file uploads")
+            if files[0]["sha256"] != sha256.lower():
+                raise HTTPException(status_code=400, detail=f"Checksum mismatch for '{files[0]['filename']}'")
+        response = await log_artifacts(run_id, spool_dir, artifact_path)
+        if "error" in response:
+            raise HTTPException(status_code=500, detail=response["error"])
+        return {"run_id": run_id, "artifact_path": artifact_path, "files": files}
+    finally:
+        await remove_spool_dir(spool_dir)
+
+# -------------------------------------
+# 📌 Download an Artifact (Range aware)
+# -------------------------------------
+@router.get("/{run_id}/artifacts/{path:path}")
+async def download_artifact_route(run_id: str, path: str):
+    """Serve an artifact file of a run from the local artifact cache.
+
+    Range requests are answered with 206 Partial Content (If-Range is checked
+    against the ETag/Last-Modified of the cached copy), so large files can be
+    fetched resumably or in parallel parts.
+    """
+    local_path = await open_artifact(run_id, path)
+    if isinstance(local_path, dict) and "error" in local_path:
+        raise HTTPException(status_code=404, detail=local_path["error"])
+    return ReleasingFileResponse(
+        local_path, lambda: release_artifact(local_path), filename=os.path.basename(path),
+        media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+    )
@@ -0,0 +1,65 @@
+from fastapi import APIRouter
+from backend.database import get_pool_stats
+from backend.mlflow_api import get_cache_stats, get_ingest_stats
+from backend.gateway import inference_gateway
+from backend.log_stream import log_hub
+from backend.model_cache import model_cache
+from backend.reconciler import deployment_reconciler
+
+router = APIRouter()
+
+# -------------------------------------
+# 📌 Cache Statistics
+# -------------------------------------
+@router.get("/cache")
+def cache_stats():
+    """Hit/miss/eviction counters of the in-process MLflow caches."""
+    return get_cache_stats()
+
+# -------------------------------------
+# 📌 Deployment Model Cache Statistics
+# -------------------------------------
+@router.get("/model_cache")
+def model_cache_stats():
+    """Hit rate, bytes saved and disk usage of the deployment model cache."""
+    return model_cache.stats()
+
+# -------------------------------------
+# 📌 Inference Gateway Statistics
+# -------------------------------------
+@router.get("/gateway")
+def gateway_stats():
+    """Requests, upstream calls and batched rows of the /predict gateway."""
+    return inference_gateway.stats()
+
+# -------------------------------------
+# 📌 Deployment Reconciler Statistics
+# -------------------------------------
+@router.get("/reconciler")
+def reconciler_stats():
+    """Passes, status changes and timing of the deployment state reconciler."""
+    return deployment_reconciler.stats()
+
+# -------------------------------------
+# 📌 Log Stream Statistics
+# -------------------------------------
+@router.get("/log_streams")
+def log_stream_stats():
+    """Followed containers and connected viewers of the live log streams."""
+    return log_hub.stats()
+
+# -------------------------------------
+# 📌 Database Pool Statistics
+# -------------------------------------
+@router.get("/db_pool")
+def db_pool_stats():
+    """Utilisation of the MySQL connection pool."""
+    return get_pool_stats()
+
+# -------------------------------------
+# 📌 Metric Ingestion Statistics
+# -------------------------------------
+@router.get("/ingest")
+def ingest_stats():
+    """Queue depth, flush lag and retry counters of write-behind metric ingestion."""
+    return get_ingest_stats()
@@ -0,0 +1,336 @@
+import asyncio
+import http.client
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from urllib.parse import quote, urlencode
+
+import aiohttp
+
+from backend.metrics import Instrumented
+
+logger = logging.getLogger(__name__)
+
+# How deployment containers are run: "docker-api" talks to the Docker Engine
+# over its unix socket, "cli" runs the docker CLI (one process per call)
+DEPLOY_RUNTIME = os.getenv("DEPLOY_RUNTIME", "docker-api")
+DOCKER_SOCKET = os.getenv("DOCKER_SOCKET", "/var/run/docker.sock")
+DOCKER_BIN = os.getenv("DOCKER_BIN", "docker")
+DOCKER_TIMEOUT = float(os.getenv("DOCKER_TIMEOUT", "30"))
+# Seconds a container gets to shut down before it is killed
+DOCKER_STOP_TIMEOUT = int(os.getenv("DOCKER_STOP_TIMEOUT", "10"))
+# Idle Engine API connections kept open for reuse
+DOCKER_MAX_IDLE_CONNECTIONS = int(os.getenv("DOCKER_MAX_IDLE_CONNECTIONS", "4"))
+
+
+class ContainerError(Exception):
+    """The container runtime failed to carry out an operation"""
+
+
+class ContainerNotFound(ContainerError):
+    """No container with the given name exists"""
+
+
+class ContainerRuntime(ABC):
+    """Operations the deployments need from a container runtime.
+
+    Containers are addressed by name. ``run`` starts a detached container that
+    is removed once it exits, publishing ``ports`` ({container port: host
+    port}) and mounting ``volumes`` ({host path: container path}) read-only.
+    """
+
+    @abstractmethod
+    def run(self, name, image, args, ports, volumes):
+        """Start a container"""
+
+    @abstractmethod
+    def stop(self, name):
+        """Stop a container (raises ContainerNotFound if there is none of that name)"""
+
+    @abstractmethod
+    def logs(self, name, tail=50):
+        """Last ``tail`` lines of stdout and stderr as one string"""
+
+    @abstractmethod
+    def follow_logs(self, name, tail=50):
+        """Async iterator over lists of new log lines, starting with the last ``tail`` lines, until the container exits"""
+
+    @abstractmethod
+    def list_containers(self, prefix):
+        """{name: state} of all containers whose name starts with ``prefix``"""
+
+    def close(self):
+        pass
+
+
+class CliRuntime(ContainerRuntime):
+    """Runs the docker CLI with an argument list (never through a shell)"""
+
+    def __init__(self, docker_bin=DOCKER_BIN, timeout=DOCKER_TIMEOUT):
+        self.docker_bin = docker_bin
+        self.timeout = timeout
+
+    def _docker(self, *args):
+        try:
+            result = subprocess.run([self.docker_bin, *args], capture_output=True, text=True, timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise ContainerError(f"docker {args[0]} failed: {e}") from e
+        if result.returncode != 0:
+            message = result.stderr.strip() or f"docker {args[0]} exited with {result.returncode}"
+            if "No such container" in message:
+                raise ContainerNotFound(message)
+            raise ContainerError(message)
+        return result
+
+    def run(self, name, image, args, ports, volumes):
+        options = ["-d", "--rm", "--name", name]
+        for container_port, host_port in ports.items():
+            options += ["-p", f"{host_port}:{container_port}"]
+        for host_path, container_path in volumes.items():
+            options += ["-v", f"{host_path}:{container_path}:ro"]
+        self._docker("run", *options, image, *args)
+
+    def stop(self, name):
+        self._docker("stop", "-t", str(DOCKER_STOP_TIMEOUT), name)
+
+    def logs(self, name, tail=50):
+        # The CLI passes the container's stderr through as its own
+        result = self._docker("logs", "--tail", str(tail), name)
+        return result.stdout + result.stderr
+
+    async def follow_logs(self, name, tail=50):
+        process = await asyncio.create_subprocess_exec(
+            self.docker_bin, "logs", "--follow", "--tail", str(tail), name,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
+        try:
+            while line := await process.stdout.readline():
+                yield [line.decode(errors="replace").rstrip("\n")]
+            if await process.wait() != 0:
+                raise ContainerError(f"docker logs --follow {name} exited with {process.returncode}")
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+    def list_containers(self, prefix):
+        output = self._docker("ps", "-a", "--filter", f"name=^{prefix}", "--format", "{{.Names}}\t{{.State}}").stdout
+        containers = {}
+        for line in output.splitlines():
+            name, _, state = line.partition("\t")
+            if name:
+                containers[name] = state.strip()
+        return containers
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+def _is_multiplexed(header):
+    return len(header) == 8 and header[0] in (0, 1, 2) and header[1:4] == b"\0\0\0"
+
+
+def demux_logs(data):
+    """Payload of Docker's multiplexed log stream (8-byte frame headers) as text"""
+    if not _is_multiplexed(data[:8]):
+        # Containers with a TTY send the raw stream
+        return data.decode(errors="replace")
+    chunks = []
+    offset = 0
+    while offset + 8 <= len(data):
+        size, = struct.unpack(">I", data[offset + 4:offset + 8])
+        chunks.append(data[offset + 8:offset + 8 + size])
+        offset += 8 + size
+    return b"".join(chunks).decode(errors="replace")
+
+
+class DockerEngineRuntime(ContainerRuntime):
+    """Talks to the Docker Engine HTTP API over its unix socket.
+
+    Requests reuse keep-alive connections from a small pool, so an operation
+    costs one round trip to the daemon instead of starting a CLI process. In
+    steady state a single persistent connection serves every call; concurrent
+    callers (deployment jobs, the reconciler, API requests) each get their own.
+    """
+
+    def __init__(self, socket_path=DOCKER_SOCKET, timeout=DOCKER_TIMEOUT,
+                 max_idle_connections=DOCKER_MAX_IDLE_CONNECTIONS):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=max_idle_connections)
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def _connection(self):
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            with self._lock:
+                self.connections_opened += 1
+            return _UnixHTTPConnection(self.socket_path, self.timeout + DOCKER_STOP_TIMEOUT), False
+
+    def _request(self, method, path, params=None, body=None):
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        while True:
+            conn, reused = self._connection()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+                conn.close()
+                if reused:
+                    # The daemon closed the idle connection: retry on a fresh one
+                    continue
+                raise ContainerError(f"Docker API request {method} {path} failed: {e}") from e
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise ContainerError(f"Docker API request {method} {path} failed: {e}") from e
+            if response.will_close:
+                conn.close()
+            else:
+                try:
+                    self._idle.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+            break
+        if response.status == 404:
+            raise ContainerNotFound(self._message(data))
+        if response.status >= 400:
+            raise ContainerError(f"Docker API {method} {path} failed with {response.status}: {self._message(data)}")
+        return response.status, data
+
+    @staticmethod
+    def _message(data):
+        try:
+            return json.loads(data)["message"]
+        except (ValueError, KeyError, TypeError):
+            return data.decode(errors="replace")
+
+    def run(self, name, image, args, ports, volumes):
+        spec = {
+            "Image": image,
+            "Cmd": list(args),
+            "ExposedPorts": {f"{port}/tcp": {} for port in ports},
+            "HostConfig": {
+                "AutoRemove": True,
+                "PortBindings": {f"{port}/tcp": [{"HostPort": str(host)}] for port, host in ports.items()},
+                "Binds": [f"{host}:{path}:ro" for host, path in volumes.items()],
+            },
+        }
+        try:
+            _, data = self._request("POST", "/containers/create", {"name": name}, spec)
+        except ContainerNotFound as e:
+            # On create a 404 is about the image, not the container
+            raise ContainerError(f"Image {image} not found: {e}") from e
+        container_id = json.loads(data)["Id"]
+        try:
+            self._request("POST", f"/containers/{container_id}/start")
+        except ContainerError:
+            # Do not leave a created but never started container holding the name
+            try:
+                self._request("DELETE", f"/containers/{container_id}", {"force": "1"})
+            except ContainerError:
+                logger.warning("Could not remove container %s after a failed start", name)
+            raise
+
+    def stop(self, name):
+        # 304 means it was already stopped
+        self._request("POST", f"/containers/{quote(name)}/stop", {"t": DOCKER_STOP_TIMEOUT})
+
+    def logs(self, name, tail=50):
+        _, data = self._request("GET", f"/containers/{quote(name)}/logs", {"stdout": 1, "stderr": 1, "tail": tail})
+        return demux_logs(data)
+
+    async def follow_logs(self, name, tail=50):
+        # A long-lived streaming response gets its own connection, outside the pool
+        connector = aiohttp.UnixConnector(path=self.socket_path)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout)
+        params = {"follow": 1, "stdout": 1, "stderr": 1, "tail": tail}
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as http:
+            async with http.get(f"http://docker/containers/{quote(name)}/logs", params=params) as response:
+                if response.status >= 400:
+                    message = self._message(await response.read())
+                    if response.status == 404:
+                        raise ContainerNotFound(message)
+                    raise ContainerError(f"Docker API log stream of {name} failed with {response.status}: {message}")
+                stream = response.content
+                try:
+                    head = await stream.readexactly(8)
+                except asyncio.IncompleteReadError as e:
+                    head = e.partial
+                # Containers with a TTY send the raw stream without frame headers
+                multiplexed = _is_multiplexed(head)
+                pending = b"" if multiplexed else head
+                while True:
+                    if multiplexed:
+                        size, = struct.unpack(">I", head[4:8])
+                        pending += await stream.readexactly(size)
+                    else:
+                        chunk = await stream.readany()
+                        if not chunk:
+                            break
+                        pending += chunk
+                    *lines, pending = pending.split(b"\n")
+                    if lines:
+                        yield [line.decode(errors="replace") for line in lines]
+                    if multiplexed:
+                        try:
+                            head = await stream.readexactly(8)
+                        except asyncio.IncompleteReadError:
+                            break
+                if pending:
+                    yield [pending.decode(errors="replace")]
+
+    def list_containers(self, prefix):
+        _, data = self._request(
+            "GET", "/containers/json", {"all": 1, "filters": json.dumps({"name": [f"^/?{prefix}"]})}
+        )
+        containers = {}
+        for container in json.loads(data):
+            for name in container.get("Names", ()):
+                name = name.lstrip("/")
+                if name.startswith(prefix):
+                    containers[name] = container.get("State", "")
+        return containers
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def make_runtime(kind=DEPLOY_RUNTIME):
+    if kind == "docker-api":
+        return DockerEngineRuntime()
+    if kind == "cli":
+        return CliRuntime()
+    raise ValueError(f"Unknown DEPLOY_RUNTIME {kind!r} (expected 'docker-api' or 'cli')")
+
+
+# Operations (CLI subprocesses or Engine API requests) are timed at /metrics
+container_runtime = Instrumented(make_runtime(), "docker")
@@ -0,0 +1,243 @@
+from dataclasses import dataclass, fields as dataclass_fields
+from typing import List, Optional, Tuple, Union
+
+import orjson
+
+# Compact views of the MLflow entities returned by the API. They are slotted
+# dataclasses so building thousands of them is cheap, and orjson serialises
+# them natively without going through an intermediate dict.
+
+
+@dataclass(slots=True)
+class RunInfoView:
+    run_id: str
+    run_name: Optional[str]
+    experiment_id: str
+    status: str
+    start_time: Optional[int]
+    end_time: Optional[int]
+    artifact_uri: Optional[str]
+    lifecycle_stage: str
+
+
+@dataclass(slots=True)
+class RunDataView:
+    metrics: List[dict]
+    params: List[dict]
+    tags: List[dict]
+
+
+@dataclass(slots=True)
+class RunView:
+    info: RunInfoView
+    data: RunDataView
+
+
+@dataclass(slots=True)
+class ModelVersionView:
+    name: str
+    version: str
+    creation_timestamp: Optional[int]
+    last_updated_timestamp: Optional[int]
+    current_stage: Optional[str]
+    description: Optional[str]
+    source: Optional[str]
+    run_id: Optional[str]
+    status: Optional[str]
+    status_message: Optional[str]
+
+
+@dataclass(slots=True)
+class ModelVersionDetailView(ModelVersionView):
+    tags: List[dict]
+
+
+@dataclass(slots=True)
+class RegisteredModelView:
+    name: str
+    creation_timestamp: Optional[int]
+    last_updated_timestamp: Optional[int]
+    description: Optional[str]
+    latest_versions: List[ModelVersionView]
+
+
+@dataclass(slots=True)
+class RegisteredModelDetailView(RegisteredModelView):
+    tags: List[dict]
+
+
+def _key_values(mapping):
+    return [{"key": k, "value": v} for k, v in mapping.items()]
+
+
+def run_to_view(run):
+    info = run.info
+    data = run.data
+    return RunView(
+        RunInfoView(
+            info.run_id, info.run_name, info.experiment_id, info.status, info.start_time, info.end_time,
+            info.artifact_uri, info.lifecycle_stage,
+        ),
+        RunDataView(_key_values(data.metrics), _key_values(data.params), _key_values(data.tags)),
+    )
+
+
+def _model_version_fields(mv):
+    return (
+        mv.name, str(mv.version), mv.creation_timestamp, mv.last_updated_timestamp, mv.current_stage,
+        mv.description, mv.source, mv.run_id, mv.status, mv.status_message,
+    )
+
+
+def model_version_to_view(mv, with_tags=False):
+    if with_tags:
+        # MLflow exposes entity tags as a {key: value} dict, not a list of tag objects
+        return ModelVersionDetailView(*_model_version_fields(mv), _key_values(mv.tags or {}))
+    return ModelVersionView(*_model_version_fields(mv))
+
+
+def registered_model_to_view(model, with_tags=False):
+    fields = (
+        model.name, model.creation_timestamp, model.last_updated_timestamp, model.description,
+        [ModelVersionView(*_model_version_fields(mv)) for mv in (model.latest_versions or [])],
+    )
+    if with_tags:
+        return RegisteredModelDetailView(*fields, _key_values(model.tags or {}))
+    return RegisteredModelView(*fields)
+
+
+# -------------------------------------
+# Field projection (``fields=`` query parameter)
+# -------------------------------------
+# A projection section is None (not requested), ALL, or a tuple of names in request order
+ALL = "*"
+
+RUN_INFO_FIELDS = tuple(f.name for f in dataclass_fields(RunInfoView))
+MODEL_VERSION_FIELDS = tuple(f.name for f in dataclass_fields(ModelVersionView))
+REGISTERED_MODEL_FIELDS = tuple(f.name for f in dataclass_fields(RegisteredModelView))
+EXPERIMENT_FIELDS = ("id", "name", "lifecycle_stage")
+
+Selection = Union[None, str, Tuple[str, ...]]
+
+
+@dataclass(slots=True, frozen=True)
+class RunProjection:
+    info: Selection = None
+    metrics: Selection = None
+    params: Selection = None
+    tags: Selection = None
+
+
+@dataclass(slots=True, frozen=True)
+class ModelProjection:
+    fields: Tuple[str, ...] = ()
+    latest_versions: Selection = None
+
+
+def _parse(fields, sections):
+    """Split ``a.b,c`` into {section: ALL | tuple of sub-names}, rejecting unknown sections"""
+    selected = {}
+    for item in fields.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        section, _, key = item.partition(".")
+        if section not in sections:
+            raise ValueError(f"Unknown field '{item}'")
+        current = selected.get(section)
+        if not key:
+            selected[section] = ALL
+        elif current is not ALL:
+            selected[section] = tuple(dict.fromkeys((current or ()) + (key,)))
+    return selected
+
+
+def _check(selection, allowed, section):
+    if isinstance(selection, tuple):
+        unknown = [name for name in selection if name not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown field '{section}.{unknown[0]}'")
+
+
+def parse_run_fields(fields):
+    """Parse e.g. ``info.run_id,metrics.accuracy,params.lr``; ``data.`` prefixes are accepted too"""
+    fields = ",".join(item.strip().removeprefix("data.") for item in fields.split(","))
+    selected = _parse(fields, ("info", "metrics", "params", "tags"))
+    _check(selected.get("info"), RUN_INFO_FIELDS, "info")
+    return RunProjection(**selected)
+
+
+def parse_model_fields(fields):
+    """Parse e.g. ``name,latest_versions.version,latest_versions.current_stage``"""
+    selected = _parse(fields, REGISTERED_MODEL_FIELDS)
+    versions = selected.pop("latest_versions", None)
+    _check(versions, MODEL_VERSION_FIELDS, "latest_versions")
+    _require_whole(selected)
+    return ModelProjection(tuple(selected), versions)
+
+
+def parse_experiment_fields(fields):
+    selected = _parse(fields, EXPERIMENT_FIELDS)
+    _require_whole(selected)
+    return tuple(selected)
+
+
+def _require_whole(selected):
+    for section, selection in selected.items():
+        if selection is not ALL:
+            raise ValueError(f"Field '{section}' has no sub-fields")
+
+
+def _select(mapping, keys):
+    if keys is ALL:
+        return _key_values(mapping)
+    return [{"key": k, "value": mapping[k]} for k in keys if k in mapping]
+
+
+def project_run(run, projection):
+    """Build only the requested parts of a run straight from the MLflow entity"""
+    result = {}
+    if projection.info is not None:
+        info = run.info
+        names = RUN_INFO_FIELDS if projection.info is ALL else projection.info
+        result["info"] = {name: getattr(info, name) for name in names}
+    data = {}
+    if projection.metrics is not None:
+        data["metrics"] = _select(run.data.metrics, projection.metrics)
+    if projection.params is not None:
+        data["params"] = _select(run.data.params, projection.params)
+    if projection.tags is not None:
+        data["tags"] = _select(run.data.tags, projection.tags)
+    if data:
+        result["data"] = data
+    return result
+
+
+def run_converter(projection=None):
+    """Return the function that turns a Run entity into its API representation"""
+    if projection is None:
+        return run_to_view
+    return lambda run: project_run(run, projection)
+
+
+def project_registered_model(model, projection):
+    """Project a registered-model view (or entity) onto the requested fields"""
+    result = {name: getattr(model, name) for name in projection.fields}
+    if projection.latest_versions is not None:
+        names = MODEL_VERSION_FIELDS if projection.latest_versions is ALL else projection.latest_versions
+        result["latest_versions"] = [
+            {name: getattr(mv, name) for name in names} for mv in (model.latest_versions or [])
+        ]
+    return result
+
+
+def project_experiment(experiment, names):
+    return {name: experiment[name] for name in names}
+
+
+def dumps(content):
+    """Serialise API payloads (dicts, lists and the views above) to JSON bytes.
+
+    NaN and infinite metric values become null instead of failing the response.
+    """
+    return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
@@ -0,0 +1,204 @@
+"""Stand-ins for Docker used by the deployment runtime benchmarks.
+
+``FakeDockerDaemon`` serves the subset of the Docker Engine HTTP API that
+``backend.runtime.DockerEngineRuntime`` uses on a unix socket, keeping
+containers in memory. ``make_fake_cli`` writes an executable that answers the
+docker CLI commands of ``backend.runtime.CliRuntime`` from a JSON state file.
+Neither starts real containers.
+"""
+import json
+import os
+import socketserver
+import stat
+import struct
+import sys
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, unquote, urlparse
+
+LOG_LINES = [f"log line {i}" for i in range(50)]
+
+
+def _frames(lines):
+    return b"".join(struct.pack(">BxxxI", 1, len(line) + 1) + line.encode() + b"\n" for line in lines)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def address_string(self):
+        return "fake-docker"
+
+    def _reply(self, status, body=b"", content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _container(self, ref):
+        containers = self.server.containers
+        ref = unquote(ref)
+        if ref in containers:
+            return ref
+        return next((name for name, c in containers.items() if c["Id"] == ref), None)
+
+    def _route(self, method):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = url.path.strip("/").split("/")
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        containers = self.server.containers
+        with self.server.lock:
+            self.server.requests += 1
+            if method == "POST" and parts == ["containers", "create"]:
+                name = query["name"][0]
+                if name in containers:
+                    return self._reply(409, {"message": f"Conflict. The container name {name} is already in use"})
+                containers[name] = {"Id": uuid.uuid4().hex, "State": "created", "Spec": body}
+                return self._reply(201, {"Id": containers[name]["Id"], "Warnings": []})
+            if method == "GET" and parts == ["containers", "json"]:
+                return self._reply(200, [{"Id": c["Id"], "Names": [f"/{name}"], "State": c["State"]}
+                                         for name, c in containers.items()])
+            name = self._container(parts[1]) if len(parts) >= 2 and parts[0] == "containers" else None
+            if name is None:
+                return self._reply(404, {"message": f"No such container: {parts[-1]}"})
+            action = parts[2] if len(parts) > 2 else None
+            if method == "POST" and action == "start":
+                containers[name]["State"] = "running"
+                return self._reply(204)
+            if method == "POST" and action == "stop" or method == "DELETE" and action is None:
+                # Stopped containers were started with AutoRemove
+                self.server.remove(name)
+                return self._reply(204)
+            if method == "GET" and action == "logs":
+                logs = containers[name].setdefault("Logs", list(LOG_LINES))
+                tail = int(query.get("tail", ["50"])[0])
+                backlog = logs[-tail:] if tail else []
+                if query.get("follow") != ["1"]:
+                    return self._reply(200, _frames(backlog), "application/vnd.docker.multiplexed-stream")
+        if method == "GET" and action == "logs":
+            return self._follow(name, backlog, len(logs))
+        return self._reply(404, {"message": "page not found"})
+
+    def _follow(self, name, backlog, sent):
+        """Stream the log until the container is removed, like ``follow=1``"""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.docker.multiplexed-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.server.followers += 1
+        try:
+            lines = backlog
+            while True:
+                if lines:
+                    data = _frames(lines)
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                with self.server.changed:
+                    self.server.changed.wait_for(
+                        lambda: name not in self.server.containers or len(self.server.containers[name]["Logs"]) > sent
+                    )
+                    if name not in self.server.containers:
+                        break
+                    logs = self.server.containers[name]["Logs"]
+                    lines, sent = logs[sent:], len(logs)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.server.followers -= 1
+        self.close_connection = True
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+
+class FakeDockerDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path):
+        super().__init__(socket_path, _Handler)
+        self.containers = {}
+        self.lock = threading.RLock()
+        self.changed = threading.Condition(self.lock)
+        self.connections = 0
+        self.requests = 0
+        self.followers = 0
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+    def emit(self, name, *lines):
+        """Append lines to a container's log, waking its followers"""
+        with self.changed:
+            self.containers[name].setdefault("Logs", list(LOG_LINES)).extend(lines)
+            self.changed.notify_all()
+
+    def remove(self, name):
+        with self.changed:
+            del self.containers[name]
+            self.changed.notify_all()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        with self.changed:
+            self.containers.clear()
+            self.changed.notify_all()
+        self.shutdown()
+        self.server_close()
+
+
+FAKE_CLI = '''#!{python}
+import json, sys
+state_file = {state_file!r}
+containers = json.load(open(state_file))
+command, args = sys.argv[1], sys.argv[2:]
+if command == "run":
+    containers[args[args.index("--name") + 1]] = "running"
+elif command == "stop":
+    if containers.pop(args[-1], None) is None:
+        sys.exit(f"Error response from daemon: No such container: {{args[-1]}}")
+elif command == "logs":
+    if args[-1] not in containers:
+        sys.exit(f"Error response from daemon: No such container: {{args[-1]}}")
+    print("\\n".join(f"log line {{i}}" for i in range(50)))
+elif command == "inspect":
+    if args[-1] not in containers:
+        sys.exit(f"Error: No such object: {{args[-1]}}")
+    print(containers[args[-1]])
+elif command == "ps":
+    for name, state in containers.items():
+        print(f"{{name}}\\t{{state}}")
+json.dump(containers, open(state_file, "w"))
+'''
+
+
+def make_fake_cli(directory, containers=None):
+    """Path of an executable fake docker CLI whose containers are ``containers`` ({name: state})"""
+    state_file = os.path.join(directory, "containers.json")
+    with open(state_file, "w") as fh:
+        json.dump(containers or {}, fh)
+    path = os.path.join(directory, "docker")
+    with open(path, "w") as fh:
+        fh.write(FAKE_CLI.format(python=sys.executable, state_file=state_file))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
@@ -0,0 +1,135 @@
+"""In-memory stand-ins for the MLflow tracking server used by the benchmarks.
+
+The fake client answers the subset of ``MlflowClient`` that ``backend.mlflow_api``
+uses, sleeping ``latency`` seconds per call to model the network round trip,
+and counts every call so benchmarks can report round trips per operation.
+``AsyncFakeMlflowClient`` exposes the same fake through the awaitable
+interface of ``backend.mlflow_rest.AsyncMlflowClient``.
+"""
+import asyncio
+import time
+from collections import Counter
+
+from mlflow.entities import (
+    Experiment, LifecycleStage, Metric, Param, Run, RunData, RunInfo, RunStatus, RunTag
+)
+from mlflow.store.entities.paged_list import PagedList
+
+
+def make_run(experiment_id, index, n_metrics=5, n_params=5):
+    run_id = f"{experiment_id}-{index:06d}"
+    info = RunInfo(
+        run_id=run_id, experiment_id=str(experiment_id), user_id="bench",
+        status=RunStatus.to_string(RunStatus.FINISHED), start_time=1_700_000_000_000 - index,
+        end_time=1_700_000_000_500, lifecycle_stage=LifecycleStage.ACTIVE,
+        artifact_uri=f"mlflow-artifacts:/{experiment_id}/{run_id}/artifacts", run_name=f"run-{index}",
+    )
+    data = RunData(
+        metrics=[Metric(f"metric_{m}", index * 0.001 + m, 1_700_000_000_000, 0) for m in range(n_metrics)],
+        params=[Param(f"param_{p}", str(p)) for p in range(n_params)],
+        tags=[RunTag("mlflow.user", "bench")],
+    )
+    return Run(info, data)
+
+
+class FakeMlflowClient:
+    def __init__(self, n_experiments=10, runs_per_experiment=5, latency=0.005, page_size=1000, per_item_cost=0.0):
+        self.latency = latency
+        # Extra seconds per entity returned by listing calls, to model payload size
+        self.per_item_cost = per_item_cost
+        self.page_size = page_size
+        self.calls = Counter()
+        # When not None, delays are accumulated here instead of slept (see AsyncFakeMlflowClient)
+        self.deferred_delay = None
+        self.experiments = [
+            Experiment(str(i), f"exp-{i}", f"/tmp/{i}", LifecycleStage.ACTIVE) for i in range(n_experiments)
+        ]
+        self.runs = {
+            exp.experiment_id: [make_run(exp.experiment_id, r) for r in range(runs_per_experiment)]
+            for exp in self.experiments
+        }
+
+    def _call(self, name, items=0):
+        self.calls[name] += 1
+        delay = self.latency + self.per_item_cost * items
+        if self.deferred_delay is not None:
+            self.deferred_delay += delay
+        elif delay:
+            time.sleep(delay)
+
+    def search_experiments(self, view_type=None, max_results=None, filter_string=None, order_by=None, page_token=None):
+        start = int(page_token or 0)
+        end = start + (max_results or self.page_size)
+        page = self.experiments[start:end]
+        self._call("search_experiments", len(page))
+        return PagedList(page, str(end) if end < len(self.experiments) else None)
+
+    def get_experiment(self, experiment_id):
+        self._call("get_experiment")
+        for exp in self.experiments:
+            if exp.experiment_id == str(experiment_id):
+                return exp
+        raise Exception(f"Experiment '{experiment_id}' does not exist.")
+
+    def search_runs(self, experiment_ids, filter_string="", run_view_type=None, max_results=None,
+                    order_by=None, page_token=None):
+        self._call("search_runs")
+        matched = [run for eid in experiment_ids for run in self.runs.get(str(eid), [])]
+        matched.sort(key=lambda run: (-run.info.start_time, run.info.run_id))
+        start = int(page_token or 0)
+        size = max_results or self.page_size
+        end = start + size
+        return PagedList(matched[start:end], str(end) if end < len(matched) else None)
+
+    def create_run(self, experiment_id, run_name=None, start_time=None, tags=None):
+        self._call("create_run")
+        run = make_run(experiment_id, len(self.runs.get(experiment_id, [])), n_metrics=0, n_params=0)
+        run.info._status = RunStatus.to_string(RunStatus.RUNNING)
+        run.info._end_time = None
+        self.runs.setdefault(experiment_id, []).append(run)
+        return run
+
+    def _find_run(self, run_id):
+        for runs in self.runs.values():
+            for run in runs:
+                if run.info.run_id == run_id:
+                    return run
+        raise Exception(f"Run '{run_id}' not found")
+
+    def log_param(self, run_id, key, value):
+        self._call("log_param")
+        self._find_run(run_id).data._add_param(Param(key, value))
+
+    def set_terminated(self, run_id, status=None, end_time=None):
+        self._call("set_terminated")
+        run = self._find_run(run_id)
+        run.info._status = status or RunStatus.to_string(RunStatus.FINISHED)
+        run.info._end_time = end_time or int(time.time() * 1000)
+
+    def get_run(self, run_id):
+        self._call("get_run")
+        return self._find_run(run_id)
+
+
+class AsyncFakeMlflowClient:
+    """Awaitable facade over a FakeMlflowClient that waits on the event loop instead of blocking"""
+
+    def __init__(self, fake):
+        self.fake = fake
+
+    def __getattr__(self, name):
+        method = getattr(self.fake, name)
+
+        async def call(*args, **kwargs):
+            self.fake.deferred_delay = 0.0
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                delay, self.fake.deferred_delay = self.fake.deferred_delay, None
+            if delay:
+                await asyncio.sleep(delay)
+            return result
+        return call
+
+    async def aclose(self):
+        pass
@@ -0,0 +1,97 @@
+"""Time to download a large artifact through GET /runs/{run_id}/artifacts/{path}.
+
+The artifact store is simulated by a fake client whose download_artifacts
+copies a local file at STORE_MBPS. The first request fills the on-disk cache
+(every download used to go to the store); later requests, including one split
+into parallel Range requests, are served from the cache. The API runs under
+uvicorn in a background thread and is called over HTTP with aiohttp.
+
+    python -m benchmarks.bench_artifact_download
+"""
+import asyncio
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+import aiohttp
+import uvicorn
+
+from backend import mlflow_api
+from backend.artifacts import ArtifactCache
+from backend.main import app
+
+SIZE_MB = 256
+STORE_MBPS = 200
+RANGE_PARTS = 4
+
+
+class ThrottledArtifactStore:
+    def __init__(self, source):
+        self.source = source
+        self.downloads = 0
+
+    def download_artifacts(self, run_id, path, dst_path):
+        self.downloads += 1
+        time.sleep(os.path.getsize(self.source) / (STORE_MBPS * 2**20))
+        target = os.path.join(dst_path, os.path.basename(path))
+        shutil.copyfile(self.source, target)
+        return target
+
+
+def start_api():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+async def fetch(http, url, headers=None):
+    async with http.get(url, headers=headers) as response:
+        size = 0
+        async for chunk in response.content.iter_chunked(1024 * 1024):
+            size += len(chunk)
+        return size
+
+
+async def run(url, size):
+    async with aiohttp.ClientSession() as http:
+        rows = []
+        for label in ("cold (store)", "warm (cache)"):
+            start = time.perf_counter()
+            assert await fetch(http, url) == size
+            rows.append((label, time.perf_counter() - start))
+        part = size // RANGE_PARTS
+        ranges = [(i * part, size - 1 if i == RANGE_PARTS - 1 else (i + 1) * part - 1) for i in range(RANGE_PARTS)]
+        start = time.perf_counter()
+        sizes = await asyncio.gather(*(fetch(http, url, {"Range": f"bytes={a}-{b}"}) for a, b in ranges))
+        assert sum(sizes) == size
+        rows.append((f"warm, {RANGE_PARTS} ranges", time.perf_counter() - start))
+        return rows
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "model.bin")
+        with open(source, "wb") as fh:
+            for _ in range(SIZE_MB):
+                fh.write(os.urandom(2**20))
+        store = ThrottledArtifactStore(source)
+        mlflow_api.client = store
+        mlflow_api.artifact_cache = ArtifactCache(os.path.join(tmp, "cache"), 4 * SIZE_MB * 2**20)
+        url = f"{start_api()}/runs/bench/artifacts/checkpoints/model.bin"
+        rows = asyncio.run(run(url, SIZE_MB * 2**20))
+    print(f"{SIZE_MB} MB artifact, artifact store at {STORE_MBPS} MB/s")
+    for label, elapsed in rows:
+        print(f"{label:>16} {elapsed * 1000:>8.0f}ms {SIZE_MB / elapsed:>7.0f}MB/s")
+    print(f"store downloads: {store.downloads}")
+
+
+if __name__ == "__main__":
+    main()
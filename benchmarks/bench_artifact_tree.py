@@ -0,0 +1,74 @@
+"""Time to list a run's whole artifact tree as its number of directories grows.
+
+Before: the caller walks the tree itself, one list_artifacts call (one HTTP
+round trip to /runs/artifacts/{run_id}?path=...) per directory. After: one
+recursive=true request, walked server-side with up to
+ARTIFACT_LIST_MAX_WORKERS listings in flight. Each listing costs LATENCY
+against the simulated artifact store.
+
+    python -m benchmarks.bench_artifact_tree
+"""
+import asyncio
+import time
+
+from mlflow.entities import FileInfo
+
+from backend import mlflow_api
+
+FANOUTS = [2, 4, 6]
+DEPTH = 4
+FILES_PER_DIR = 3
+LATENCY = 0.02
+
+
+class FakeArtifactTree:
+    def __init__(self, fanout):
+        self.fanout = fanout
+        self.calls = 0
+
+    def list_artifacts(self, run_id, path=None):
+        self.calls += 1
+        time.sleep(LATENCY)
+        depth = path.count("/") + 1 if path else 0
+        prefix = f"{path}/" if path else ""
+        entries = [FileInfo(f"{prefix}file{i}.bin", False, 1024) for i in range(FILES_PER_DIR)]
+        if depth < DEPTH:
+            entries += [FileInfo(f"{prefix}dir{i}", True, None) for i in range(self.fanout)]
+        return entries
+
+
+def client_side_walk(client, run_id):
+    total, stack = 0, [None]
+    while stack:
+        for entry in client.list_artifacts(run_id, stack.pop()):
+            if entry.is_dir:
+                stack.append(entry.path)
+            else:
+                total += entry.file_size
+    return total
+
+
+async def server_side_walk(run_id):
+    async for entry in mlflow_api.walk_artifacts(run_id):
+        if "summary" in entry:
+            return entry["summary"]["total_bytes"]
+
+
+def main():
+    print(f"{'dirs':>6} {'files':>7} {'client walk':>12} {'server walk':>12} {'speedup':>8}")
+    for fanout in FANOUTS:
+        tree = FakeArtifactTree(fanout)
+        mlflow_api.client = tree
+        start = time.perf_counter()
+        expected = client_side_walk(tree, "run")
+        before = time.perf_counter() - start
+        dirs = tree.calls
+        start = time.perf_counter()
+        assert asyncio.run(server_side_walk("run")) == expected
+        after = time.perf_counter() - start
+        files = expected // 1024
+        print(f"{dirs:>6} {files:>7} {before * 1000:>10.0f}ms {after * 1000:>10.0f}ms {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Peak Python memory and throughput of artifact uploads as the file size grows.
+
+Before: the file is held in memory as a whole (the frontend's getbuffer()
+copy, or a server reading the full request body) and then written to disk.
+After: POST /runs/{run_id}/artifacts, whose multipart body is spooled to disk
+chunk by chunk. The app is called directly over ASGI with the body delivered
+in 64 KiB chunks; MLflow's log_artifacts is replaced by a no-op.
+
+    python -m benchmarks.bench_artifact_upload
+"""
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+from backend import mlflow_api
+from backend.main import app
+
+SIZES_MB = [64, 256, 1024]
+CHUNK = 64 * 1024
+BOUNDARY = "benchboundary"
+
+
+class NullArtifactClient:
+    def log_artifacts(self, run_id, local_dir, artifact_path=None):
+        pass
+
+
+def body_chunks(size):
+    block = os.urandom(CHUNK)
+    yield (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="model.bin"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    for _ in range(size // CHUNK):
+        yield block
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def baseline_upload(size):
+    data = b"".join(body_chunks(size))
+    with tempfile.NamedTemporaryFile() as fh:
+        fh.write(data)
+
+
+async def streamed_upload(size):
+    chunks = body_chunks(size)
+    status = []
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/runs/bench/artifacts", "raw_path": b"/runs/bench/artifacts",
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+        "headers": [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())],
+    }
+
+    async def receive():
+        chunk = next(chunks, None)
+        return {"type": "http.request", "body": chunk or b"", "more_body": chunk is not None}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    assert status == [200], status
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    mlflow_api.client = NullArtifactClient()
+    print(f"{'size':>8} {'baseline':>10} {'peak':>10} {'streamed':>10} {'peak':>10}")
+    for size_mb in SIZES_MB:
+        size = size_mb * 1024 * 1024
+        base_time, base_peak = measure(baseline_upload, size)
+        new_time, new_peak = measure(lambda: asyncio.run(streamed_upload(size)))
+        print(f"{size_mb:>6}MB {size_mb / base_time:>6.0f}MB/s {base_peak / 2**20:>8.1f}MB "
+              f"{size_mb / new_time:>6.0f}MB/s {new_peak / 2**20:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Throughput of GET /runs/run/{run_id} with 500 requests in flight, before and after the async client.
+
+A fake MLflow tracking server answers runs/get after a fixed delay. Before:
+a sync route calling the blocking MlflowClient, which FastAPI runs on
+Starlette's worker threadpool (~40 threads). After: the app's async route on
+AsyncMlflowClient's shared keep-alive pool. The tracking server and the API
+under test each run under uvicorn in a child process and are driven over
+HTTP with aiohttp.
+
+    python -m benchmarks.bench_concurrency
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import time
+
+import aiohttp
+import uvicorn
+
+CONCURRENCY = 500
+TOTAL_REQUESTS = 3000
+LATENCY = 0.2
+
+
+def serve_fake_mlflow(port):
+    from mlflow.utils.proto_json_utils import message_to_json
+    from starlette.applications import Starlette
+    from starlette.responses import Response
+    from starlette.routing import Route
+
+    from benchmarks._fakes import make_run
+
+    body = json.dumps({"run": json.loads(message_to_json(make_run("0", 1).to_proto()))}).encode()
+
+    async def get_run(request):
+        await asyncio.sleep(LATENCY)
+        return Response(body, media_type="application/json")
+
+    fake = Starlette(routes=[Route("/api/2.0/mlflow/runs/get", get_run)])
+    uvicorn.run(fake, host="127.0.0.1", port=port, log_level="error", backlog=2048)
+
+
+def serve_sync_api(port, tracking_uri):
+    from fastapi import FastAPI
+    from mlflow.tracking import MlflowClient
+
+    from backend.responses import FastJSONResponse
+    from backend.serializers import run_to_view
+
+    client = MlflowClient(tracking_uri=tracking_uri)
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    @app.get("/runs/run/{run_id}")
+    def get_run_route(run_id: str):
+        return {"run": run_to_view(client.get_run(run_id))}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="error", backlog=2048)
+
+
+def serve_async_api(port, tracking_uri):
+    # backend.mlflow_api reads the tracking URI at import time
+    os.environ["MLFLOW_TRACKING_URI"] = tracking_uri
+    from backend.main import app
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="error", backlog=2048)
+
+
+def start_server(target, *args):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = multiprocessing.Process(target=target, args=(port, *args), daemon=True)
+    process.start()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+
+
+async def drive(base_url):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+    errors = 0
+    connector = aiohttp.TCPConnector(limit=CONCURRENCY)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=300)) as http:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                async with http.get(f"{base_url}/runs/run/0-{i:06d}") as response:
+                    await response.read()
+                latencies.append(time.perf_counter() - start)
+            errors += response.status != 200
+
+        # Warm up connections on both sides before timing
+        await asyncio.gather(*(one(i) for i in range(CONCURRENCY)))
+        latencies.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(TOTAL_REQUESTS)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return TOTAL_REQUESTS / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99)], errors
+
+
+def main():
+    _, tracking_uri = start_server(serve_fake_mlflow)
+    print(f"{TOTAL_REQUESTS} requests, {CONCURRENCY} in flight, tracking server latency {LATENCY * 1000:.0f} ms")
+    print(f"{'client':>8} {'req/s':>8} {'p50':>9} {'p99':>9} {'errors':>7}")
+    for label, target in (("sync", serve_sync_api), ("async", serve_async_api)):
+        process, base_url = start_server(target, tracking_uri)
+        throughput, p50, p99, errors = asyncio.run(drive(base_url))
+        process.terminate()
+        print(f"{label:>8} {throughput:>8.0f} {p50 * 1000:>7.0f}ms {p99 * 1000:>7.0f}ms {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
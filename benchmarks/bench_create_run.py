@@ -0,0 +1,67 @@
+"""Round trips and latency of POST /runs/create as the number of experiments grows.
+
+The baseline is the previous create_run: a full search_experiments scan for the
+existence check, then create, log_param, set_terminated and a get_run re-fetch.
+(Its scan only ever saw MLflow's first page of 1000 experiments, which caps its
+cost here and made IDs beyond that page look missing.)
+The current path checks the experiment-id index (one get_experiment point lookup
+on first sight of an ID) and builds its response without re-fetching the run.
+
+    python -m benchmarks.bench_create_run
+"""
+import asyncio
+import time
+
+from mlflow.entities import ViewType
+
+from backend import mlflow_api
+from backend.serializers import run_to_view
+from benchmarks._fakes import AsyncFakeMlflowClient, FakeMlflowClient
+
+EXPERIMENT_COUNTS = [10, 1000, 10000]
+RUNS_CREATED = 20
+LATENCY = 0.005
+PER_ITEM_COST = 0.000002
+
+
+def baseline_create_run(client, experiment_id, run_name):
+    experiment_list = client.search_experiments(view_type=ViewType.ALL)
+    experiment_ids = [exp.experiment_id for exp in experiment_list]
+    if str(experiment_id) not in [str(eid) for eid in experiment_ids]:
+        return {"error": f"Experiment ID {experiment_id} does not exist."}
+    run = client.create_run(experiment_id=str(experiment_id), run_name=run_name)
+    client.log_param(run.info.run_id, "init_status", "run_started")
+    client.set_terminated(run.info.run_id)
+    return run_to_view(client.get_run(run.info.run_id))
+
+
+def measure(fn):
+    start = time.perf_counter()
+    for i in range(RUNS_CREATED):
+        result = fn(f"run-{i}")
+        assert not (isinstance(result, dict) and "error" in result), result
+    return (time.perf_counter() - start) / RUNS_CREATED
+
+
+def main():
+    print(f"per-call latency {LATENCY * 1000:.0f} ms, {RUNS_CREATED} runs created per row, "
+          f"experiment checked = first one")
+    print(f"{'experiments':>12} {'baseline':>20} {'current':>20}")
+    for n in EXPERIMENT_COUNTS:
+        fake = FakeMlflowClient(n_experiments=n, runs_per_experiment=0, latency=LATENCY, per_item_cost=PER_ITEM_COST)
+        mlflow_api.aclient = AsyncFakeMlflowClient(fake)
+        mlflow_api._known_experiment_ids.clear()
+        target = fake.experiments[0].experiment_id
+
+        base_time = measure(lambda name: baseline_create_run(fake, target, name))
+        base_calls = sum(fake.calls.values()) / RUNS_CREATED
+        fake.calls.clear()
+        cur_time = measure(lambda name: asyncio.run(mlflow_api.create_run(target, name)))
+        cur_calls = sum(fake.calls.values()) / RUNS_CREATED
+
+        print(f"{n:>12} {base_time * 1000:>8.1f}ms {base_calls:>4.2f} calls "
+              f"{cur_time * 1000:>8.1f}ms {cur_calls:>4.2f} calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Per-operation latency of the container runtimes: docker CLI subprocesses vs the Engine API.
+
+Each iteration runs a container, reads its logs, lists the deployment
+containers and stops it. Before: the shell=True command strings the
+deployment routes used to run. Then CliRuntime (same CLI, argument lists, no
+shell), and DockerEngineRuntime over a unix socket with keep-alive
+connections. Docker is replaced by benchmarks._fake_docker: a fake CLI script
+(whose start-up stands in for the real CLI's, which is slower still) and a fake
+Engine API daemon, so the numbers isolate the cost of the calling path.
+
+    python -m benchmarks.bench_docker_runtime
+"""
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+from backend.runtime import CliRuntime, DockerEngineRuntime
+from benchmarks._fake_docker import FakeDockerDaemon, make_fake_cli
+
+ITERATIONS = 30
+OPERATIONS = ("run", "logs", "list", "stop")
+
+
+class ShellRuntime:
+    """The former shell=True command strings"""
+
+    def __init__(self, docker_bin):
+        self.docker_bin = docker_bin
+
+    def run(self, name, image, args, ports, volumes):
+        subprocess.run(f"{self.docker_bin} run -d --rm --name {name} -p 6001:5001 -v /tmp:/model:ro {image} "
+                       f"{' '.join(args)}", shell=True, check=True, capture_output=True)
+
+    def logs(self, name, tail=50):
+        return subprocess.check_output(f"{self.docker_bin} logs --tail {tail} {name}", shell=True, text=True)
+
+    def list_containers(self, prefix):
+        return subprocess.check_output(f"{self.docker_bin} ps -a --filter name=^{prefix}", shell=True, text=True)
+
+    def stop(self, name):
+        subprocess.run(f"{self.docker_bin} stop {name}", shell=True, check=True, capture_output=True)
+
+
+def measure(runtime):
+    timings = {op: [] for op in OPERATIONS}
+    for i in range(ITERATIONS):
+        name = f"deployment_{i}_0"
+        calls = {
+            "run": lambda: runtime.run(name, "serving-image", ["--model-uri", "/model"], {5001: 6001}, {"/tmp": "/model"}),
+            "logs": lambda: runtime.logs(name, tail=50),
+            "list": lambda: runtime.list_containers("deployment_"),
+            "stop": lambda: runtime.stop(name),
+        }
+        for op in OPERATIONS:
+            start = time.perf_counter()
+            calls[op]()
+            timings[op].append(time.perf_counter() - start)
+    return {op: statistics.median(values) for op, values in timings.items()}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        docker = make_fake_cli(directory)
+        socket_path = os.path.join(directory, "docker.sock")
+        with FakeDockerDaemon(socket_path) as daemon:
+            engine = DockerEngineRuntime(socket_path)
+            results = [
+                ("shell=True CLI", measure(ShellRuntime(docker))),
+                ("CliRuntime", measure(CliRuntime(docker))),
+                ("Engine API", measure(engine)),
+            ]
+            connections = daemon.connections
+            engine.close()
+    print(f"median latency over {ITERATIONS} iterations")
+    print(f"{'runtime':>15} " + " ".join(f"{op:>9}" for op in OPERATIONS))
+    for label, medians in results:
+        print(f"{label:>15} " + " ".join(f"{medians[op] * 1000:>7.2f}ms" for op in OPERATIONS))
+    print(f"Engine API connections opened: {connections} for {ITERATIONS * (len(OPERATIONS) + 1)} requests")
+
+
+if __name__ == "__main__":
+    main()
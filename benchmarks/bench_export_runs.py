@@ -0,0 +1,72 @@
+"""Client-side time to get an experiment's runs into a typed, wide DataFrame.
+
+Before: the JSON body of /runs/{id} parsed and flattened with pandas (one row
+per run, metric and param lists pivoted into columns). After: the Arrow IPC
+stream and Parquet file produced by backend.export, read with pyarrow, with
+the columns discovered by the export's key scan and ("+keys") given up front.
+Server-side encoding time and body size are reported as well.
+
+    python -m benchmarks.bench_export_runs
+"""
+import io
+import json
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from backend.export import export_runs, scan_keys
+from backend.responses import FastJSONResponse
+from backend.serializers import run_to_view
+from benchmarks._fakes import make_run
+
+RUN_COUNTS = [10000, 100000]
+PAGE_SIZE = 1000
+
+
+def json_to_frame(body):
+    rows = []
+    for run in json.loads(body)["runs"]:
+        row = dict(run["info"])
+        row.update({"metrics." + m["key"]: m["value"] for m in run["data"]["metrics"]})
+        row.update({"params." + p["key"]: p["value"] for p in run["data"]["params"]})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def encode(pages, fmt, keys):
+    return b"".join(export_runs(lambda: iter(pages), fmt, *keys))
+
+
+def main():
+    print(f"{'runs':>8} {'format':>12} {'encode':>9} {'decode':>9} {'bytes':>11}")
+    for n in RUN_COUNTS:
+        runs = [make_run("0", i, n_metrics=20, n_params=20) for i in range(n)]
+        pages = [runs[i:i + PAGE_SIZE] for i in range(0, n, PAGE_SIZE)]
+
+        encode_time, body = timed(lambda: FastJSONResponse({"runs": [run_to_view(r) for r in runs]}).body)
+        decode_time, frame = timed(json_to_frame, body)
+        assert len(frame) == n
+        print(f"{n:>8} {'json':>12} {encode_time * 1000:>7.0f}ms {decode_time * 1000:>7.0f}ms {len(body):>11}")
+
+        known = scan_keys(pages)
+        for label, keys in (("", (None, None)), ("+keys", known)):
+            encode_time, body = timed(encode, pages, "arrow", keys)
+            decode_time, frame = timed(lambda: pa.ipc.open_stream(body).read_pandas())
+            assert len(frame) == n
+            print(f"{n:>8} {'arrow' + label:>12} {encode_time * 1000:>7.0f}ms {decode_time * 1000:>7.0f}ms {len(body):>11}")
+
+            encode_time, body = timed(encode, pages, "parquet", keys)
+            decode_time, frame = timed(lambda: pq.read_table(io.BytesIO(body)).to_pandas())
+            assert len(frame) == n
+            print(f"{n:>8} {'parquet' + label:>12} {encode_time * 1000:>7.0f}ms {decode_time * 1000:>7.0f}ms {len(body):>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Latency of GET /runs/ as the number of experiments grows.
+
+Compares the old one-search_runs-per-experiment loop with the batched,
+concurrent fan-out in ``backend.mlflow_api.get_all_runs`` against a fake
+tracking server with a fixed per-call latency.
+
+    python -m benchmarks.bench_list_all_runs
+"""
+import asyncio
+import time
+
+from backend import mlflow_api
+from benchmarks._fakes import AsyncFakeMlflowClient, FakeMlflowClient
+
+EXPERIMENT_COUNTS = [10, 50, 100, 300]
+RUNS_PER_EXPERIMENT = 5
+LATENCY = 0.02
+
+
+async def sequential(experiment_ids):
+    all_runs = []
+    for eid in experiment_ids:
+        all_runs.extend(await mlflow_api.get_runs(eid))
+    return all_runs
+
+
+async def fanout(experiment_ids):
+    return await mlflow_api.get_all_runs(experiment_ids)
+
+
+def measure(fn, experiment_ids):
+    start = time.perf_counter()
+    runs = asyncio.run(fn(experiment_ids))
+    return time.perf_counter() - start, len(runs)
+
+
+def main():
+    print(f"per-call latency {LATENCY * 1000:.0f} ms, {RUNS_PER_EXPERIMENT} runs/experiment, "
+          f"batch={mlflow_api.RUNS_FANOUT_BATCH_SIZE}, in flight={mlflow_api.RUNS_FANOUT_MAX_WORKERS}")
+    print(f"{'experiments':>12} {'sequential':>12} {'fan-out':>12} {'calls':>12} {'speedup':>8}")
+    for n in EXPERIMENT_COUNTS:
+        fake = FakeMlflowClient(n_experiments=n, runs_per_experiment=RUNS_PER_EXPERIMENT, latency=LATENCY)
+        mlflow_api.aclient = AsyncFakeMlflowClient(fake)
+        experiment_ids = [exp.experiment_id for exp in fake.experiments]
+
+        seq_time, seq_count = measure(sequential, experiment_ids)
+        seq_calls = fake.calls["search_runs"]
+        fake.calls.clear()
+        fan_time, fan_count = measure(fanout, experiment_ids)
+        fan_calls = fake.calls["search_runs"]
+        assert seq_count == fan_count == n * RUNS_PER_EXPERIMENT
+
+        print(f"{n:>12} {seq_time * 1000:>10.0f}ms {fan_time * 1000:>10.0f}ms "
+              f"{f'{seq_calls}->{fan_calls}':>12} {seq_time / fan_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
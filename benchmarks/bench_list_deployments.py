@@ -0,0 +1,104 @@
+"""Latency of the deployment listing over a large history of deployment rows.
+
+An embedded SQLite database stands in for MySQL, holding 300k deployments (a
+few hundred still serving, the rest failed or cancelled) in the shape of
+migrations 0001-0003. Before: every row is read (SELECT of all deployments)
+and filtered in Python. After: deployments_query, the listing's SQL with the
+filters and a keyset page of 100 pushed into the WHERE clause, first without
+and then with the indexes of migration 0004.
+
+    python -m benchmarks.bench_list_deployments
+"""
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from backend import migrate
+from backend.routers.deployments import DEPLOYMENT_COLUMNS, deployments_query
+
+ROWS = 300_000
+SERVING = 300
+PAGE_SIZE = 100
+REPEAT = 20
+START = datetime(2025, 1, 1)
+
+QUERIES = {
+    "first page": {},
+    "status=ready": {"status": ["ready"]},
+    "model+version": {"model": "model-42", "version": "3"},
+    "updated_since": {"updated_since": START + timedelta(minutes=ROWS - 2000)},
+}
+
+
+def build_database():
+    db = sqlite3.connect(":memory:")
+    db.execute(
+        "CREATE TABLE deployments (id INTEGER PRIMARY KEY, name TEXT, model TEXT, version TEXT, status TEXT, "
+        "last_updated TEXT, phase_timings TEXT, error TEXT, replicas INT)"
+    )
+    rng = random.Random(0)
+    serving = set(rng.sample(range(1, ROWS + 1), SERVING))
+    db.executemany(
+        "INSERT INTO deployments VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, 1)",
+        (
+            (i, f"deploy-{i}", f"model-{rng.randrange(500)}", str(rng.randrange(1, 6)),
+             "ready" if i in serving else rng.choice(("failed", "cancelled")),
+             (START + timedelta(minutes=i)).isoformat(" "))
+            for i in range(1, ROWS + 1)
+        ),
+    )
+    return db
+
+
+def run_sql(db, sql, params):
+    return db.execute(sql.replace("%s", "?"), [p.isoformat(" ") if isinstance(p, datetime) else p for p in params]).fetchall()
+
+
+def before(db, filters):
+    rows = db.execute(f"SELECT {DEPLOYMENT_COLUMNS} FROM deployments").fetchall()
+    since = filters.get("updated_since")
+    matching = [
+        row for row in rows
+        if (not filters.get("status") or row[4] in filters["status"])
+        and (filters.get("model") is None or row[2] == filters["model"])
+        and (filters.get("version") is None or row[3] == filters["version"])
+        and (since is None or row[5] >= since.isoformat(" "))
+    ]
+    return sorted(matching, key=lambda row: -row[0])[:PAGE_SIZE]
+
+
+def after(db, filters):
+    return run_sql(db, *deployments_query(**filters, limit=PAGE_SIZE + 1))[:PAGE_SIZE]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = fn(*args)
+    return (time.perf_counter() - start) / REPEAT, result
+
+
+def main():
+    db = build_database()
+    results = {name: [] for name in QUERIES}
+    for name, filters in QUERIES.items():
+        elapsed, expected = timed(before, db, filters)
+        results[name].append(elapsed)
+        elapsed, rows = timed(after, db, filters)
+        assert rows == expected, name
+        results[name].append(elapsed)
+    with open(os.path.join(migrate.MIGRATIONS_DIR, "0004_deployment_indexes.sql")) as fh:
+        for statement in migrate.statements(fh.read()):
+            db.execute(statement)
+    for name, filters in QUERIES.items():
+        results[name].append(timed(after, db, filters)[0])
+    print(f"{ROWS} deployments, pages of {PAGE_SIZE}")
+    print(f"{'query':>14} {'read all':>10} {'SQL':>10} {'SQL+index':>10}")
+    for name, (all_rows, sql, indexed) in results.items():
+        print(f"{name:>14} {all_rows * 1000:>8.1f}ms {sql * 1000:>8.2f}ms {indexed * 1000:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Upstream load and delivery latency of live deployment logs for a growing number of viewers.
+
+A fake Docker Engine daemon (benchmarks._fake_docker) appends 20 lines per
+second to one container's log, each stamped with its emit time. Before: every
+viewer polls GET /deployments/{id}/logs once per second, one upstream logs
+call per poll. After: every viewer follows GET /deployments/{id}/logs/stream
+(SSE), all of them fed by a single upstream follow stream. The API runs under
+uvicorn in a child process; reported are upstream requests to the daemon,
+median and p99 delay from emit to delivery, and the API's CPU time.
+
+    python -m benchmarks.bench_log_stream
+"""
+import asyncio
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import aiohttp
+import uvicorn
+
+from benchmarks._fake_docker import FakeDockerDaemon
+from benchmarks.bench_concurrency import start_server
+
+VIEWER_COUNTS = [1, 10, 50]
+DURATION = 5.0
+LINES_PER_SECOND = 20
+POLL_INTERVAL = 1.0
+CONTAINER = "deployment_1_0"
+
+
+def serve_api(port, socket_path):
+    os.environ["DOCKER_SOCKET"] = socket_path
+    # No database here for the reconciler or the job heartbeat to update
+    os.environ["RECONCILE_INTERVAL"] = "0"
+    os.environ["DEPLOY_JOB_HEARTBEAT"] = "0"
+    from backend.main import app
+    from backend.routers import deployments
+
+    # No database here: every replica counts as live
+    deployments._check_replica = lambda deployment_id, replica: None
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="error")
+
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as fh:
+        fields = fh.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def emit_lines(daemon, stop):
+    seq = 0
+    while not stop.is_set():
+        seq += 1
+        daemon.emit(CONTAINER, f"line {seq} at {time.time():.6f}")
+        time.sleep(1 / LINES_PER_SECOND)
+
+
+def delay_of(line, delays, seen):
+    if " at " in line:
+        text = line.split("data: ", 1)[-1] if "data: " in line else line
+        seq, emitted = text.split(" at ")
+        if seq not in seen:
+            seen.add(seq)
+            delays.append(time.time() - float(emitted))
+
+
+async def poll_viewer(http, base_url, delays, stop):
+    seen = set()
+    while not stop.is_set():
+        async with http.get(f"{base_url}/deployments/1/logs") as response:
+            for line in (await response.json())["logs"]:
+                delay_of(line, delays, seen)
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+async def stream_viewer(http, base_url, delays, stop):
+    seen = set()
+    async with http.get(f"{base_url}/deployments/1/logs/stream?tail=0") as response:
+        async for line in response.content:
+            delay_of(line.decode(), delays, seen)
+            if stop.is_set():
+                return
+
+
+async def run(viewer, viewers, base_url):
+    stop = asyncio.Event()
+    delays = []
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None)) as http:
+        tasks = [asyncio.create_task(viewer(http, base_url, delays, stop)) for _ in range(viewers)]
+        await asyncio.sleep(DURATION)
+        stop.set()
+        await asyncio.wait(tasks, timeout=POLL_INTERVAL + 1)
+        for task in tasks:
+            task.cancel()
+    delays.sort()
+    return statistics.median(delays), delays[int(len(delays) * 0.99)]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "docker.sock")
+        with FakeDockerDaemon(socket_path) as daemon:
+            daemon.containers[CONTAINER] = {"Id": "bench", "State": "running", "Logs": []}
+            api, base_url = start_server(serve_api, socket_path)
+            stop = threading.Event()
+            threading.Thread(target=emit_lines, args=(daemon, stop), daemon=True).start()
+            print(f"{LINES_PER_SECOND} lines/s for {DURATION:.0f}s per run, polling every {POLL_INTERVAL:.0f}s")
+            print(f"{'viewers':>8} {'mode':>7} {'upstream':>9} {'p50':>9} {'p99':>9} {'API CPU':>8}")
+            for viewers in VIEWER_COUNTS:
+                for label, viewer in (("poll", poll_viewer), ("stream", stream_viewer)):
+                    requests, cpu = daemon.requests, cpu_seconds(api.pid)
+                    p50, p99 = asyncio.run(run(viewer, viewers, base_url))
+                    print(f"{viewers:>8} {label:>7} {daemon.requests - requests:>9} {p50 * 1000:>7.0f}ms "
+                          f"{p99 * 1000:>7.0f}ms {cpu_seconds(api.pid) - cpu:>7.2f}s")
+            stop.set()
+            api.terminate()
+
+
+if __name__ == "__main__":
+    main()
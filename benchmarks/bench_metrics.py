@@ -0,0 +1,83 @@
+"""Per-request cost of the /metrics instrumentation.
+
+A minimal ASGI app (it marks the route the way the router does and sends an
+empty 200) is called in a loop, before: as is, after: wrapped in
+MetricsMiddleware. The difference is the middleware's overhead per request:
+the in-flight gauge, the route template, the latency histogram and the status
+counter. The same comparison is made for a method call through the
+Instrumented proxy that times MLflow and Docker calls, and for a pooled
+cursor's execute through TimedCursor.
+
+    python -m benchmarks.bench_metrics
+"""
+import asyncio
+import time
+
+from backend.database import TimedCursor
+from backend.metrics import Instrumented, MetricsMiddleware
+
+REQUESTS = 200_000
+CALLS = 1_000_000
+
+
+class Route:
+    path = "/{deployment_id}"
+    path_format = "/{deployment_id}"
+
+
+ROUTE = Route()
+
+
+async def app(scope, receive, send):
+    scope["route"] = ROUTE
+    scope["path_params"] = {"deployment_id": "42"}
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def serve(handler):
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        await handler({"type": "http", "method": "GET", "path": "/deployments/42"}, receive, send)
+    return (time.perf_counter() - started) / REQUESTS
+
+
+class Upstream:
+    def get_run(self, run_id):
+        return run_id
+
+
+class Cursor:
+    def execute(self, operation, params=None):
+        return None
+
+
+def per_call(fn):
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        fn("SELECT 1")
+    return (time.perf_counter() - started) / CALLS
+
+
+def main():
+    plain, timed = asyncio.run(serve(app)), asyncio.run(serve(MetricsMiddleware(app)))
+    rows = [
+        ("ASGI request", plain, timed),
+        ("client method call", per_call(Upstream().get_run), per_call(Instrumented(Upstream(), "bench").get_run)),
+        ("cursor execute", per_call(Cursor().execute), per_call(TimedCursor(Cursor()).execute)),
+    ]
+    print(f"{'':>20} {'before':>9} {'after':>9} {'overhead':>9}")
+    for label, before, after in rows:
+        print(f"{label:>20} {before * 1e6:>7.2f}us {after * 1e6:>7.2f}us {(after - before) * 1e6:>7.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Bytes fetched and disk used by a sequence of deploys, redeploys and rollbacks.
+
+Each model version has a large weights file plus small metadata files; every
+second version only changes the metadata (e.g. a re-registered model). Before:
+every deployment downloads the version into its own directory. After: the
+content-addressed ModelCache, where repeat versions are cache hits and
+identical files are stored once.
+
+    python -m benchmarks.bench_model_cache
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from backend.model_cache import ModelCache
+
+WEIGHTS_MB = 64
+# (deployment, version) in the order they are rolled out
+ROLLOUT = [("prod", 1), ("canary", 2), ("prod", 2), ("prod", 1), ("canary", 3), ("prod", 3), ("prod", 2), ("prod", 3)]
+
+
+def write_version(root, version):
+    os.makedirs(root)
+    weights = (version + 1) // 2  # versions 1-2 share weights, 3-4 share weights, ...
+    with open(os.path.join(root, "model.bin"), "wb") as fh:
+        fh.write(bytes([weights]) * WEIGHTS_MB * 2**20)
+    with open(os.path.join(root, "MLmodel"), "w") as fh:
+        fh.write(f"version: {version}\n")
+    return root
+
+
+def disk_usage(path):
+    seen, total = set(), 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            stat = os.stat(os.path.join(dirpath, filename))
+            if stat.st_ino not in seen:
+                seen.add(stat.st_ino)
+                total += stat.st_size
+    return total
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        fetched = 0
+        start = time.perf_counter()
+        for name, version in ROLLOUT:
+            target = os.path.join(tmp, "before", f"{name}_{version}")
+            shutil.rmtree(target, ignore_errors=True)
+            write_version(target, version)
+            fetched += disk_usage(target)
+        before = (fetched, disk_usage(os.path.join(tmp, "before")), time.perf_counter() - start)
+
+        cache = ModelCache(os.path.join(tmp, "cache"), max_bytes=10 * WEIGHTS_MB * 2**20)
+        start = time.perf_counter()
+        for name, version in ROLLOUT:
+            cache.materialize(
+                f"runs:/run{version}/model", lambda dst: write_version(os.path.join(dst, "model"), version), ref=name
+            )
+        stats = cache.stats()
+        after = (stats["bytes_downloaded"], disk_usage(os.path.join(tmp, "cache")), time.perf_counter() - start)
+
+    print(f"{len(ROLLOUT)} rollouts of {WEIGHTS_MB} MB models, hit rate {stats['hit_rate']:.0%}")
+    print(f"{'':>8} {'fetched':>10} {'on disk':>10} {'time':>8}")
+    for label, (fetched, used, elapsed) in (("before", before), ("after", after)):
+        print(f"{label:>8} {fetched / 2**20:>8.0f}MB {used / 2**20:>8.0f}MB {elapsed * 1000:>6.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Throughput of single-row predictions with and without gateway micro-batching.
+
+A stub serving process stands in for an MLflow model container: its
+/invocations scores one request at a time (like a single serving worker) at
+a fixed cost per call plus a small cost per row. Clients send 2000 single-row
+dataframe_split requests, 64 in flight, either straight to the stub's port,
+or through POST /deployments/{id}/predict without batching, or through it with
+a 5 ms batching window. The stub and the API each run under uvicorn in a
+child process; the API's replica lookup is pointed at the stub's port.
+Afterwards a batch with one malformed row among good ones checks that only
+the bad row's request fails (the stub rejects a whole call with any bad row).
+
+    python -m benchmarks.bench_predict
+"""
+import asyncio
+import json
+import statistics
+import time
+
+import aiohttp
+import uvicorn
+
+from benchmarks.bench_concurrency import start_server
+
+CONCURRENCY = 64
+TOTAL_REQUESTS = 2000
+CALL_COST = 0.004
+ROW_COST = 0.00005
+BATCH_WAIT_MS = 5
+
+
+def serve_stub_model(port):
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    worker = asyncio.Lock()
+
+    async def invocations(request):
+        rows = (await request.json())["dataframe_split"]["data"]
+        if not all(isinstance(value, (int, float)) for row in rows for value in row):
+            return JSONResponse({"error_code": "BAD_REQUEST", "message": "Non-numeric input"}, status_code=400)
+        async with worker:
+            await asyncio.sleep(CALL_COST + ROW_COST * len(rows))
+        return JSONResponse({"predictions": [sum(row) for row in rows]})
+
+    stub = Starlette(routes=[Route("/invocations", invocations, methods=["POST"])])
+    uvicorn.run(stub, host="127.0.0.1", port=port, log_level="error", backlog=2048)
+
+
+def serve_api(port, stub_port):
+    from backend.gateway import InferenceGateway
+    from backend.main import app
+
+    InferenceGateway._load_ports = staticmethod(lambda deployment_id: [stub_port])
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="error", backlog=2048)
+
+
+async def drive(url):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+    errors = 0
+    connector = aiohttp.TCPConnector(limit=CONCURRENCY)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=300)) as http:
+        async def one(i):
+            nonlocal errors
+            payload = {"dataframe_split": {"columns": ["a", "b"], "data": [[i, 1]]}}
+            async with semaphore:
+                start = time.perf_counter()
+                async with http.post(url, data=json.dumps(payload),
+                                     headers={"Content-Type": "application/json"}) as response:
+                    body = await response.json()
+                latencies.append(time.perf_counter() - start)
+            errors += response.status != 200 or body["predictions"] != [i + 1]
+
+        await asyncio.gather(*(one(i) for i in range(CONCURRENCY)))
+        latencies.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(TOTAL_REQUESTS)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return TOTAL_REQUESTS / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99)], errors
+
+
+async def check_bad_row(url, rows=16, bad=5):
+    """Send one batch worth of single-row requests, one of them malformed; returns the statuses"""
+    async with aiohttp.ClientSession() as http:
+        async def one(i):
+            payload = {"dataframe_split": {"columns": ["a", "b"], "data": [[i, "x" if i == bad else 1]]}}
+            async with http.post(url, data=json.dumps(payload), headers={"Content-Type": "application/json"}) as response:
+                body = await response.json()
+            return response.status, body
+
+        results = await asyncio.gather(*(one(i) for i in range(rows)))
+    for i, (status, body) in enumerate(results):
+        expected = 400 if i == bad else 200
+        assert status == expected, (i, status, body)
+        assert i == bad or body["predictions"] == [i + 1], (i, body)
+    return [status for status, _ in results]
+
+
+def main():
+    stub, stub_url = start_server(serve_stub_model)
+    api, api_url = start_server(serve_api, int(stub_url.rsplit(":", 1)[1]))
+    print(f"{TOTAL_REQUESTS} single-row requests, {CONCURRENCY} in flight, "
+          f"model cost {CALL_COST * 1000:.0f} ms per call + {ROW_COST * 1000:.2f} ms per row")
+    print(f"{'route':>18} {'req/s':>8} {'p50':>9} {'p99':>9} {'errors':>7}")
+    for label, url in (
+        ("direct", f"{stub_url}/invocations"),
+        ("gateway", f"{api_url}/deployments/1/predict?max_wait_ms=0"),
+        ("gateway batched", f"{api_url}/deployments/1/predict?max_wait_ms={BATCH_WAIT_MS}"),
+    ):
+        throughput, p50, p99, errors = asyncio.run(drive(url))
+        print(f"{label:>18} {throughput:>8.0f} {p50 * 1000:>7.1f}ms {p99 * 1000:>7.1f}ms {errors:>7}")
+    statuses = asyncio.run(check_bad_row(f"{api_url}/deployments/1/predict?max_wait_ms=50"))
+    print(f"batch with one bad row: {statuses.count(200)} ok, {statuses.count(400)} rejected")
+    api.terminate()
+    stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Time to learn the state of every deployment container, per container vs in bulk.
+
+A fake docker CLI (a small Python script) answers from a state file
+that lists N deployment containers, a tenth of them exited. Before: one
+``docker inspect`` subprocess per replica, as a per-request status check
+would do. After: the reconciler's single ``docker ps`` listing plus diffing it
+against the replica rows (plan_changes). Both sides pay the same process
+start-up cost per CLI call, so the gap grows with the number of replicas.
+
+    python -m benchmarks.bench_reconcile
+"""
+import subprocess
+import tempfile
+import time
+
+from backend import reconciler
+from backend.runtime import CliRuntime
+from benchmarks._fake_docker import make_fake_cli
+
+REPLICA_COUNTS = [10, 50, 200]
+
+
+def per_container(docker, replicas):
+    states = {}
+    for _, _, name, _ in replicas:
+        result = subprocess.run([docker, "inspect", "-f", "{{.State.Status}}", name], capture_output=True, text=True)
+        states[name] = result.stdout.strip() if result.returncode == 0 else None
+    return states
+
+
+def bulk(docker, replicas, deployments):
+    return reconciler.plan_changes(deployments, replicas, CliRuntime(docker).list_containers("deployment_"))
+
+
+def main():
+    print(f"{'replicas':>9} {'per container':>14} {'bulk':>9} {'speedup':>8} {'changes':>8}")
+    for count in REPLICA_COUNTS:
+        replicas = [(i // 2, i % 2, f"deployment_{i // 2}_{i % 2}", "running") for i in range(count)]
+        deployments = [(d, "ready", 2) for d in range((count + 1) // 2)]
+        states = {name: "exited" if i % 10 == 0 else "running" for i, (_, _, name, _) in enumerate(replicas)}
+        with tempfile.TemporaryDirectory() as directory:
+            docker = make_fake_cli(directory, states)
+            start = time.perf_counter()
+            per_container(docker, replicas)
+            before = time.perf_counter() - start
+            start = time.perf_counter()
+            replica_updates, deployment_updates = bulk(docker, replicas, deployments)
+            after = time.perf_counter() - start
+        print(f"{count:>9} {before * 1000:>12.0f}ms {after * 1000:>7.0f}ms {before / after:>7.1f}x "
+              f"{len(replica_updates) + len(deployment_updates):>8}")
+
+
+if __name__ == "__main__":
+    main()
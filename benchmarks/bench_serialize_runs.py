@@ -0,0 +1,73 @@
+"""Time to turn large run lists into a JSON response body, before and after the serializer rework.
+
+Before: hand-built nested dicts (with the old hasattr checks), FastAPI's
+jsonable_encoder and Starlette's stdlib-json JSONResponse. After: slotted
+views from backend.serializers rendered directly by FastJSONResponse.
+
+    python -m benchmarks.bench_serialize_runs
+"""
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.responses import FastJSONResponse
+from backend.serializers import run_to_view
+from benchmarks._fakes import make_run
+
+RUN_COUNTS = [1000, 10000]
+REPEAT = 3
+
+
+def legacy_run_to_dict(run):
+    info = run.info
+    data = run.data
+    run_info = {
+        "run_id": info.run_id,
+        "run_name": info.run_name if hasattr(info, "run_name") else None,
+        "experiment_id": info.experiment_id,
+        "status": info.status,
+        "start_time": info.start_time,
+        "end_time": info.end_time,
+        "artifact_uri": info.artifact_uri,
+        "lifecycle_stage": info.lifecycle_stage
+    }
+    run_data = {
+        "metrics": [{"key": k, "value": v} for k, v in data.metrics.items()] if hasattr(data, "metrics") else [],
+        "params": [{"key": k, "value": v} for k, v in data.params.items()] if hasattr(data, "params") else [],
+        "tags": [{"key": k, "value": v} for k, v in data.tags.items()] if hasattr(data, "tags") else []
+    }
+    return {"info": run_info, "data": run_data}
+
+
+def before(runs):
+    payload = {"runs": [legacy_run_to_dict(run) for run in runs]}
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def after(runs):
+    return FastJSONResponse({"runs": [run_to_view(run) for run in runs]}).body
+
+
+def best_of(fn, runs):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        body = fn(runs)
+        timings.append(time.perf_counter() - start)
+    return min(timings), body
+
+
+def main():
+    print(f"{'runs':>8} {'before':>10} {'after':>10} {'speedup':>8} {'bytes':>10}")
+    for n in RUN_COUNTS:
+        runs = [make_run("0", i, n_metrics=20, n_params=20) for i in range(n)]
+        before_time, before_body = best_of(before, runs)
+        after_time, after_body = best_of(after, runs)
+        assert len(before_body) == len(after_body)
+        print(f"{n:>8} {before_time * 1000:>8.0f}ms {after_time * 1000:>8.0f}ms "
+              f"{before_time / after_time:>7.1f}x {len(after_body):>10}")
+
+
+if __name__ == "__main__":
+    main()
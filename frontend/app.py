@@ -1,7 +1,9 @@
 import streamlit as st
 import requests
 import pandas as pd
+import pyarrow as pa
 import time
+import uuid
 
 API_BASE_URL = "http://localhost:8000"
 
@@ -10,20 +12,39 @@ st.sidebar.title("ML Lifecycle Platform")
 selected_tab = st.sidebar.radio("Navigate", ["Experiments", "Runs", "Models", "Model Versions", "Model Stages", "Artifact Logging", "Model Tagging"])
 
 # -------------------- HELPER FUNCTIONS --------------------
+@st.cache_resource
+def get_http_session():
+    """Keep-alive session (gzip is negotiated by requests) and an ETag cache that survive reruns."""
+    return requests.Session(), {}
+
+def run_export_keys():
+    """Metric and param keys of each experiment's last export; passing them lets the backend skip its key scan."""
+    return st.session_state.setdefault("run_export_keys", {})
+
 def fetch_data(endpoint):
     """Fetches data from the FastAPI backend and handles errors."""
+    session, etag_cache = get_http_session()
+    url = f"{API_BASE_URL}{endpoint}"
     try:
-        response = requests.get(f"{API_BASE_URL}{endpoint}")
-        if response.status_code == 200:
+        cached = etag_cache.get(url)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = session.get(url, headers=headers)
+        if response.status_code == 304 and cached:
+            # Unchanged since the last poll: reuse the decoded payload
+            data = cached[1]
+        elif response.status_code == 200:
             data = response.json()
-            if isinstance(data, list):  # If response is a list, return it directly
-                return data
-            elif isinstance(data, dict):  # If it's a dictionary, try to return its expected values
-                for key in ["experiments", "models", "runs", "versions"]:
-                    if key in data:
-                        return data[key]
-            return data  # Return as is if it's neither list nor expected dictionary
-        return []
+            if "ETag" in response.headers:
+                etag_cache[url] = (response.headers["ETag"], data)
+        else:
+            return []
+        if isinstance(data, list):  # If response is a list, return it directly
+            return data
+        elif isinstance(data, dict):  # If it's a dictionary, try to return its expected values
+            for key in ["experiments", "models", "runs", "versions"]:
+                if key in data:
+                    return data[key]
+        return data  # Return as is if it's neither list nor expected dictionary
     except Exception as e:
         st.error(f"Error fetching data: {e}")
         return []
@@ -33,6 +54,27 @@ def post_request(endpoint, params):
     response = requests.post(f"{API_BASE_URL}{endpoint}", params=params)
     return response.status_code == 200
 
+def _multipart_chunks(fileobj, filename, boundary, chunk_size=1024 * 1024):
+    """Yield a multipart/form-data body for one file without reading it into memory at once."""
+    yield (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    while chunk := fileobj.read(chunk_size):
+        yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+def upload_file(endpoint, fileobj, params):
+    """Streams a file to the FastAPI backend as a chunked multipart upload."""
+    boundary = uuid.uuid4().hex
+    response = requests.post(
+        f"{API_BASE_URL}{endpoint}", params=params,
+        data=_multipart_chunks(fileobj, fileobj.name.replace('"', '%22'), boundary),
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+    return response.status_code == 200
+
 def put_request(endpoint, params):
     """Sends a PUT request to the FastAPI backend."""
     response = requests.put(f"{API_BASE_URL}{endpoint}", params=params)
@@ -82,14 +124,26 @@ if selected_tab == "Experiments":
 elif selected_tab == "Runs":
     st.title("Manage Runs")
     exp_id = st.text_input("Experiment ID for Runs")
+    rediscover = st.checkbox("Rediscover metric and param columns", help="Needed after runs were logged outside this page")
     if exp_id and st.button("Fetch Runs"):
-        runs_data = fetch_data(f"/runs/{exp_id}")
-        runs = runs_data.get("runs", []) if isinstance(runs_data, dict) else runs_data
-        if runs:
-            run_df = pd.DataFrame(runs)
-            st.dataframe(run_df, use_container_width=True)
+        # Columnar export: one typed column per info field, metric and param
+        export_params = {"format": "arrow"}
+        known = None if rediscover else run_export_keys().get(exp_id)
+        if known:
+            export_params.update(metrics=",".join(known[0]), params=",".join(known[1]))
+        response = requests.get(f"{API_BASE_URL}/runs/{exp_id}/export", params=export_params)
+        if response.status_code == 200:
+            run_df = pa.ipc.open_stream(response.content).read_pandas()
+            if not run_df.empty:
+                run_export_keys()[exp_id] = (
+                    [c[len("metrics."):] for c in run_df.columns if c.startswith("metrics.")],
+                    [c[len("params."):] for c in run_df.columns if c.startswith("params.")],
+                )
+                st.dataframe(run_df, use_container_width=True)
+            else:
+                st.warning("No runs found.")
         else:
-            st.warning("No runs found.")
+            st.error(f"Error fetching runs: {response.text}")
 
     with st.form("create_run"):
         run_name = st.text_input("Run Name")
@@ -118,6 +172,8 @@ elif selected_tab == "Runs":
         elif log_option == "Parameter":
             post_request(f"/runs/{run_id}/log_param", {"key": log_key, "value": log_value})
             st.success(f"Logged parameter: {log_key} = {log_value}")
+        # The key may be new to its experiment: let the next export rediscover the columns
+        run_export_keys().clear()
         st.rerun()
 
     if st.button("Delete Run"):
@@ -206,10 +262,8 @@ elif selected_tab == "Artifact Logging":
     artifact_file = st.file_uploader("Upload Artifact")
     if st.button("Log Artifact"):
         if artifact_file:
-            temp_filename = f"temp_{artifact_file.name}"
-            with open(temp_filename, "wb") as f:
-                f.write(artifact_file.getbuffer())
-            if post_request(f"/runs/{run_id_art}/log_artifact", {"file_path": temp_filename, "artifact_path": artifact_path_input}):
+            params = {"artifact_path": artifact_path_input} if artifact_path_input else {}
+            if upload_file(f"/runs/{run_id_art}/artifacts", artifact_file, params):
                 st.success(f"Artifact {artifact_file.name} logged for run {run_id_art}")
 
 # -------------------- MODEL TAGGING --------------------